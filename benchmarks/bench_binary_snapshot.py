@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Loading a 1M-instrument catalogue: binary snapshot vs the JSON sidecar
+
+Both files are written from the same synthetic catalogue. The JSON rows
+time ``json.load`` of the sidecar, which every reporting step needs before
+it can answer anything; the binary rows time opening the snapshot and the
+queries a report runs against it (count by category and speciality, a
+name lookup, decoding random instruments).
+
+Usage:
+    python benchmarks/bench_binary_snapshot.py [--instruments 1000000]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from instrument_catalogue.binary_snapshot import BinarySnapshot, write_binary_snapshot
+from instrument_catalogue.output import write_snapshot
+from synthetic_corpus import CATEGORIES, SPECIALITIES, WORDS, random_text
+
+def make_complete_data(count, sets=2000, seed=0):
+    """Return completeInstrumentsData-shaped data with short text fields"""
+    rng = random.Random(seed)
+    set_names = [f"Set {index}" for index in range(sets)]
+    instruments = []
+    for index in range(count):
+        name = f"{rng.choice(WORDS).title()} {rng.choice(CATEGORIES)} {index}"
+        instruments.append({
+            'name': name,
+            'category': rng.choice(CATEGORIES),
+            'brief': random_text(rng, 60),
+            'description': random_text(rng, 120),
+            'usage': random_text(rng, 40),
+            'sourceFile': f"Instrument Description - {set_names[index % sets]}.csv",
+            'rowNumber': index % 500 + 2,
+            'sets': rng.sample(set_names, rng.randint(1, 2)),
+            'specialities': [rng.choice(SPECIALITIES)],
+            'features': [],
+            'image': f"https://via.placeholder.com/300x200/4A90E2/FFFFFF?text={name.replace(' ', '+')}",
+        })
+    sets_overview = [{'name': set_name, 'count': 0, 'speciality': SPECIALITIES[index % len(SPECIALITIES)],
+                      'filename': f"Instrument Description - {set_name}.csv"}
+                     for index, set_name in enumerate(set_names)]
+    return {'sets': sets_overview, 'instruments': instruments, 'metadata': {'uniqueInstruments': count}}
+
+def timed(label, function):
+    start = time.perf_counter()
+    result = function()
+    print(f"{label:44} {(time.perf_counter() - start) * 1000:9.1f} ms")
+    return result
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--instruments', type=int, default=1000000)
+    args = arg_parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as root:
+        json_path = os.path.join(root, 'completeInstrumentsData.snapshot.json')
+        binary_path = os.path.join(root, 'completeInstrumentsData.snapshot.bin')
+        complete_data = make_complete_data(args.instruments)
+        lookup = complete_data['instruments'][args.instruments // 3]['name']
+        timed("write JSON sidecar", lambda: write_snapshot(json_path, complete_data))
+        timed("write binary snapshot", lambda: write_binary_snapshot(binary_path, complete_data))
+        del complete_data
+        print(f"sizes: JSON {os.path.getsize(json_path) / 1024 / 1024:.0f} MB, "
+              f"binary {os.path.getsize(binary_path) / 1024 / 1024:.0f} MB\n")
+        
+        def load_json():
+            with open(json_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        
+        loaded = timed("JSON: json.load", load_json)
+        del loaded
+        
+        snapshot = timed("binary: open", lambda: BinarySnapshot(binary_path))
+        timed("binary: counts by category", lambda: snapshot.counts_by('category'))
+        timed("binary: counts by speciality", lambda: snapshot.counts_by('specialities'))
+        timed("binary: find one name", lambda: snapshot.find(lookup))
+        rng = random.Random(1)
+        timed("binary: decode 1000 random instruments",
+              lambda: [snapshot[rng.randrange(len(snapshot))] for _ in range(1000)])
+        snapshot.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Catalogue service throughput and latency under many concurrent keep-alive clients
+
+The service runs in a child process on a synthetic catalogue; each client
+holds one connection and loops over a mix of page, filter and search
+requests, revalidating half of them with If-None-Match. The full-bundle row
+is the cost of every client downloading completeInstrumentsData instead.
+
+Usage:
+    python benchmarks/bench_catalogue_service.py [--instruments 20000] [--clients 200] [--requests 50]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from instrument_catalogue.service import CatalogueQueryIndex, start_service
+from synthetic_corpus import CATEGORIES, SPECIALITIES, WORDS, random_text
+
+def make_catalogue(count, sets=500, seed=0):
+    """Return (instruments, sets overview) shaped like completeInstrumentsData"""
+    rng = random.Random(seed)
+    instruments = []
+    for index in range(count):
+        instruments.append({
+            'name': f"{rng.choice(WORDS).title()} {rng.choice(CATEGORIES)} {index}",
+            'category': rng.choice(CATEGORIES),
+            'brief': random_text(rng, 80),
+            'description': random_text(rng, 300),
+            'usage': random_text(rng, 120),
+            'features': [],
+            'sets': [f"Set {rng.randrange(sets)}" for _ in range(rng.randint(1, 3))]
+        })
+    sets_overview = [{'name': f"Set {index}", 'count': 0, 'speciality': SPECIALITIES[index % len(SPECIALITIES)],
+                      'filename': f"Instrument Description - Set {index}.csv"} for index in range(sets)]
+    return instruments, sets_overview
+
+def run_service(count, ready):
+    """Child process: index the synthetic catalogue and serve it on a free port"""
+    index = CatalogueQueryIndex(*make_catalogue(count))
+    
+    async def serve():
+        _, server = await start_service(index, port=0)
+        ready.put((server.sockets[0].getsockname()[1], index.etag, len(b','.join(index.encoded_instruments))))
+        await server.serve_forever()
+    
+    asyncio.run(serve())
+
+def request_targets(rng, sets):
+    """Return one client's request mix"""
+    return [rng.choice([
+        f"/instruments?offset={rng.randrange(0, 1000, 50)}&limit=50",
+        f"/instruments?set=Set%20{rng.randrange(sets)}",
+        f"/sets?speciality={SPECIALITIES[rng.randrange(len(SPECIALITIES))].replace(' ', '%20')}",
+        "/specialities",
+        f"/search?q={rng.choice(WORDS)}%20{rng.choice(CATEGORIES).split()[0].lower()[:4]}&limit=20",
+    ]) for _ in range(1000)]
+
+async def client(port, etag, targets, count, latencies, statuses):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for number in range(count):
+        target = targets[number % len(targets)]
+        conditional = f"If-None-Match: {etag}\r\n" if number % 2 else ''
+        start = time.perf_counter()
+        writer.write(f"GET {target} HTTP/1.1\r\nHost: bench\r\n{conditional}\r\n".encode('latin-1'))
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line == b'\r\n':
+                break
+            if line.lower().startswith(b'content-length:'):
+                length = int(line.split(b':')[1])
+        if status != 304:
+            await reader.readexactly(length)
+        latencies.append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+    writer.close()
+    await writer.wait_closed()
+
+async def load(port, etag, clients, requests, sets):
+    latencies = []
+    statuses = {}
+    rng = random.Random(1)
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, etag, request_targets(rng, sets), requests, latencies, statuses)
+                           for _ in range(clients)))
+    return time.perf_counter() - start, sorted(latencies), statuses
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--instruments', type=int, default=20000)
+    arg_parser.add_argument('--clients', type=int, default=200, help="concurrent connections")
+    arg_parser.add_argument('--requests', type=int, default=50, help="requests per connection")
+    args = arg_parser.parse_args()
+    
+    ready = multiprocessing.Queue()
+    service = multiprocessing.Process(target=run_service, args=(args.instruments, ready), daemon=True)
+    start = time.perf_counter()
+    service.start()
+    port, etag, bundle_bytes = ready.get()
+    print(f"{args.instruments} instruments indexed and serving in {time.perf_counter() - start:.1f} s "
+          f"(full bundle {bundle_bytes / 1024 / 1024:.1f} MB)")
+    
+    try:
+        seconds, latencies, statuses = asyncio.run(load(port, etag, args.clients, args.requests, 500))
+    finally:
+        service.terminate()
+    
+    total = len(latencies)
+    print(f"{args.clients} clients x {args.requests} requests: {total / seconds:,.0f} req/s, "
+          f"p50 {percentile(latencies, 0.5) * 1000:.2f} ms, p99 {percentile(latencies, 0.99) * 1000:.2f} ms")
+    print("statuses: " + json.dumps(statuses, sort_keys=True))
+    print(f"every client fetching the full bundle once: {bundle_bytes * args.clients / 1024 / 1024:,.0f} MB")
+
+if __name__ == '__main__':
+    main()
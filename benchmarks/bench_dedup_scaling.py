@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Dedup scaling benchmark: InstrumentIndex vs the legacy nested-loop scan
+
+Usage:
+    python benchmarks/bench_dedup_scaling.py [--max-rows 1000000]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from instrument_catalogue.dedup import InstrumentIndex
+
+def make_rows(count, duplication=4, sets=500, seed=0):
+    """Return (instrument, set_name) rows with roughly ``duplication`` rows per name"""
+    rng = random.Random(seed)
+    unique = max(1, count // duplication)
+    rows = []
+    for _ in range(count):
+        name = f"Instrument {rng.randrange(unique):07d}"
+        if rng.random() < 0.5:
+            name = name.upper()
+        rows.append(({'name': name}, f"Set {rng.randrange(sets):04d}"))
+    return rows
+
+def legacy_dedup(rows):
+    """The nested-loop dedup the fix_parsing* scripts used before InstrumentIndex"""
+    all_instruments = []
+    for instrument, set_name in rows:
+        existing_instrument = None
+        for existing in all_instruments:
+            if existing['name'].lower() == instrument['name'].lower():
+                existing_instrument = existing
+                break
+        
+        if existing_instrument:
+            if set_name not in existing_instrument['sets']:
+                existing_instrument['sets'].append(set_name)
+        else:
+            instrument['sets'] = [set_name]
+            all_instruments.append(instrument)
+    return all_instruments
+
+def indexed_dedup(rows):
+    """Dedup through the shared hash index"""
+    instrument_index = InstrumentIndex()
+    for instrument, set_name in rows:
+        instrument_index.merge(instrument, set_name)
+    return instrument_index.instruments()
+
+def time_dedup(function, count):
+    """Time one dedup strategy over freshly generated rows"""
+    rows = make_rows(count)
+    start = time.perf_counter()
+    unique = function(rows)
+    elapsed = time.perf_counter() - start
+    return elapsed, len(unique)
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--max-rows', type=int, default=1000000)
+    arg_parser.add_argument('--max-legacy-rows', type=int, default=8000)
+    args = arg_parser.parse_args()
+    
+    print(f"{'strategy':>8} {'rows':>9} {'unique':>8} {'seconds':>9} {'ns/row':>9}")
+    
+    count = 1000
+    while count <= args.max_legacy_rows:
+        elapsed, unique = time_dedup(legacy_dedup, count)
+        print(f"{'legacy':>8} {count:>9} {unique:>8} {elapsed:>9.3f} {elapsed / count * 1e9:>9.0f}")
+        count *= 2
+    
+    count = 10000
+    while count <= args.max_rows:
+        elapsed, unique = time_dedup(indexed_dedup, count)
+        print(f"{'indexed':>8} {count:>9} {unique:>8} {elapsed:>9.3f} {elapsed / count * 1e9:>9.0f}")
+        count *= 10
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate name detection: segment index vs pairwise comparison
+
+Usage:
+    python benchmarks/bench_fuzzy_names.py [--sizes 10000 30000] [--pairwise-size 2000]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from instrument_catalogue.fuzzy import bounded_levenshtein, fuzzy_key, number_key, similar_pairs
+from synthetic_corpus import CATEGORIES
+
+SYLLABLES = ['ba', 'ke', 'lo', 'mi', 'tza', 'ren', 'vos', 'dal', 'sho', 'nik', 'ter',
+             'gu', 'hal', 'bec', 'ston', 'wi', 'mar', 'ox', 'pel', 'rud']
+QUALIFIERS = ['Curved', 'Straight', 'Toothed', 'Non-Toothed', 'Fine', 'Heavy', 'Angled',
+              'Adult', 'Paediatric', 'Long', 'Short', 'Double Ended', 'Serrated']
+
+def misspell(name, rng):
+    """Return the name with one random deletion, insertion or substitution"""
+    index = rng.randrange(len(name))
+    operation = rng.randrange(3)
+    letter = rng.choice('abcdefghijklmnopqrstuvwxyz')
+    if operation == 0:
+        return name[:index] + name[index + 1:]
+    if operation == 1:
+        return name[:index] + letter + name[index:]
+    return name[:index] + letter + name[index + 1:]
+
+def eponym(rng):
+    """Return a made-up surname, so large catalogues have a realistic spread of names"""
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+
+def make_names(count, typo_rate=0.2, seed=0):
+    """Return ``count`` instrument names, about ``typo_rate`` of them misspelt copies"""
+    rng = random.Random(seed)
+    eponyms = [eponym(rng) for _ in range(max(10, count // 5))]
+    names = []
+    while len(names) < count:
+        if names and rng.random() < typo_rate:
+            names.append(misspell(rng.choice(names), rng))
+            continue
+        parts = [rng.choice(eponyms), rng.choice(CATEGORIES)] + rng.sample(QUALIFIERS, rng.randint(0, 2))
+        names.append(' '.join(parts) + f' {rng.randint(4, 12)}"')
+    return names
+
+def pairwise_pairs(names, max_distance):
+    """Compare every pair of names: the quadratic baseline"""
+    keys = [fuzzy_key(name) for name in names]
+    numbers = [number_key(key) for key in keys]
+    return {(i, j) for j in range(len(keys)) for i in range(j)
+            if numbers[i] == numbers[j] and bounded_levenshtein(keys[i], keys[j], max_distance) <= max_distance}
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 30000])
+    arg_parser.add_argument('--pairwise-size', type=int, default=2000)
+    arg_parser.add_argument('--max-distance', type=int, default=2)
+    args = arg_parser.parse_args()
+    
+    names = make_names(args.pairwise_size)
+    start = time.perf_counter()
+    expected = pairwise_pairs(names, args.max_distance)
+    pairwise_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    found = {(i, j) for i, j, _ in similar_pairs(names, args.max_distance)}
+    index_seconds = time.perf_counter() - start
+    print(f"{args.pairwise_size} names: pairwise {pairwise_seconds:.2f} s, index {index_seconds:.2f} s, "
+          f"{len(found & expected)}/{len(expected)} pairs found")
+    
+    for size in args.sizes:
+        names = make_names(size)
+        start = time.perf_counter()
+        pairs = sum(1 for _ in similar_pairs(names, args.max_distance))
+        seconds = time.perf_counter() - start
+        pairwise_estimate = pairwise_seconds * (size / args.pairwise_size) ** 2
+        print(f"{size} names: index {seconds:.2f} s ({pairs} pairs), "
+              f"pairwise would take ~{pairwise_estimate:.0f} s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Peak memory of the multi-line reader: mmap'd byte scan vs reading the whole file
+
+Usage:
+    python benchmarks/bench_mmap_reader.py [--megabytes 200]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_streaming_memory import peak_rss_kb
+from synthetic_corpus import CATEGORIES, random_text, write_multiline_set
+
+def write_export(path, megabytes, text_length=2000, seed=0):
+    """Write a multi-line vendor export of roughly ``megabytes`` MB"""
+    rng = random.Random(seed)
+    pool = [[f"{rng.choice(CATEGORIES)} {index:06d}", rng.choice(CATEGORIES),
+             random_text(rng, 200), random_text(rng, text_length), 'Reusable',
+             random_text(rng, text_length // 2), random_text(rng, text_length // 4),
+             random_text(rng, text_length // 4), random_text(rng, text_length // 4), '']
+            for index in range(1000)]
+    row_bytes = sum(len(field) + 3 for field in pool[0]) + 9
+    rows = [pool[index % len(pool)] for index in range(megabytes * 1024 * 1024 // row_bytes)]
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        write_multiline_set(f, rows)
+
+def run_mode(mode, path):
+    """Parse the export in this process and report rows, seconds and peak RSS"""
+    from instrument_catalogue.layouts import get_layout
+    from instrument_catalogue.parsing import stream_csv_file
+    
+    get_layout('multiline').use_mmap = mode == 'mmap'
+    start = time.perf_counter()
+    _, records = stream_csv_file(path, layout='multiline')
+    rows = sum(1 for _ in records)
+    print(json.dumps({'mode': mode, 'rows': rows, 'seconds': time.perf_counter() - start,
+                      'peakRssKb': peak_rss_kb()}))
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--megabytes', type=int, default=200)
+    arg_parser.add_argument('--mode', choices=['read', 'mmap'], help=argparse.SUPPRESS)
+    arg_parser.add_argument('--path', help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+    
+    if args.mode:
+        run_mode(args.mode, args.path)
+        return
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'Instrument Description - Vendor Export.csv')
+        write_export(path, args.megabytes)
+        print(f"Multi-line export of {os.path.getsize(path) / 1024 / 1024:.0f} MB")
+        
+        # Each mode runs in a fresh interpreter so peak RSS is not shared. Mapped
+        # pages count towards RSS while resident; the reader releases them once parsed.
+        results = {}
+        for mode in ['read', 'mmap']:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--mode', mode, '--path', path],
+                check=True, capture_output=True, text=True
+            ).stdout
+            results[mode] = json.loads(output.strip().splitlines()[-1])
+            print(f"{mode:>5}: {results[mode]['peakRssKb'] / 1024:8.1f} MB peak RSS, "
+                  f"{results[mode]['seconds']:6.2f} s ({results[mode]['rows']} rows)")
+        
+        assert results['read']['rows'] == results['mmap']['rows']
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Output writer memory: streaming record-at-a-time writer vs json.dumps of the whole catalogue
+
+Usage:
+    python benchmarks/bench_output_writer.py [--instruments 50000] [--text-length 800]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from instrument_catalogue.output import write_js_export
+from instrument_catalogue.records import Instrument, UniqueInstrument, serialize_record
+from synthetic_corpus import CATEGORIES, random_text
+
+def make_instruments(count, text_length, seed=0):
+    """Return ``count`` unique instruments with several KB of text each"""
+    rng = random.Random(seed)
+    return [UniqueInstrument.from_instrument(Instrument(
+        name=f"{rng.choice(CATEGORIES)} {index:07d}",
+        category=rng.choice(CATEGORIES),
+        brief=random_text(rng, text_length // 8),
+        description=random_text(rng, text_length),
+        usage=random_text(rng, text_length // 4),
+        importantConsiderations=random_text(rng, text_length // 4),
+        sourceFile='Instrument Description - Synthetic.csv',
+        rowNumber=index + 2,
+        setName='Synthetic',
+        sets=['Synthetic']
+    )) for index in range(count)]
+
+def write_with_dumps(path, data, pretty):
+    """The previous writer: one json.dumps string for the whole file"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('// Complete Surgical Instruments Data\n')
+        f.write('export const completeInstrumentsData = ')
+        if pretty:
+            f.write(json.dumps(data, indent=2, ensure_ascii=False, default=serialize_record))
+        else:
+            f.write(json.dumps(data, separators=(',', ':'), ensure_ascii=False, default=serialize_record))
+        f.write(';\n')
+
+def write_streaming(path, data, pretty):
+    write_js_export(path, 'Complete Surgical Instruments Data', 'completeInstrumentsData', data, pretty)
+
+def measure(writer, path, data, pretty):
+    """Return (best seconds of three runs, peak traced bytes above the data already in memory)"""
+    seconds = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        writer(path, data, pretty)
+        seconds = min(seconds, time.perf_counter() - start)
+    
+    tracemalloc.start()
+    writer(path, data, pretty)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--instruments', type=int, default=50000)
+    arg_parser.add_argument('--text-length', type=int, default=800)
+    args = arg_parser.parse_args()
+    
+    instruments = make_instruments(args.instruments, args.text_length)
+    data = {'sets': [], 'instruments': instruments, 'metadata': {'uniqueInstruments': len(instruments)}}
+    
+    with tempfile.TemporaryDirectory() as directory:
+        for mode, pretty in [('pretty', True), ('compact', False)]:
+            paths = {}
+            for name, writer in [('json.dumps', write_with_dumps), ('streaming', write_streaming)]:
+                paths[name] = os.path.join(directory, f"{name}-{mode}.js")
+                seconds, peak = measure(writer, paths[name], data, pretty)
+                print(f"{mode:>7} {name:>10}: {seconds:6.2f} s, peak {peak / 1024 / 1024:8.1f} MB, "
+                      f"file {os.path.getsize(paths[name]) / 1024 / 1024:.1f} MB")
+            with open(paths['json.dumps'], 'rb') as a, open(paths['streaming'], 'rb') as b:
+                assert a.read() == b.read(), f"{mode} outputs differ"
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Parsing engine throughput per CSV layout (old, new, multiline)
+
+Usage:
+    python benchmarks/bench_parsing_engine.py [--sets 60] [--rows-per-set 500]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from instrument_catalogue.parsing import list_csv_files, open_csv_file, stream_csv_file
+from synthetic_corpus import generate_corpus
+
+def time_layout(corpus, repeat):
+    """Return (detect seconds, parse seconds, rows, bytes) for one layout's files"""
+    file_paths = [os.path.join(corpus, f) for f in list_csv_files(corpus)]
+    total_bytes = sum(os.path.getsize(path) for path in file_paths)
+    best_detect = best_parse = float('inf')
+    rows = 0
+    
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path in file_paths:
+            detected, header, text = open_csv_file(path)
+            text.close()
+        best_detect = min(best_detect, time.perf_counter() - start)
+        
+        start = time.perf_counter()
+        rows = 0
+        for path in file_paths:
+            structure, records = stream_csv_file(path)
+            for _record in records:
+                rows += 1
+        best_parse = min(best_parse, time.perf_counter() - start)
+    
+    return best_detect, best_parse, rows, total_bytes
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--sets', type=int, default=60)
+    arg_parser.add_argument('--rows-per-set', type=int, default=500)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+    
+    print(f"{'layout':>10} {'rows':>8} {'MB':>7} {'detect ms':>10} {'parse s':>8} {'rows/s':>9} {'MB/s':>7}")
+    for layout in ['old', 'new', 'multiline']:
+        with tempfile.TemporaryDirectory() as corpus:
+            generate_corpus(corpus, sets=args.sets, rows_per_set=args.rows_per_set,
+                            layouts=(layout,))
+            detect, parse, rows, total_bytes = time_layout(corpus, args.repeat)
+            megabytes = total_bytes / 1e6
+            print(f"{layout:>10} {rows:>8} {megabytes:>7.1f} {detect * 1000:>10.1f} {parse:>8.2f} "
+                  f"{rows / parse:>9.0f} {megabytes / parse:>7.1f}")
+
+if __name__ == '__main__':
+    main()
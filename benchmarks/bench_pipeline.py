@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Pipeline stage benchmark over a synthetic instrument_csvs tree
+
+Times parse_all_csv_files, create_unique_instruments_data,
+create_sets_overview and the streaming build_catalogue on a generated corpus
+mixing the old, new and multi-line layouts, records each stage's peak
+traced memory and writes the results as JSON. Pass ``--baseline`` with an
+earlier results file to fail when a stage got slower than ``--tolerance``.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--sets 200] [--rows-per-set 100] [--duplication 4]
+                                        [--output results.json] [--baseline previous.json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import instrument_catalogue as parser
+from bench_streaming_memory import peak_rss_kb
+from synthetic_corpus import generate_corpus
+
+STAGES = ['parse_all_csv_files', 'create_unique_instruments_data',
+          'create_sets_overview', 'build_catalogue']
+
+def run_stages(corpus):
+    """Run each pipeline stage once, yielding (stage, seconds, result) as they finish"""
+    start = time.perf_counter()
+    all_instruments, set_info, _ = parser.parse_all_csv_files(corpus)
+    yield 'parse_all_csv_files', time.perf_counter() - start, all_instruments
+    
+    start = time.perf_counter()
+    unique = parser.create_unique_instruments_data(all_instruments)
+    yield 'create_unique_instruments_data', time.perf_counter() - start, unique
+    
+    start = time.perf_counter()
+    sets_overview = parser.create_sets_overview(set_info, all_instruments)
+    yield 'create_sets_overview', time.perf_counter() - start, sets_overview
+    
+    del all_instruments, unique
+    start = time.perf_counter()
+    catalogue = parser.build_catalogue(corpus)
+    yield 'build_catalogue', time.perf_counter() - start, catalogue['uniqueInstruments']
+
+def time_stages(corpus, repeat):
+    """Return {stage: best seconds over ``repeat`` runs} and the result sizes"""
+    seconds = {}
+    sizes = {}
+    for _ in range(repeat):
+        for stage, elapsed, result in run_stages(corpus):
+            seconds[stage] = min(elapsed, seconds.get(stage, elapsed))
+            sizes[stage] = len(result)
+    return seconds, sizes
+
+def trace_stages(corpus):
+    """Return {stage: peak traced KB}, measured in a separate run as tracing slows Python down"""
+    peaks = {}
+    tracemalloc.start()
+    try:
+        for stage, _, _ in run_stages(corpus):
+            peaks[stage] = tracemalloc.get_traced_memory()[1] // 1024
+            # Python 3.8 cannot reset the peak; later stages then include earlier ones
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+def find_regressions(results, baseline, tolerance):
+    """Return messages for stages slower than ``tolerance`` over a baseline results file"""
+    if baseline['config'] != results['config']:
+        print("Warning: baseline was recorded with a different corpus configuration")
+    
+    regressions = []
+    for stage, current in results['stages'].items():
+        previous = baseline['stages'].get(stage)
+        if previous and current['seconds'] > previous['seconds'] * (1 + tolerance):
+            regressions.append(f"{stage}: {previous['seconds']:.3f} s -> {current['seconds']:.3f} s")
+    return regressions
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--sets', type=int, default=200)
+    arg_parser.add_argument('--rows-per-set', type=int, default=100)
+    arg_parser.add_argument('--duplication', type=float, default=4.0,
+                            help="Average number of rows per distinct instrument name")
+    arg_parser.add_argument('--text-length', type=int, default=800)
+    arg_parser.add_argument('--line-break-rate', type=float, default=0.1,
+                            help="Share of long text fields quoted across several lines")
+    arg_parser.add_argument('--layouts', nargs='+', default=['new', 'old', 'multiline'],
+                            choices=['new', 'old', 'multiline'])
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--output', help="Write the results as JSON to this file")
+    arg_parser.add_argument('--baseline', help="Compare against an earlier --output file")
+    arg_parser.add_argument('--tolerance', type=float, default=0.2,
+                            help="Allowed slowdown over the baseline (default 0.2, i.e. 20%%)")
+    args = arg_parser.parse_args()
+    
+    config = {
+        'sets': args.sets,
+        'rowsPerSet': args.rows_per_set,
+        'duplication': args.duplication,
+        'textLength': args.text_length,
+        'lineBreakRate': args.line_break_rate,
+        'layouts': args.layouts,
+        'seed': args.seed
+    }
+    
+    with tempfile.TemporaryDirectory() as corpus:
+        rows = generate_corpus(corpus, sets=args.sets, rows_per_set=args.rows_per_set,
+                               unique_names=max(1, round(args.sets * args.rows_per_set / args.duplication)),
+                               text_length=args.text_length, seed=args.seed, layouts=args.layouts,
+                               line_break_rate=args.line_break_rate)
+        corpus_bytes = sum(entry.stat().st_size for entry in os.scandir(corpus))
+        print(f"Generated {rows} rows across {args.sets} sets ({corpus_bytes / 1024 / 1024:.1f} MB)")
+        
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            seconds, sizes = time_stages(corpus, args.repeat)
+            peaks = trace_stages(corpus)
+    
+    results = {
+        'benchmark': 'pipeline',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': config,
+        'rows': rows,
+        'corpusBytes': corpus_bytes,
+        'stages': {stage: {'seconds': round(seconds[stage], 6),
+                           'rowsPerSecond': round(rows / seconds[stage]) if seconds[stage] else None,
+                           'peakTracedKb': peaks[stage],
+                           'results': sizes[stage]}
+                   for stage in STAGES},
+        'peakRssKb': peak_rss_kb()
+    }
+    
+    print(f"{'stage':>31} {'seconds':>9} {'rows/s':>10} {'peak MB':>9}")
+    for stage, result in results['stages'].items():
+        print(f"{stage:>31} {result['seconds']:>9.3f} {result['rowsPerSecond']:>10} "
+              f"{result['peakTracedKb'] / 1024:>9.1f}")
+    print(f"Process peak RSS: {results['peakRssKb'] / 1024:.1f} MB")
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            sys.exit(1)
+        print(f"No stage slower than the baseline by more than {args.tolerance:.0%}")
+
+if __name__ == '__main__':
+    main()
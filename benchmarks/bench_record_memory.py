@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Per-record memory: __slots__ Instrument records vs the old dict-per-row design
+
+Usage:
+    python benchmarks/bench_record_memory.py [--sets 400] [--rows-per-set 500]
+"""
+
+import os
+import sys
+import gc
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from instrument_catalogue import create_unique_instruments_data, iter_all_csv_files
+from instrument_catalogue.records import INTERNED_FIELDS
+from synthetic_corpus import generate_corpus
+
+def as_row_dict(instrument):
+    """Rebuild the dict a row used to be parsed into, without interned values"""
+    data = instrument.to_dict()
+    for field in INTERNED_FIELDS:
+        # Each row used to own its own copy of repeated strings
+        data[field] = (data[field] + '.')[:-1]
+    return data
+
+def measure(build):
+    """Return (bytes retained by build(), result)"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return retained, result
+
+def parse_rows(corpus, convert):
+    """Parse the whole corpus into a list, converting each record with ``convert``"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return [convert(instrument) for instrument in iter_all_csv_files(corpus, {}, {})]
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--sets', type=int, default=400)
+    arg_parser.add_argument('--rows-per-set', type=int, default=500)
+    arg_parser.add_argument('--unique-names', type=int, default=50000)
+    arg_parser.add_argument('--text-length', type=int, default=160)
+    args = arg_parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as corpus:
+        generate_corpus(corpus, sets=args.sets, rows_per_set=args.rows_per_set,
+                        unique_names=args.unique_names, text_length=args.text_length)
+        
+        dict_bytes, dict_rows = measure(lambda: parse_rows(corpus, as_row_dict))
+        rows = len(dict_rows)
+        del dict_rows
+        slot_bytes, slot_rows = measure(lambda: parse_rows(corpus, lambda instrument: instrument))
+        
+        # Unique instruments: dicts carrying the constant fields vs slots objects
+        unique_slot_bytes, unique = measure(lambda: create_unique_instruments_data(slot_rows))
+        unique_dict_bytes, unique_dicts = measure(lambda: [u.to_dict() for u in unique])
+        
+        print(f"{rows} parsed rows, {len(unique)} unique instruments\n")
+        print(f"{'':>22} {'dict':>12} {'slots':>12} {'saved':>7}")
+        for label, count, old, new in [('parsed row', rows, dict_bytes, slot_bytes),
+                                       ('unique instrument', len(unique), unique_dict_bytes,
+                                        unique_slot_bytes)]:
+            print(f"{label + ' (bytes)':>22} {old / count:>12.0f} {new / count:>12.0f} "
+                  f"{1 - new / old:>7.0%}")
+        print(f"{'parsed corpus (MB)':>22} {dict_bytes / 1e6:>12.1f} {slot_bytes / 1e6:>12.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+BM25 relevance search latency at 100k instruments, against a p99 target
+
+Queries mix single category and filler words (which match a large share
+of the catalogue), multi-word queries, partially typed words matched as
+prefixes and name-plus-number lookups. The prefix cache is cleared before
+every query, so prefix expansions are always merged from scratch. Top-k
+results are checked against a full ranking of every match for a sample
+of queries.
+
+Usage:
+    python benchmarks/bench_relevance_search.py [--instruments 100000] [--queries 2000] [--limit 20]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from instrument_catalogue.relevance import RelevanceIndex
+from bench_catalogue_service import make_catalogue, percentile
+from synthetic_corpus import CATEGORIES, WORDS
+
+P99_TARGET_MS = 5.0
+
+def make_queries(rng, count, instruments):
+    """Return ``count`` queries drawn from several shapes"""
+    categories = [category.lower() for category in CATEGORIES]
+    shapes = [
+        lambda: rng.choice(categories),
+        lambda: rng.choice(WORDS),
+        lambda: f"{rng.choice(WORDS)} {rng.choice(categories)}",
+        lambda: f"{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.choice(categories)}",
+        lambda: f"{rng.choice(WORDS)} {rng.choice(categories)[:rng.randint(2, 5)]}",
+        lambda: f"{rng.choice(categories).split()[0]} {rng.randrange(len(instruments))}",
+    ]
+    return [rng.choice(shapes)() for _ in range(count)]
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--instruments', type=int, default=100000)
+    arg_parser.add_argument('--queries', type=int, default=2000)
+    arg_parser.add_argument('--limit', type=int, default=20, help="results returned per query")
+    args = arg_parser.parse_args()
+    rng = random.Random(3)
+    
+    instruments, _ = make_catalogue(args.instruments)
+    start = time.perf_counter()
+    index = RelevanceIndex.from_instruments(instruments)
+    print(f"{args.instruments} instruments, {len(index.terms)} terms "
+          f"(index built in {time.perf_counter() - start:.1f} s)")
+    
+    queries = make_queries(rng, args.queries, instruments)
+    latencies = []
+    hits = 0
+    for query in queries:
+        index._prefix_scores.cache_clear()
+        start = time.perf_counter()
+        results = index.search(query, args.limit)
+        latencies.append(time.perf_counter() - start)
+        hits += bool(results)
+    latencies.sort()
+    
+    for query in queries[:100]:
+        expected = index.search(query, limit=None)[:args.limit]
+        found = index.search(query, args.limit)
+        assert [instrument_id for instrument_id, _ in found] == [instrument_id for instrument_id, _ in expected], query
+    
+    p99 = percentile(latencies, 0.99) * 1000
+    print(f"{len(queries)} queries, top {args.limit} ({hits} with results): "
+          f"p50 {percentile(latencies, 0.5) * 1000:.2f} ms, p99 {p99:.2f} ms, max {latencies[-1] * 1000:.2f} ms")
+    print(f"p99 target {P99_TARGET_MS:.0f} ms: {'met' if p99 < P99_TARGET_MS else 'MISSED'}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Search latency: prebuilt inverted index vs a linear scan with the same matching
+
+Both sides match every query token as a whole term and the last one as a
+prefix; the result sets are checked to be equal before anything is timed.
+The filler prose draws on a 20-word vocabulary, so most query words occur in
+nearly every instrument; this is the index's worst case.
+
+Usage:
+    python benchmarks/bench_search_index.py [--sizes 10000 100000]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from instrument_catalogue.search_index import SearchIndex, linear_search
+from synthetic_corpus import CATEGORIES, WORDS, random_text
+
+QUERIES = ['forceps', 'curved', 'vess', 'serrated clamp', 'set 42', 'delicate tissue ret']
+
+def make_instruments(count, sets=500, seed=0):
+    """Return ``count`` synthetic unique instruments shaped like completeInstrumentsData"""
+    rng = random.Random(seed)
+    instruments = []
+    for index in range(count):
+        instruments.append({
+            'name': f"{rng.choice(WORDS).title()} {rng.choice(CATEGORIES)} {index}",
+            'category': rng.choice(CATEGORIES),
+            'description': random_text(rng, 300),
+            'usage': random_text(rng, 120),
+            'features': [],
+            'sets': [f"Set {rng.randrange(sets)}" for _ in range(rng.randint(1, 3))]
+        })
+    return instruments
+
+def mean_latency(function, repeat):
+    """Return (mean seconds per call, last result)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - start) / repeat, result
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    arg_parser.add_argument('--limit', type=int, default=50, help="results returned per query")
+    args = arg_parser.parse_args()
+    
+    for size in args.sizes:
+        instruments = make_instruments(size)
+        start = time.perf_counter()
+        index = SearchIndex.from_instruments(instruments)
+        build_seconds = time.perf_counter() - start
+        
+        print(f"{size} instruments, {len(index.terms)} terms "
+              f"(index built in {build_seconds * 1000:.0f} ms)")
+        for query in QUERIES:
+            found = index.search(query)
+            if set(linear_search(instruments, query)) != {instrument_id for instrument_id, _ in found}:
+                raise SystemExit(f"Scan and index disagree on {query!r}")
+            scan_seconds, scanned = mean_latency(lambda: linear_search(instruments, query), 3)
+            index_seconds, _ = mean_latency(lambda: index.search(query, args.limit), 20)
+            print(f"  {query!r:24} scan {scan_seconds * 1000:8.2f} ms ({len(scanned):6} hits)  "
+                  f"index top {args.limit} {index_seconds * 1000:7.2f} ms ({len(found):6} hits)  "
+                  f"{scan_seconds / index_seconds:6.0f}x")
+
+if __name__ == '__main__':
+    main()
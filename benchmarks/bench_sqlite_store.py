@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+SQLite store: build time, file size and query latency on a large synthetic catalogue
+
+The catalogue is written with ``write_database`` and then queried through
+``CatalogueDatabase``: FTS5 searches (two words, the last one a prefix),
+set lookups and speciality lookups, each repeated over random arguments.
+The synthetic text draws on a 20-word vocabulary, so a broad search
+matches most of the catalogue and every match is scored: a worst case.
+The selective row searches a name word plus its number, closer to a
+user typing an instrument's name.
+
+Usage:
+    python benchmarks/bench_sqlite_store.py [--instruments 100000] [--queries 200]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from instrument_catalogue.database import CatalogueDatabase, write_database
+from bench_catalogue_service import make_catalogue, percentile
+from synthetic_corpus import CATEGORIES, SPECIALITIES, WORDS
+
+def time_queries(query, arguments):
+    """Return sorted per-call latencies in seconds and the mean result count"""
+    latencies = []
+    results = 0
+    for argument in arguments:
+        start = time.perf_counter()
+        results += len(query(argument))
+        latencies.append(time.perf_counter() - start)
+    return sorted(latencies), results / len(arguments)
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--instruments', type=int, default=100000)
+    arg_parser.add_argument('--sets', type=int, default=2000)
+    arg_parser.add_argument('--queries', type=int, default=200)
+    args = arg_parser.parse_args()
+    rng = random.Random(2)
+    
+    instruments, sets_overview = make_catalogue(args.instruments, sets=args.sets)
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'catalogue.db')
+        start = time.perf_counter()
+        size = write_database(path, instruments, sets_overview)
+        print(f"{args.instruments} instruments written in {time.perf_counter() - start:.1f} s "
+              f"({size / 1024 / 1024:.1f} MB)")
+        
+        with CatalogueDatabase(path) as database:
+            searches = [f"{rng.choice(WORDS)} {rng.choice(CATEGORIES).split()[0].lower()[:4]}"
+                        for _ in range(args.queries)]
+            selective = [f"{instruments[number]['name'].split()[0]} {number}"
+                         for number in (rng.randrange(args.instruments) for _ in range(args.queries))]
+            set_names = [f"Set {rng.randrange(args.sets)}" for _ in range(args.queries)]
+            specialities = [rng.choice(SPECIALITIES) for _ in range(args.queries)]
+            for label, query, arguments in (
+                ('broad search, top 20', lambda text: database.search(text, limit=20), searches),
+                ('selective search, top 20', lambda text: database.search(text, limit=20), selective),
+                ('set instruments', database.instruments_in_set, set_names),
+                ('speciality sets', database.sets, specialities),
+                ('speciality instruments, first 50',
+                 lambda speciality: database.instruments_in_speciality(speciality, limit=50), specialities),
+            ):
+                latencies, results = time_queries(query, arguments)
+                print(f"{label:34} p50 {percentile(latencies, 0.5) * 1000:7.2f} ms  "
+                      f"p99 {percentile(latencies, 0.99) * 1000:7.2f} ms  ({results:.0f} rows)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Peak RSS benchmark: the original read-everything parse vs the streaming build_catalogue pipeline
+
+``baseline`` reproduces the parser this package replaced: every row is read
+with csv.DictReader into a dict, all of them are kept in one list, and
+unique instruments are dict copies. ``list`` is the current list API
+(``parse_all_csv_files``), which keeps every row but as slotted records.
+The streaming pipeline is measured without the build cache, then with a
+cold cache (every file parsed and written to it, as on a first build or
+after every CSV changed) and with the warm cache that run leaves behind.
+
+Usage:
+    python benchmarks/bench_streaming_memory.py [--sets 500] [--rows-per-set 200]
+"""
+
+import os
+import re
+import csv
+import sys
+import json
+import argparse
+import resource
+import tempfile
+import subprocess
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MODES = ['baseline', 'list', 'stream', 'cold-cache', 'warm-cache']
+
+TEXT_COLUMNS = {'name': 'NAME', 'category': 'CATEGORY', 'brief': 'BRIEF', 'description': 'DISCRIPTION ',
+                'type': 'TYPE', 'usage': 'USAGE', 'importantConsiderations': 'IMPORTANT CONSIDERATIONS',
+                'cleaningSterilization': 'CLEANING & STERILIZATION',
+                'inspectionMaintenance': 'INSPECTION & MAINTENANCE', 'referenceImages': 'REFERENCE IMAGES',
+                'speciality': 'SPECIALITY', 'setDescription': 'SET DISCRIPTION'}
+
+def peak_rss_kb():
+    """Return this process's peak resident set size in KB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports kilobytes
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def _clean(text):
+    text = re.sub(r'\s+', ' ', (text or '').strip())
+    return text[1:-1] if text.startswith('"') and text.endswith('"') else text
+
+def baseline_build(corpus):
+    """Parse the corpus the way the original script did; returns (rows, unique instruments)"""
+    all_instruments = []
+    set_info = {}
+    for filename in sorted(f for f in os.listdir(corpus) if f.endswith('.csv')):
+        set_name = filename.replace('Instrument Description - ', '').replace('.csv', '')
+        with open(os.path.join(corpus, filename), 'r', encoding='utf-8') as f:
+            rows = list(enumerate(csv.DictReader(f), start=2))
+        instruments = []
+        for row_number, row in rows:
+            instrument = {field: _clean(row.get(column, '')) for field, column in TEXT_COLUMNS.items()}
+            instrument.update(sourceFile=filename, rowNumber=row_number, setName=set_name, sets=[set_name])
+            if instrument['name']:
+                instruments.append(instrument)
+        set_info[set_name] = {'filename': filename, 'instrumentCount': len(instruments)}
+        all_instruments.extend(instruments)
+    
+    unique = {}
+    for instrument in all_instruments:
+        existing = unique.get(instrument['name'])
+        if existing is None:
+            existing = unique[instrument['name']] = instrument.copy()
+            existing['specialities'] = []
+            existing['setDescriptions'] = []
+        else:
+            existing['sets'] = list(set(existing['sets']) | set(instrument['sets']))
+        for field, values in (('speciality', 'specialities'), ('setDescription', 'setDescriptions')):
+            if instrument[field] and instrument[field] not in existing[values]:
+                existing[values].append(instrument[field])
+    
+    overview = {}
+    for instrument in all_instruments:
+        overview.setdefault(instrument['setName'], dict(set_info[instrument['setName']]))
+        if instrument['speciality']:
+            overview[instrument['setName']]['speciality'] = instrument['speciality']
+    return len(all_instruments), list(unique.values())
+
+def run_mode(mode, corpus, cache_dir=None):
+    """Run one pipeline over the corpus in this process and report peak RSS"""
+    import instrument_catalogue as parser
+    
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        if mode == 'baseline':
+            rows, unique = baseline_build(corpus)
+        elif mode == 'list':
+            all_instruments, set_info, _ = parser.parse_all_csv_files(corpus)
+            unique = parser.create_unique_instruments_data(all_instruments)
+            parser.create_sets_overview(set_info, all_instruments)
+            rows = len(all_instruments)
+        else:
+            catalogue = parser.build_catalogue(corpus, cache_dir=cache_dir if mode != 'stream' else None)
+            unique = catalogue['uniqueInstruments']
+            rows = catalogue['totalInstruments']
+    
+    print(json.dumps({'mode': mode, 'rows': rows, 'unique': len(unique),
+                      'peakRssKb': peak_rss_kb()}))
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--sets', type=int, default=500)
+    arg_parser.add_argument('--rows-per-set', type=int, default=200)
+    arg_parser.add_argument('--unique-names', type=int, default=5000)
+    arg_parser.add_argument('--text-length', type=int, default=800)
+    arg_parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    arg_parser.add_argument('--corpus', help=argparse.SUPPRESS)
+    arg_parser.add_argument('--cache-dir', help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+    
+    if args.mode:
+        run_mode(args.mode, args.corpus, args.cache_dir)
+        return
+    
+    from synthetic_corpus import generate_corpus
+    
+    with tempfile.TemporaryDirectory() as corpus, tempfile.TemporaryDirectory() as cache_dir:
+        rows = generate_corpus(corpus, sets=args.sets, rows_per_set=args.rows_per_set,
+                               unique_names=args.unique_names, text_length=args.text_length)
+        print(f"Generated {rows} rows across {args.sets} sets")
+        
+        # Each mode runs in a fresh interpreter so peak RSS is not shared
+        results = {}
+        # The warm run reuses the cache the cold run wrote, so the order matters
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--mode', mode, '--corpus', corpus,
+                 '--cache-dir', cache_dir],
+                check=True, capture_output=True, text=True
+            ).stdout
+            results[mode] = json.loads(output.strip().splitlines()[-1])
+            print(f"{mode:>10}: {results[mode]['peakRssKb'] / 1024:8.1f} MB peak RSS "
+                  f"({results[mode]['rows']} rows, {results[mode]['unique']} unique)")
+        
+        for reference, label in (('baseline', 'original dict-per-row'), ('list', 'current list API')):
+            saved = results[reference]['peakRssKb'] - results['stream']['peakRssKb']
+            print(f"Streaming saves {saved / 1024:.1f} MB over the {label} "
+                  f"({saved / results[reference]['peakRssKb']:.0%} of its peak)")
+
+if __name__ == '__main__':
+    main()
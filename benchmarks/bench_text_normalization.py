@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Per-row text normalization cost: precompiled single pass vs the per-call regex
+
+Usage:
+    python benchmarks/bench_text_normalization.py [--text-length 3000] [--rows 2000]
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from instrument_catalogue.layouts import NEW_COLUMNS, build_instrument_record
+from instrument_catalogue.text import clean_fields, clean_text
+from synthetic_corpus import CATEGORIES, SPECIALITIES, random_text
+
+def legacy_clean_text(text):
+    """clean_text as it was before normalization was reworked"""
+    if not text or text.strip() == '':
+        return ""
+    text = re.sub(r'\s+', ' ', text.strip())
+    if text.startswith('"') and text.endswith('"'):
+        text = text[1:-1]
+    return text
+
+def messy(rng, length):
+    """Filler prose with the doubled spaces, tabs and line breaks CSV exports carry"""
+    text = random_text(rng, length)
+    return ''.join(rng.choice(['  ', ' \n', '\t ']) if char == ' ' and rng.random() < 0.1 else char
+                   for char in text)
+
+def make_rows(count, text_length, seed=0):
+    """Return header-keyed rows in the new layout with several-KB long text fields"""
+    rng = random.Random(seed)
+    rows = []
+    for index in range(count):
+        values = [f" {rng.choice(CATEGORIES)} {index} ", rng.choice(CATEGORIES),
+                  messy(rng, 200), messy(rng, text_length), 'Reusable',
+                  messy(rng, text_length // 2), messy(rng, text_length // 2),
+                  messy(rng, text_length // 4), messy(rng, text_length // 4), '',
+                  rng.choice(SPECIALITIES), f'"{messy(rng, 100)}"']
+        rows.append(dict(zip(NEW_COLUMNS, values)))
+    return rows
+
+def per_row_microseconds(function, rows, repeat=3):
+    """Return the best mean microseconds per row over ``repeat`` runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for row in rows:
+            function(row)
+        best = min(best, time.perf_counter() - start)
+    return best / len(rows) * 1e6
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--rows', type=int, default=2000)
+    arg_parser.add_argument('--text-length', type=int, default=3000,
+                            help="characters in the description field (default 3000)")
+    args = arg_parser.parse_args()
+    
+    rows = make_rows(args.rows, args.text_length)
+    row_bytes = sum(len(value) for row in rows for value in row.values()) / len(rows)
+    
+    cases = [
+        ('per-call regex (before)', lambda row: [legacy_clean_text(row.get(column, '')) for column in NEW_COLUMNS]),
+        ('clean_text per field', lambda row: [clean_text(row.get(column, '')) for column in NEW_COLUMNS]),
+        ('clean_fields per row', lambda row: clean_fields(map(row.get, NEW_COLUMNS))),
+        ('whole record build', lambda row: build_instrument_record(row, 'new', 'bench.csv', 2)),
+    ]
+    assert cases[0][1](rows[0]) == cases[2][1](rows[0])
+    
+    print(f"{args.rows} rows, {row_bytes / 1024:.1f} KB of text per row")
+    baseline = None
+    for label, function in cases:
+        microseconds = per_row_microseconds(function, rows)
+        baseline = baseline or microseconds
+        print(f"  {label:26} {microseconds:8.1f} us/row ({baseline / microseconds:.1f}x)")
+
+if __name__ == '__main__':
+    main()
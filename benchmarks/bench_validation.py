@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Schema validation throughput: compiled batch checks vs jsonschema per record
+
+Usage:
+    python benchmarks/bench_validation.py [--rows 1000000] [--jsonschema-rows 10000]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from instrument_catalogue import validation
+from instrument_catalogue.records import Instrument
+from synthetic_corpus import CATEGORIES, SPECIALITIES, random_text
+
+def make_rows(count, text_length=800, invalid_rate=0.05, seed=0):
+    """Return ``count`` parsed rows, about ``invalid_rate`` of them breaking a rule"""
+    rng = random.Random(seed)
+    pool = []
+    for index in range(1000):
+        broken = rng.random() < invalid_rate
+        pool.append(Instrument(
+            name=f"{rng.choice(CATEGORIES)} {index:06d}",
+            category='' if broken else rng.choice(CATEGORIES),
+            brief=random_text(rng, 150 if broken else 60),
+            description=random_text(rng, text_length),
+            type='Reusable',
+            usage=random_text(rng, text_length // 4),
+            speciality=rng.choice(SPECIALITIES),
+            sourceFile=f"Instrument Description - Synthetic Set {index % 50:05d}.csv",
+            rowNumber=index + 2,
+            setName=f"Synthetic Set {index % 50:05d}",
+            sets=[f"Synthetic Set {index % 50:05d}"]
+        ))
+    # Validation never mutates rows, so the pool is repeated rather than rebuilt
+    return [pool[index % len(pool)] for index in range(count)]
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--rows', type=int, default=1000000)
+    arg_parser.add_argument('--jsonschema-rows', type=int, default=10000)
+    arg_parser.add_argument('--batch-size', type=int, default=validation.DEFAULT_BATCH_SIZE)
+    args = arg_parser.parse_args()
+    
+    spec_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             validation.DEFAULT_SPEC_PATH)
+    schema = validation.row_schema(validation.load_spec(spec_path))
+    rows = make_rows(args.rows)
+    
+    start = time.perf_counter()
+    report = validation.RecordValidator(schema, batch_size=args.batch_size).validate(rows)
+    compiled_seconds = time.perf_counter() - start
+    print(f"compiled:   {args.rows} rows in {compiled_seconds:.2f} s "
+          f"({args.rows / compiled_seconds:,.0f} rows/s, {report['errors']} errors)")
+    
+    if not validation.available():
+        print("jsonschema is not installed; skipping the reference validator")
+        return
+    
+    sample = rows[:args.jsonschema_rows]
+    start = time.perf_counter()
+    errors = validation.jsonschema_errors(sample, schema)
+    reference_seconds = time.perf_counter() - start
+    estimate = reference_seconds * args.rows / len(sample)
+    print(f"jsonschema: {len(sample)} rows in {reference_seconds:.2f} s "
+          f"(~{estimate:.0f} s for {args.rows} rows, {estimate / compiled_seconds:.0f}x slower)")
+    
+    sample_report = validation.RecordValidator(schema).validate(sample)
+    assert sample_report['errors'] == len(errors), (sample_report['errors'], len(errors))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Watch mode rebuild latency: patching the in-memory catalogue vs a full rebuild
+
+Each edit renames one row of a random set, which re-merges a couple of
+instruments and inserts a new one (shifting the ids of every later one).
+Times cover parsing, merging, staging every data file (with --sharded) and
+publishing; the debounce delay before a rebuild starts is not included.
+
+Usage:
+    python benchmarks/bench_watch_rebuild.py [--sets 2000] [--rows-per-set 100] [--edits 10]
+"""
+
+import io
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from instrument_catalogue.catalogue import build_catalogue
+from instrument_catalogue.cli import create_complete_data, parse_arguments, write_data_files
+from instrument_catalogue.publish import StagedPublish
+from instrument_catalogue.records import RecordMemo
+from instrument_catalogue.watch import IncrementalCatalogue
+from synthetic_corpus import generate_corpus
+
+def publish(root, catalogue, args, memo=None):
+    """Stage and publish the data files, returning the number of files replaced"""
+    complete_data = create_complete_data(catalogue['totalInstruments'], catalogue['uniqueInstruments'],
+                                         catalogue['setsOverview'], catalogue['setInfo'], catalogue['structureInfo'])
+    publication = StagedPublish(root)
+    try:
+        write_data_files(publication, complete_data, args, memo=memo)
+        return len(publication.commit()['changed'])
+    finally:
+        publication.cleanup()
+
+def rename_row(csv_dir, filename, rng, edit):
+    """Rename the instrument on one data row of an old/new layout CSV"""
+    path = os.path.join(csv_dir, filename)
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.read().split('\n')
+    row = rng.randrange(2, len(lines) - 1)
+    if lines[row].startswith(','):
+        # New layout rows without a speciality start with the two empty leading columns
+        lines[row] = lines[row].replace(',,', f',,Edited {edit} ', 1)
+    else:
+        lines[row] = f"Edited {edit} " + lines[row]
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines))
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--sets', type=int, default=2000)
+    arg_parser.add_argument('--rows-per-set', type=int, default=100)
+    arg_parser.add_argument('--unique-names', type=int, default=5000)
+    arg_parser.add_argument('--edits', type=int, default=10)
+    args = arg_parser.parse_args()
+    build_args = parse_arguments(['--sharded'])
+    rng = random.Random(0)
+    quiet = contextlib.redirect_stdout(io.StringIO())
+    
+    with tempfile.TemporaryDirectory() as root:
+        csv_dir = os.path.join(root, 'instrument_csvs')
+        rows = generate_corpus(csv_dir, sets=args.sets, rows_per_set=args.rows_per_set,
+                               unique_names=args.unique_names, text_length=400)
+        os.makedirs(os.path.join(root, 'data'))
+        
+        incremental = IncrementalCatalogue(csv_dir)
+        memo = RecordMemo()
+        with quiet:
+            incremental.load()
+        publish(root, incremental.catalogue(), build_args, memo)
+        memo.sweep()
+        
+        filenames = sorted(os.listdir(csv_dir))
+        latencies = []
+        for edit in range(args.edits):
+            filename = rng.choice(filenames)
+            rename_row(csv_dir, filename, rng, edit)
+            start = time.perf_counter()
+            with quiet:
+                incremental.update([filename])
+            replaced = publish(root, incremental.catalogue(), build_args, memo)
+            memo.sweep()
+            latencies.append(time.perf_counter() - start)
+            print(f"edit {edit}: {latencies[-1] * 1000:6.0f} ms, {replaced} data files replaced")
+        
+        start = time.perf_counter()
+        with quiet:
+            full = build_catalogue(csv_dir)
+        publish(root, full, build_args)
+        full_seconds = time.perf_counter() - start
+    
+    latencies.sort()
+    print(f"\n{args.sets} sets, {rows} rows: incremental median {latencies[len(latencies) // 2] * 1000:.0f} ms, "
+          f"max {latencies[-1] * 1000:.0f} ms; full rebuild {full_seconds * 1000:.0f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Synthetic instrument_csvs corpus generator for benchmarks
+Writes set CSVs in the old, new and comma-separated multi-line layouts
+"""
+
+import io
+import os
+import csv
+import random
+
+OLD_HEADER = ['NAME', 'CATEGORY', 'BRIEF', 'DISCRIPTION ', 'TYPE', 'USAGE',
+              'IMPORTANT CONSIDERATIONS', 'CLEANING & STERILIZATION',
+              'INSPECTION & MAINTENANCE', 'REFERENCE IMAGES']
+NEW_HEADER = ['SPECIALITY', 'SET DISCRIPTION'] + OLD_HEADER
+
+SPECIALITIES = ['General Surgery', 'Orthopedic Surgery', 'Cardiac Surgery',
+                'Thoracic Surgery', 'Neurosurgery', 'ENT Surgery']
+CATEGORIES = ['Forceps', 'Retractor', 'Scissors', 'Clamp', 'Needle Holder', 'Dissector']
+WORDS = ['tissue', 'blade', 'handle', 'curved', 'straight', 'serrated', 'jaw',
+         'ratchet', 'tip', 'grip', 'steel', 'surgical', 'vessel', 'suture',
+         'retract', 'dissect', 'clamp', 'hold', 'fine', 'delicate']
+
+def random_text(rng, length):
+    """Return roughly ``length`` characters of filler prose"""
+    words = []
+    size = 0
+    while size < length:
+        word = rng.choice(WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return ' '.join(words).capitalize() + '.'
+
+def format_row(row):
+    """Return a row as a CSV string without its line terminator"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(row)
+    return buffer.getvalue().rstrip('\r\n')
+
+def write_multiline_set(file, rows):
+    """Write rows in the multi-line layout: records packed together behind comma runs"""
+    file.write(format_row(OLD_HEADER) + '\n')
+    for index, row in enumerate(rows):
+        file.write(format_row(row) + ',' * 9)
+        # Records only sometimes start on a fresh line in vendor exports
+        if index % 3 == 2:
+            file.write('\n')
+    file.write('\n')
+
+def random_paragraphs(rng, length, line_break_rate):
+    """Return filler prose that, at ``line_break_rate``, spans two lines of a quoted field"""
+    if not line_break_rate or rng.random() >= line_break_rate:
+        return random_text(rng, length)
+    return random_text(rng, length // 2) + '\n' + random_text(rng, length // 2)
+
+def generate_corpus(directory, sets=500, rows_per_set=200, unique_names=5000,
+                    text_length=800, seed=0, layouts=('new', 'old'), line_break_rate=0.0):
+    """Write a synthetic corpus of set CSVs and return the number of rows written
+    
+    Set files cycle through ``layouts``; any of 'old', 'new' and 'multiline'.
+    About ``line_break_rate`` of the descriptions and usage notes are quoted
+    fields spanning several lines.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    names = [f"{rng.choice(CATEGORIES)} {i:06d}" for i in range(unique_names)]
+    total_rows = 0
+    
+    for set_index in range(sets):
+        layout = layouts[set_index % len(layouts)]
+        new_layout = layout == 'new'
+        filename = f"Instrument Description - Synthetic Set {set_index:05d}.csv"
+        rows = []
+        
+        for row_index in range(rows_per_set):
+            name = rng.choice(names)
+            row = [
+                name,
+                name.split(' ')[0],
+                random_text(rng, text_length // 8),
+                random_paragraphs(rng, text_length, line_break_rate),
+                'Reusable',
+                random_paragraphs(rng, text_length // 4, line_break_rate),
+                random_text(rng, text_length // 4),
+                random_text(rng, text_length // 4),
+                random_text(rng, text_length // 4),
+                ''
+            ]
+            if new_layout:
+                speciality = SPECIALITIES[set_index % len(SPECIALITIES)] if row_index == 0 else ''
+                description = random_text(rng, 120) if row_index == 0 else ''
+                row = [speciality, description] + row
+            rows.append(row)
+        
+        with open(os.path.join(directory, filename), 'w', encoding='utf-8', newline='') as f:
+            if layout == 'multiline':
+                write_multiline_set(f, rows)
+            else:
+                writer = csv.writer(f)
+                writer.writerow(NEW_HEADER if new_layout else OLD_HEADER)
+                writer.writerows(rows)
+        total_rows += len(rows)
+    
+    return total_rows
@@ -0,0 +1,21 @@
+"""
+Surgical instrument catalogue build tools
+
+One parsing engine with pluggable layout strategies ('old', 'new' and the
+comma-separated 'multiline' vendor layout), shared by every CLI script in the
+repository root.
+"""
+
+from .text import clean_fields, clean_text
+from .records import Instrument, UniqueInstrument, serialize_record
+from .search_index import SearchIndex
+from .relevance import RelevanceIndex
+from .profiling import StageProfiler
+from .layouts import (CsvLayout, build_instrument_record, detect_layout,
+                      detect_structure_from_header, get_layout, register_layout)
+from .parsing import (detect_csv_structure, extract_set_name_from_filename, list_csv_files,
+                      parse_csv_file, stream_csv_file)
+from .dedup import InstrumentIndex, normalize_name
+from .catalogue import (add_to_unique_instruments, build_catalogue, build_sets_overview,
+                        create_sets_overview, create_unique_instruments_data,
+                        iter_all_csv_files, parse_all_csv_files)
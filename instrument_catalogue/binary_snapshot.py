@@ -0,0 +1,376 @@
+"""
+Memory-mapped binary snapshot of the built catalogue
+
+Loading ``completeInstrumentsData`` from JSON decodes every string of every
+instrument before the first one can be looked at. The binary snapshot
+(``*.snapshot.bin``) is laid out so a reader maps the file and decodes
+only what it touches:
+
+- a string table: every distinct string stored once as UTF-8, found through
+  an array of byte offsets;
+- instruments and sets as fixed-width rows of little-endian uint32 slots
+  holding string ids, integers, or (start, count) ranges into a pool of
+  string ids for list fields;
+- instrument indexes sorted by name, for binary search.
+
+The header records the format version and the offset of each section, and
+the field layout itself is a JSON string in the table, so readers follow
+the file rather than this module's field list. Opening a snapshot reads
+the header, layout and metadata and nothing else; a column of string ids is a
+strided view over the mapping, so counting a column's values decodes
+each distinct string once.
+"""
+
+import os
+import sys
+import json
+import mmap
+import struct
+from array import array
+from collections import Counter
+from itertools import accumulate, chain, islice
+
+from .records import TEXT_FIELDS, UNIQUE_DEFAULTS, record_dict
+
+MAGIC = b'ICSNAP\r\n'
+VERSION = 1
+
+# Written next to data/name.js, like the JSON sidecar
+BINARY_SNAPSHOT_SUFFIX = '.snapshot.bin'
+
+# Slot value of a field the record does not have
+ABSENT = 0xFFFFFFFF
+_MISSING = object()
+
+# Field kinds: string id, unsigned integer, boolean, list of strings (two slots), any JSON value
+STRING, INTEGER, BOOLEAN, STRINGS, JSON = 's', 'i', 'b', 'l', 'j'
+
+INSTRUMENT_FIELDS = (tuple((field, STRING) for field in TEXT_FIELDS) +
+                     (('sourceFile', STRING), ('rowNumber', INTEGER), ('setName', STRING),
+                      ('sets', STRINGS), ('specialities', STRINGS), ('setDescriptions', STRINGS),
+                      ('features', STRINGS)) +
+                     tuple((field, STRING) for field, _ in UNIQUE_DEFAULTS) +
+                     (('image', STRING), ('thumbnails', JSON)))
+
+SET_FIELDS = (('name', STRING), ('count', INTEGER), ('structure', STRING), ('hasSpeciality', BOOLEAN),
+              ('hasSetDescription', BOOLEAN), ('filename', STRING), ('speciality', STRING),
+              ('setDescription', STRING))
+
+# Magic, version, string count, instrument count, set count, layout and metadata
+# string ids, then (offset, size) of each section
+SECTIONS = ('strings', 'stringOffsets', 'instruments', 'lists', 'sets', 'nameOrder')
+HEADER = struct.Struct('<8s6I' + 'Q' * 2 * len(SECTIONS))
+
+LITTLE_ENDIAN = sys.byteorder == 'little'
+
+def binary_snapshot_path(js_path):
+    """Return the binary snapshot path of an ES module data file"""
+    return os.path.splitext(js_path)[0] + BINARY_SNAPSHOT_SUFFIX
+
+def _slots(fields):
+    """Return {field: (first slot, kind)} and the row width in slots"""
+    layout = {}
+    width = 0
+    for field, kind in fields:
+        layout[field] = (width, kind)
+        width += 2 if kind == STRINGS else 1
+    return layout, width
+
+# Instruments encoded per call to _encode_rows; only this many are dicts at once
+BLOCK_SIZE = 4096
+
+class _StringTable:
+    """Assigns ids to distinct strings while appending their UTF-8 bytes to a file"""
+    
+    def __init__(self, file):
+        self.file = file
+        self.ids = {_MISSING: ABSENT}
+        self.values = []
+        self.offsets = array('Q', [0])
+    
+    def ids_for(self, values):
+        """Return an iterator of the ids of ``values``, adding the strings not seen before"""
+        ids = self.ids
+        new = [value for value in dict.fromkeys(values) if value not in ids]
+        if new:
+            encoded = [value.encode('utf-8') for value in new]
+            ids.update(zip(new, range(len(self.values), len(self.values) + len(new))))
+            self.values.extend(new)
+            self.offsets.extend(islice(accumulate(map(len, encoded), initial=self.offsets[-1]), 1, None))
+            self.file.write(b''.join(encoded))
+        return map(ids.__getitem__, values)
+    
+    def add(self, value):
+        return next(self.ids_for([value]))
+
+def _encode_rows(records, fields, strings, pools):
+    """Return an array('I') of fixed-width rows for a list of dict records
+    
+    List items go to ``pools[field]``; a row holds the start within that pool and the count.
+    """
+    layout, width = _slots(fields)
+    rows = array('I', [ABSENT]) * (width * len(records))
+    if not records:
+        return rows
+    
+    # One map() per record, then transposed into columns, instead of a loop per field
+    defaults = [_MISSING] * len(layout)
+    columns = zip(*[tuple(map(record.get, layout, defaults)) for record in records])
+    for (field, (slot, kind)), values in zip(layout.items(), columns):
+        if kind == STRING:
+            rows[slot::width] = array('I', strings.ids_for(values))
+        elif kind == STRINGS:
+            pool = pools.setdefault(field, array('I'))
+            present = [value for value in values if value is not _MISSING]
+            counts = array('I', map(len, present))
+            starts = array('I', accumulate(counts, initial=len(pool)))
+            starts.pop()
+            if len(present) < len(values):
+                # Missing lists get an absent start and no items
+                present_starts = iter(starts)
+                present_counts = iter(counts)
+                starts = array('I', [ABSENT if value is _MISSING else next(present_starts) for value in values])
+                counts = array('I', [0 if value is _MISSING else next(present_counts) for value in values])
+            pool.extend(strings.ids_for(list(chain.from_iterable(present))))
+            rows[slot::width] = starts
+            rows[slot + 1::width] = counts
+        elif kind == JSON:
+            encoded = [value if value is _MISSING else json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+                       for value in values]
+            rows[slot::width] = array('I', strings.ids_for(encoded))
+        else:
+            rows[slot::width] = array('I', [ABSENT if value is _MISSING else int(value) for value in values])
+    return rows
+
+def _write_array(file, values):
+    """Write an integer array little-endian, padded to 8 bytes; return (offset, size)"""
+    offset = file.tell()
+    if not LITTLE_ENDIAN:
+        values = array(values.typecode, values)
+        values.byteswap()
+    values.tofile(file)
+    size = file.tell() - offset
+    file.write(b'\0' * (-size % 8))
+    return offset, size
+
+def write_binary_snapshot(path, complete_data):
+    """Write ``{'sets', 'instruments', 'metadata'}`` as a binary snapshot"""
+    with open(path, 'wb', buffering=1024 * 1024) as f:
+        f.write(b'\0' * HEADER.size)
+        strings = _StringTable(f)
+        
+        # Records are turned into dicts a block at a time and encoded a column at a time
+        instrument_rows = array('I')
+        instrument_pools = {}
+        instruments = complete_data['instruments']
+        for block_start in range(0, len(instruments), BLOCK_SIZE):
+            block = [record_dict(instrument) for instrument in instruments[block_start:block_start + BLOCK_SIZE]]
+            instrument_rows.extend(_encode_rows(block, INSTRUMENT_FIELDS, strings, instrument_pools))
+        set_pools = {}
+        set_rows = _encode_rows(list(complete_data['sets']), SET_FIELDS, strings, set_pools)
+        
+        # Each list field's items are stored contiguously: [base, length] within the lists section
+        lists = array('I')
+        pool_ranges = {}
+        for table, pools in (('instrument', instrument_pools), ('set', set_pools)):
+            pool_ranges[table] = {}
+            for field, pool in pools.items():
+                pool_ranges[table][field] = (len(lists), len(pool))
+                lists.extend(pool)
+        layout_id = strings.add(json.dumps({'instrument': INSTRUMENT_FIELDS, 'set': SET_FIELDS,
+                                            'lists': pool_ranges}))
+        metadata_id = strings.add(json.dumps(complete_data.get('metadata'), ensure_ascii=False))
+        
+        sections = [(HEADER.size, strings.offsets[-1])]
+        f.write(b'\0' * (-f.tell() % 8))
+        sections.append(_write_array(f, strings.offsets))
+        sections.append(_write_array(f, instrument_rows))
+        sections.append(_write_array(f, lists))
+        sections.append(_write_array(f, set_rows))
+        
+        # Sort by the name strings, not the instruments, so nothing is decoded again
+        layout, width = _slots(INSTRUMENT_FIELDS)
+        name_ids = instrument_rows[layout['name'][0]::width]
+        names = strings.values + ['']  # An absent name (id ABSENT) sorts as ''
+        order = array('I', sorted(range(len(name_ids)),
+                                  key=lambda index: names[min(name_ids[index], len(names) - 1)]))
+        sections.append(_write_array(f, order))
+        
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, len(strings.values), len(name_ids),
+                            len(set_rows) // _slots(SET_FIELDS)[1], layout_id, metadata_id,
+                            *(number for section in sections for number in section)))
+    return os.path.getsize(path)
+
+class BinarySnapshot:
+    """Read-only, lazily decoded view of a snapshot written by ``write_binary_snapshot``
+    
+    Release any views returned by ``codes`` before calling ``close``.
+    """
+    
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._mapping)
+        try:
+            header = HEADER.unpack_from(self._buffer)
+        except struct.error:
+            self.close()
+            raise ValueError(f"{path} is too short to be a catalogue snapshot") from None
+        magic, version, string_count, instrument_count, set_count, layout_id, metadata_id = header[:7]
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a catalogue snapshot")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is snapshot version {version}; this reader supports {VERSION}")
+        
+        self._sections = dict(zip(SECTIONS, zip(header[7::2], header[8::2])))
+        self._views = []
+        self._string_offsets = self._section('stringOffsets', 'Q')
+        self._strings_start = self._sections['strings'][0]
+        layout = json.loads(self.string(layout_id))
+        self._instrument_layout, self._instrument_width = _slots(layout['instrument'])
+        self._set_layout, self._set_width = _slots(layout['set'])
+        self._instrument_pools = layout['lists']['instrument']
+        self._set_pools = layout['lists']['set']
+        self._instruments = self._section('instruments', 'I')
+        self._lists = self._section('lists', 'I')
+        self._sets = self._section('sets', 'I')
+        self._name_order = self._section('nameOrder', 'I')
+        self._instrument_count = instrument_count
+        self._set_count = set_count
+        self.string_count = string_count
+        self.metadata = json.loads(self.string(metadata_id))
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def close(self):
+        # Views derived from a slice are released before it
+        for view in reversed(getattr(self, '_views', ())):
+            view.release()
+        self._buffer.release()
+        self._mapping.close()
+    
+    def _section(self, name, typecode):
+        offset, size = self._sections[name]
+        view = self._buffer[offset:offset + size]
+        self._views.append(view)
+        if LITTLE_ENDIAN:
+            view = view.cast(typecode)
+            self._views.append(view)
+            return view
+        values = array(typecode, view)  # Big-endian hosts pay for one swapped copy
+        values.byteswap()
+        return memoryview(values)
+    
+    def __len__(self):
+        return self._instrument_count
+    
+    def string(self, string_id):
+        """Decode one string from the table"""
+        start = self._strings_start + self._string_offsets[string_id]
+        end = self._strings_start + self._string_offsets[string_id + 1]
+        return str(self._buffer[start:end], 'utf-8')
+    
+    def _strings(self, pools, field, start, count):
+        base = pools[field][0] + start
+        return [self.string(item) for item in self._lists[base:base + count]]
+    
+    def _value(self, rows, pools, base, field, slot, kind):
+        """Decode one field of the row starting at ``base`` by its kind, or _MISSING if absent"""
+        value = rows[base + slot]
+        if value == ABSENT:
+            return _MISSING
+        if kind == STRING:
+            return self.string(value)
+        if kind == STRINGS:
+            return self._strings(pools, field, value, rows[base + slot + 1])
+        if kind == JSON:
+            return json.loads(self.string(value))
+        if kind == BOOLEAN:
+            return bool(value)
+        return value
+    
+    def _decode(self, rows, width, layout, pools, index):
+        base = index * width
+        record = {}
+        for field, (slot, kind) in layout.items():
+            value = self._value(rows, pools, base, field, slot, kind)
+            if value is not _MISSING:
+                record[field] = value
+        return record
+    
+    def instrument(self, index):
+        """Return instrument ``index`` as the dict completeInstrumentsData holds"""
+        if not 0 <= index < self._instrument_count:
+            raise IndexError(index)
+        return self._decode(self._instruments, self._instrument_width, self._instrument_layout,
+                            self._instrument_pools, index)
+    
+    def __getitem__(self, index):
+        return self.instrument(index + self._instrument_count if index < 0 else index)
+    
+    def field(self, index, field):
+        """Return one field of one instrument, as ``instrument`` would, without decoding the rest
+        
+        Returns None for a field the instrument does not have.
+        """
+        if not 0 <= index < self._instrument_count:
+            raise IndexError(index)
+        slot, kind = self._instrument_layout[field]
+        value = self._value(self._instruments, self._instrument_pools, index * self._instrument_width,
+                            field, slot, kind)
+        return None if value is _MISSING else value
+    
+    def sets(self):
+        """Return the sets overview"""
+        return [self._decode(self._sets, self._set_width, self._set_layout, self._set_pools, index)
+                for index in range(self._set_count)]
+    
+    def codes(self, field):
+        """Return a zero-copy view of one string or integer field's slot across all instruments"""
+        slot, kind = self._instrument_layout[field]
+        if kind in (STRINGS, JSON):
+            raise ValueError(f"{field} is not a single-slot field")
+        return self._instruments[slot::self._instrument_width]
+    
+    def counts_by(self, field):
+        """Return {value: instrument count} for a string field, or per item of a list field"""
+        slot, kind = self._instrument_layout[field]
+        if kind == STRINGS:
+            # Each list field's items are contiguous, so this is one pass over a slice
+            base, length = self._instrument_pools.get(field, (0, 0))
+            counts = Counter(self._lists[base:base + length])
+        else:
+            counts = Counter(self.codes(field))
+            counts.pop(ABSENT, None)
+        if kind in (STRING, STRINGS):
+            return {self.string(code): count for code, count in counts.items()}
+        return dict(counts)
+    
+    def find(self, name):
+        """Return the indexes of instruments named exactly ``name``, by binary search"""
+        name_slot = self._instrument_layout['name'][0]
+        
+        def name_at(position):
+            name_id = self._instruments[self._name_order[position] * self._instrument_width + name_slot]
+            return '' if name_id == ABSENT else self.string(name_id)
+        
+        # bisect only takes a key function from Python 3.10
+        position, high = 0, self._instrument_count
+        while position < high:
+            middle = (position + high) // 2
+            if name_at(middle) < name:
+                position = middle + 1
+            else:
+                high = middle
+        indexes = []
+        while position < self._instrument_count and name_at(position) == name:
+            indexes.append(self._name_order[position])
+            position += 1
+        return sorted(indexes)
@@ -0,0 +1,152 @@
+"""
+Incremental build cache
+Stores each CSV's parsed records keyed by path, size, mtime and content hash
+"""
+
+import os
+import json
+import hashlib
+import contextlib
+import multiprocessing
+
+from .parsing import parse_csv_files, stream_csv_files
+from .records import Instrument
+
+# Bump whenever the shape of parsed records changes so stale caches are dropped
+CACHE_VERSION = 3
+CACHE_MANIFEST = 'manifest.json'
+
+def hash_file(file_path):
+    """Return the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_cache_manifest(cache_dir):
+    """Load the build cache manifest, returning an empty one if missing or stale"""
+    manifest_path = os.path.join(cache_dir, CACHE_MANIFEST)
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    
+    if manifest.get('version') != CACHE_VERSION:
+        return {}
+    return manifest.get('files', {})
+
+def save_cache_manifest(cache_dir, entries):
+    """Atomically write the build cache manifest and prune unreferenced record files"""
+    records_dir = os.path.join(cache_dir, 'records')
+    os.makedirs(records_dir, exist_ok=True)
+    
+    manifest_path = os.path.join(cache_dir, CACHE_MANIFEST)
+    temp_path = manifest_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': CACHE_VERSION, 'files': entries}, f, indent=2, ensure_ascii=False)
+    os.replace(temp_path, manifest_path)
+    
+    referenced = {entry['hash'] + '.json' for entry in entries.values()}
+    for name in os.listdir(records_dir):
+        if name not in referenced:
+            os.remove(os.path.join(records_dir, name))
+
+def _cache_records_path(cache_dir, content_hash):
+    """Return the path of the cached records for a given content hash"""
+    return os.path.join(cache_dir, 'records', content_hash + '.json')
+
+def _caching_records(records, cache_dir, entries, file_path, structure, entry):
+    """Yield a changed file's records while writing them to the build cache
+    
+    Each record is serialized before it is handed on, so callers may modify
+    it. The file is only added to ``entries`` once every row parsed; files
+    that fail part-way are retried next run.
+    """
+    records_path = _cache_records_path(cache_dir, entry['hash'])
+    temp_path = records_path + '.tmp'
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write('{"structure": %s, "instruments": [' % json.dumps(structure))
+            separator = ''
+            for instrument in records:
+                f.write(separator)
+                f.write(json.dumps(instrument.to_dict(), ensure_ascii=False))
+                separator = ', '
+                yield instrument
+            f.write(']}')
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    os.replace(temp_path, records_path)
+    entries[file_path] = dict(entry, structure=structure)
+
+def cached_file_results(file_paths, cache_dir, workers):
+    """Yield per-file parse results, reusing cached records for unchanged CSVs
+    
+    A file is considered unchanged when its size and mtime match the manifest,
+    or, failing that, when its content hash does. Only changed or added files
+    are re-parsed; files that no longer exist are dropped from the cache, and
+    files that cannot be read yield (None, None, error).
+    
+    Changed files are streamed like an uncached build and written to the
+    cache as their rows are consumed, so a cold cache does not hold the
+    corpus in memory. The manifest is written once the results are
+    exhausted (or the generator is closed early, keeping the files finished).
+    """
+    manifest = load_cache_manifest(cache_dir)
+    entries = {}
+    hits = {}
+    misses = {}
+    errors = {}
+    
+    for file_path in file_paths:
+        entry = manifest.get(file_path)
+        try:
+            stat = os.stat(file_path)
+            if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime_ns:
+                content_hash = entry['hash']
+            else:
+                content_hash = hash_file(file_path)
+        except OSError as e:
+            # Reported in order like a file that fails to open in an uncached build
+            errors[file_path] = e
+            continue
+        
+        records_path = _cache_records_path(cache_dir, content_hash)
+        if entry and entry['hash'] == content_hash and os.path.exists(records_path):
+            hits[file_path] = records_path
+            entries[file_path] = dict(entry, size=stat.st_size, mtime=stat.st_mtime_ns)
+        else:
+            misses[file_path] = {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'hash': content_hash}
+    
+    removed = len(set(manifest) - set(file_paths))
+    print(f"Build cache: {len(hits)} unchanged, {len(misses)} to parse, {removed} removed")
+    os.makedirs(os.path.join(cache_dir, 'records'), exist_ok=True)
+    
+    with contextlib.ExitStack() as stack:
+        # Parse only the changed and added files, in parallel when requested
+        if workers > 1 and len(misses) > 1:
+            pool = stack.enter_context(multiprocessing.Pool(min(workers, len(misses))))
+            parsed = parse_csv_files(pool, list(misses))
+        else:
+            parsed = stream_csv_files(list(misses))
+        stack.callback(save_cache_manifest, cache_dir, entries)
+        
+        for file_path in file_paths:
+            if file_path in errors:
+                yield None, None, errors[file_path]
+                continue
+            entry = misses.get(file_path)
+            if entry is not None:
+                structure, records, open_error = next(parsed)
+                if open_error is not None:
+                    yield None, None, open_error
+                    continue
+                yield structure, _caching_records(records, cache_dir, entries, file_path, structure, entry), None
+            else:
+                with open(hits[file_path], 'r', encoding='utf-8') as f:
+                    cached = json.load(f)
+                instruments = (Instrument.from_dict(data) for data in cached['instruments'])
+                yield cached['structure'], instruments, None
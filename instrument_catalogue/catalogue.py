@@ -0,0 +1,306 @@
+"""
+Catalogue build pipeline
+Streams parsed records from every set CSV through dedup and set aggregation
+"""
+
+import os
+import multiprocessing
+
+from . import columnar
+from .cache import cached_file_results
+from .dedup import InstrumentIndex
+from .records import MERGEABLE_FIELDS, UniqueInstrument
+from .parsing import (extract_set_name_from_filename, list_csv_files, parse_csv_files,
+                      stream_csv_files)
+from .profiling import NULL_PROFILER
+
+def _parallel_file_results(file_paths, workers):
+    """Parse CSVs across a process pool, yielding results in input order"""
+    with multiprocessing.Pool(workers) as pool:
+        yield from parse_csv_files(pool, file_paths)
+
+def iter_all_csv_files(csv_directory, set_info, structure_info, workers=1, cache_dir=None,
+                       profiler=NULL_PROFILER, filenames=None):
+    """Lazily yield instruments from every CSV file in the directory
+    
+    Each file is opened once and its rows are yielded one at a time, so callers
+    that consume the stream incrementally never hold the whole corpus in memory.
+    ``set_info`` and ``structure_info`` are filled in as each file is finished.
+    
+    With ``workers`` > 1 files are parsed in a process pool (0 means one worker
+    per CPU). Results are still yielded in sorted-filename order, so the output
+    is identical to a serial run.
+    
+    With ``cache_dir`` set, parsed records are kept in an on-disk build cache
+    and only CSVs that changed since the previous run are parsed again.
+    
+    ``profiler`` charges file discovery, structure detection and row parsing
+    to separate stages. With workers, files are parsed in the worker processes,
+    so their parsing time shows up under structure detection.
+    
+    ``filenames`` limits the run to those files of the directory, still in
+    processing order. The build cache only keeps the files of its latest
+    run, so it should not be combined with a partial run.
+    """
+    with profiler.section('file discovery') as section:
+        csv_files = list_csv_files(csv_directory) if filenames is None else sorted(filenames)
+        section.items = len(csv_files)
+    file_paths = [os.path.join(csv_directory, filename) for filename in csv_files]
+    
+    print(f"Found {len(csv_files)} CSV files to process...")
+    
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    
+    if cache_dir:
+        file_results = cached_file_results(file_paths, cache_dir, workers)
+    elif workers > 1 and len(file_paths) > 1:
+        file_results = _parallel_file_results(file_paths, min(workers, len(file_paths)))
+    else:
+        file_results = stream_csv_files(file_paths)
+    
+    file_results = profiler.iterate('structure detection', file_results)
+    # Results come first so their generator runs to the end (the build cache
+    # writes its manifest there) before zip stops
+    for (structure, records, open_error), filename in zip(file_results, csv_files):
+        set_name = extract_set_name_from_filename(filename)
+        
+        print(f"Processing: {filename} -> {set_name}")
+        
+        if open_error is not None:
+            print(f"  -> Error processing {filename}: {str(open_error)}")
+            continue
+        
+        count = 0
+        has_speciality = False
+        has_set_description = False
+        
+        try:
+            for instrument in profiler.iterate('row parsing', records):
+                # Add set name to each instrument
+                instrument.setName = set_name
+                instrument.sets = [set_name]  # For compatibility with existing structure
+                
+                count += 1
+                has_speciality = has_speciality or bool(instrument.speciality)
+                has_set_description = has_set_description or bool(instrument.setDescription)
+                
+                yield instrument
+        except Exception as e:
+            # Rows already yielded have been consumed downstream, so the set is
+            # still recorded below with the rows that parsed successfully
+            print(f"  -> Error processing {filename} after {count} rows: {str(e)}")
+        
+        # Store set information
+        set_info[set_name] = {
+            'filename': filename,
+            'instrumentCount': count,
+            'structure': structure,
+            'hasSpeciality': has_speciality,
+            'hasSetDescription': has_set_description
+        }
+        
+        structure_info[filename] = structure
+        
+        print(f"  -> Parsed {count} instruments using {structure} structure")
+
+def parse_all_csv_files(csv_directory, workers=1):
+    """Parse all CSV files in the directory"""
+    set_info = {}
+    structure_info = {}
+    
+    all_instruments = list(iter_all_csv_files(csv_directory, set_info, structure_info, workers))
+    
+    return all_instruments, set_info, structure_info
+
+def add_to_unique_instruments(unique_instruments, instrument):
+    """Merge a single parsed instrument into a name-keyed unique instruments index"""
+    name = instrument.name
+    unique_instrument = unique_instruments.get(name)
+    
+    if unique_instrument is not None:
+        # Merge sets information, keeping first-seen order so output is deterministic
+        for set_name in instrument.sets:
+            unique_instruments.add_set(name, set_name)
+        
+        # Update other fields if they're empty in existing but filled in new
+        for field in MERGEABLE_FIELDS:
+            if not getattr(unique_instrument, field):
+                value = getattr(instrument, field)
+                if value:
+                    setattr(unique_instrument, field, value)
+        
+        # For speciality and setDescription, collect all unique values
+        if instrument.speciality and instrument.speciality not in unique_instrument.specialities:
+            unique_instrument.specialities.append(instrument.speciality)
+        
+        if instrument.setDescription and instrument.setDescription not in unique_instrument.setDescriptions:
+            unique_instrument.setDescriptions.append(instrument.setDescription)
+    
+    else:
+        # Create new unique instrument; the constant compatibility fields
+        # (material, manufacturer, image, ...) are added when it is serialized
+        unique_instruments.insert(UniqueInstrument.from_instrument(instrument))
+
+def create_unique_instruments_data(all_instruments):
+    """Create unique instruments data by merging duplicates"""
+    # Instruments are merged by exact name
+    unique_instruments = InstrumentIndex(key=None)
+    
+    for instrument in all_instruments:
+        add_to_unique_instruments(unique_instruments, instrument)
+    
+    return unique_instruments.instruments()
+
+def record_set_details(set_specialty_map, set_description_map, instrument):
+    """Record the speciality and set description carried by a parsed instrument"""
+    if instrument.sets:
+        for set_name in instrument.sets:
+            if instrument.speciality:
+                set_specialty_map[set_name] = instrument.speciality
+            if instrument.setDescription:
+                set_description_map[set_name] = instrument.setDescription
+
+def build_sets_overview(set_info, set_specialty_map, set_description_map):
+    """Build the sorted sets overview from set info and per-set details"""
+    sets_overview = []
+    
+    for set_name, info in set_info.items():
+        set_data = {
+            'name': set_name,
+            'count': info['instrumentCount'],
+            'structure': info['structure'],
+            'hasSpeciality': info['hasSpeciality'],
+            'hasSetDescription': info['hasSetDescription'],
+            'filename': info['filename']
+        }
+        
+        # Add specialty and set description if available
+        if set_name in set_specialty_map:
+            set_data['speciality'] = set_specialty_map[set_name]
+        if set_name in set_description_map:
+            set_data['setDescription'] = set_description_map[set_name]
+        
+        sets_overview.append(set_data)
+    
+    return sorted(sets_overview, key=lambda x: x['name'])
+
+def build_sets_summary(complete_data, preview_size=5):
+    """Return the data/setsSummary.js summary: set counts plus a few instrument names per set
+    
+    Works on the legacy layout, where sets embed their instruments, and on the
+    comprehensive one, where instruments list the sets they belong to.
+    """
+    previews = {}
+    for instrument in complete_data['instruments']:
+        for set_name in instrument.get('sets') or ():
+            names = previews.setdefault(set_name, [])
+            if len(names) < preview_size:
+                names.append(instrument['name'])
+    
+    sets = []
+    for set_data in complete_data['sets']:
+        if 'instruments' in set_data:
+            preview = [inst['name'] for inst in set_data['instruments'][:preview_size]]
+        else:
+            preview = previews.get(set_data['name'], [])
+        sets.append({
+            "name": set_data['name'],
+            "count": set_data['count'],
+            "preview_instruments": preview,
+            "filename": set_data['filename']
+        })
+    
+    return {
+        "total_sets": len(complete_data['sets']),
+        "total_instruments": len(complete_data['instruments']),
+        "sets": sets
+    }
+
+def create_sets_overview(set_info, all_instruments):
+    """Create sets overview data"""
+    if columnar.available():
+        # Group the parsed rows by set with vectorized column operations
+        columns = columnar.ColumnarCatalogue.from_records(all_instruments)
+        return build_sets_overview_from_columns(set_info, columns)
+    
+    # Create a mapping of set names to their specialty and description
+    set_specialty_map = {}
+    set_description_map = {}
+    
+    for instrument in all_instruments:
+        record_set_details(set_specialty_map, set_description_map, instrument)
+    
+    return build_sets_overview(set_info, set_specialty_map, set_description_map)
+
+def build_sets_overview_from_columns(set_info, columns):
+    """Build the sets overview from a columnar store of the parsed rows"""
+    return build_sets_overview(set_info,
+                               columns.last_value_by_set('speciality'),
+                               columns.last_value_by_set('setDescription'))
+
+def build_catalogue(csv_directory, workers=1, cache_dir=None, profiler=NULL_PROFILER, validator=None,
+                    recorder=None):
+    """Stream every CSV through dedup and set aggregation in a single pass
+    
+    Only the record currently being merged and the unique instruments index are
+    held in memory; the raw per-row records are discarded as soon as they have
+    been folded into the index.
+    
+    When NumPy is installed the rows are also encoded into a columnar store
+    (a few bytes per row), returned as ``columns`` for reporting; otherwise
+    ``columns`` is None.
+    
+    Pass a ``StageProfiler`` as ``profiler`` to time each stage of the build,
+    and a ``RecordValidator`` as ``validator`` to check every parsed row
+    against the backend schema as it streams past. Pass an
+    ``IncrementalCatalogue`` as ``recorder`` to keep every row for --watch.
+    """
+    set_info = {}
+    structure_info = {}
+    unique_instruments = InstrumentIndex(key=None)
+    set_specialty_map = {}
+    set_description_map = {}
+    total_instruments = 0
+    builder = columnar.ColumnarBuilder() if columnar.available() else None
+    
+    dedup = profiler.section('dedup')
+    set_aggregation = profiler.section('sets overview')
+    validation = profiler.section('validation')
+    
+    for instrument in iter_all_csv_files(csv_directory, set_info, structure_info, workers, cache_dir,
+                                         profiler):
+        total_instruments += 1
+        if validator is not None:
+            with validation:
+                validator.add(instrument)
+        if recorder is not None:
+            recorder.add(instrument)
+        with set_aggregation:
+            if builder is not None:
+                builder.add(instrument)
+            else:
+                record_set_details(set_specialty_map, set_description_map, instrument)
+        with dedup:
+            add_to_unique_instruments(unique_instruments, instrument)
+    
+    if validator is not None:
+        with profiler.section('validation', items=0):
+            validator.flush()
+    
+    with profiler.section('sets overview', items=0):
+        if builder is not None:
+            columns = builder.build()
+            sets_overview = build_sets_overview_from_columns(set_info, columns)
+        else:
+            columns = None
+            sets_overview = build_sets_overview(set_info, set_specialty_map, set_description_map)
+    
+    return {
+        'totalInstruments': total_instruments,
+        'uniqueInstruments': unique_instruments.instruments(),
+        'setsOverview': sets_overview,
+        'columns': columns,
+        'setInfo': set_info,
+        'structureInfo': structure_info
+    }
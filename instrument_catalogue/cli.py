@@ -0,0 +1,478 @@
+"""
+Command line entry point for the comprehensive catalogue build
+"""
+
+import os
+import json
+import time
+import cProfile
+import argparse
+
+from . import images, validation
+from .binary_snapshot import binary_snapshot_path, write_binary_snapshot
+from .catalogue import build_catalogue, build_sets_summary
+from .database import write_database
+from .fuzzy import DEFAULT_MAX_DISTANCE, apply_merges, suggest_merges
+from .normalized import (build_size_report, normalize_catalogue, print_size_report,
+                         write_normalized_catalogue)
+from .profiling import NULL_PROFILER, StageProfiler, print_profile
+from .publish import StagedPublish, print_publish_summary
+from .records import RecordMemo
+from .output import read_js_export, snapshot_path, write_js_export, write_snapshot
+from .search_index import SearchIndex, write_search_index
+from .relevance import RelevanceIndex, write_relevance_index
+from .shards import DEFAULT_SHARD_SIZE, write_shards
+from .watch import DEBOUNCE, IncrementalCatalogue, watch_directory
+
+def positive_int(value):
+    """argparse type for options that must be a whole number of at least 1"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+def parse_arguments(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Parse surgical instrument CSVs into app data files")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Parse CSV files across N processes (0 = one per CPU, default 1)")
+    parser.add_argument('--cache-dir', default='.instrument_cache',
+                        help="Directory for the incremental build cache (default .instrument_cache)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Re-parse every CSV without reading or updating the build cache")
+    parser.add_argument('--stats', action='store_true',
+                        help="Print counts by category, speciality and set plus field completeness")
+    parser.add_argument('--validate', action='store_true',
+                        help="Check parsed rows and sets against the rules in the backend data structure")
+    parser.add_argument('--schema-file', default=validation.DEFAULT_SPEC_PATH,
+                        help=f"Backend data structure used by --validate (default {validation.DEFAULT_SPEC_PATH})")
+    parser.add_argument('--fuzzy-merge', choices=['report', 'apply'],
+                        help="Find near-duplicate instrument names and report or apply suggested merges")
+    parser.add_argument('--max-edit-distance', type=int, default=DEFAULT_MAX_DISTANCE,
+                        help=f"Edit distance for --fuzzy-merge (default {DEFAULT_MAX_DISTANCE})")
+    parser.add_argument('--image-dir',
+                        help="Resolve REFERENCE IMAGES files from this directory and generate thumbnails")
+    parser.add_argument('--asset-dir', default='assets/instruments',
+                        help="Where content-addressed images and thumbnails are stored (default assets/instruments)")
+    parser.add_argument('--image-base-url',
+                        help="URL the asset directory is served from, prefixed to thumbnails in the data "
+                             "files (required with --image-dir)")
+    parser.add_argument('--compact', action='store_true',
+                        help="Write data files without indentation for production builds "
+                             "(default: pretty-printed for readable diffs)")
+    parser.add_argument('--normalized', action='store_true',
+                        help="Also write data/normalizedCatalogue.js (instruments stored once, sets "
+                             "reference ids) and report its size against the current files")
+    parser.add_argument('--sharded', action='store_true',
+                        help="Also write a lazily loadable manifest and chunk files to data/shards/")
+    parser.add_argument('--shard-size', type=positive_int, default=DEFAULT_SHARD_SIZE,
+                        help=f"Instruments per chunk file in sharded output (default {DEFAULT_SHARD_SIZE})")
+    parser.add_argument('--sqlite', action='store_true',
+                        help="Also write data/catalogue.db, an SQLite file with indexed sets and "
+                             "specialities and FTS5 full-text search")
+    parser.add_argument('--relevance-index', action='store_true',
+                        help="Also write data/relevanceIndex.js, stemmed terms with precomputed BM25F "
+                             "scores for ranked search")
+    parser.add_argument('--profile', action='store_true',
+                        help="Print wall time, CPU time, throughput and peak allocations for each stage")
+    parser.add_argument('--profile-output',
+                        help="Write profiling data to this file: collapsed stage stacks for flame graphs "
+                             "if it ends in .folded, otherwise cProfile stats for pstats or snakeviz")
+    parser.add_argument('--watch', action='store_true',
+                        help="After the build, keep watching instrument_csvs/ and republish the data files "
+                             "whenever CSVs are saved, re-parsing only the changed files")
+    parser.add_argument('--debounce', type=float, default=DEBOUNCE,
+                        help=f"Seconds of quiet after a save before --watch rebuilds (default {DEBOUNCE})")
+    args = parser.parse_args(argv)
+    if args.watch and (args.fuzzy_merge == 'apply' or args.image_dir):
+        parser.error("--watch cannot be combined with --fuzzy-merge apply or --image-dir")
+    if args.image_dir and not args.image_base_url:
+        # The app loads thumbnails as <Image source={{uri}}>, which needs an absolute URL
+        parser.error("--image-dir requires --image-base-url")
+    return args
+
+def print_catalogue_stats(columns, top=10):
+    """Print group-by counts and field completeness from the columnar store"""
+    if columns is None:
+        print("\nCatalogue statistics need numpy (pip install numpy)")
+        return
+    
+    total = len(columns)
+    for title, column in [('category', 'category'), ('speciality', 'speciality'), ('set', 'setName')]:
+        counts = columns.counts_by(column)
+        print(f"\nInstruments by {title} ({len(counts)} distinct):")
+        for value, count in sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:top]:
+            print(f"- {value}: {count}")
+    
+    print("\nField completeness:")
+    for field, filled in columns.field_completeness().items():
+        print(f"- {field}: {filled}/{total} ({filled / total if total else 0:.0%})")
+
+def create_complete_data(total_instruments, unique_instruments, sets_overview, set_info, structure_info):
+    """Return the completeInstrumentsData structure: sets, instruments and build metadata"""
+    return {
+        'sets': sets_overview,
+        'instruments': unique_instruments,
+        'metadata': {
+            'totalInstruments': total_instruments,
+            'uniqueInstruments': len(unique_instruments),
+            'totalSets': len(set_info),
+            'oldStructureFiles': sum(1 for s in structure_info.values() if s == 'old'),
+            'newStructureFiles': sum(1 for s in structure_info.values() if s == 'new'),
+            'parsingDate': '2024-01-01'  # Update as needed
+        }
+    }
+
+def write_sets_summary(publication, complete_data, pretty=True):
+    """Stage data/setsSummary.js, each set's count and first few instrument names, and return it"""
+    sets_summary = build_sets_summary(complete_data)
+    write_js_export(publication.path('data/setsSummary.js'), 'Surgical Sets Summary Data',
+                    'setsSummary', sets_summary, pretty)
+    return sets_summary
+
+def write_data_files(publication, complete_data, args, profiler=NULL_PROFILER, memo=None):
+    """Stage the app data files for ``complete_data``, returning (shard sizes, size report)
+    
+    ``memo`` (a ``RecordMemo``) lets repeated builds reuse the encoding of unchanged records.
+    """
+    unique_instruments = complete_data['instruments']
+    sets_overview = complete_data['sets']
+    
+    # Write complete instruments data
+    # Records are streamed to each file one at a time rather than dumped as one string
+    pretty = not args.compact
+    with profiler.section('write data/completeInstrumentsData.js', items=len(unique_instruments)):
+        write_js_export(publication.path('data/completeInstrumentsData.js'), 'Complete Surgical Instruments Data',
+                        'completeInstrumentsData', complete_data, pretty, memo)
+        # JSON sidecar for Python tools such as update_sets_overview.py
+        write_snapshot(publication.path(snapshot_path('data/completeInstrumentsData.js')), complete_data, memo)
+        # Memory-mappable copy for tools that only touch part of the catalogue
+        write_binary_snapshot(publication.path(binary_snapshot_path('data/completeInstrumentsData.js')),
+                              complete_data)
+    
+    # Write unique instruments data
+    with profiler.section('write data/uniqueInstruments.js', items=len(unique_instruments)):
+        write_js_export(publication.path('data/uniqueInstruments.js'), 'Unique Surgical Instruments Data',
+                        'uniqueInstruments', unique_instruments, pretty, memo)
+    
+    # Write search index, keyed by position in completeInstrumentsData.instruments
+    with profiler.section('write data/searchIndex.js', items=len(unique_instruments)):
+        write_search_index(SearchIndex.from_instruments(unique_instruments, memo),
+                           publication.path('data/searchIndex.js'))
+    
+    # Write the ranked search index, keyed the same way
+    if args.relevance_index:
+        with profiler.section('write data/relevanceIndex.js', items=len(unique_instruments)):
+            write_relevance_index(RelevanceIndex.from_instruments(unique_instruments),
+                                  publication.path('data/relevanceIndex.js'))
+    else:
+        publication.discard('data/relevanceIndex.js')
+    
+    # Write sets overview
+    with profiler.section('write data/setsOverview.js', items=len(sets_overview)):
+        write_js_export(publication.path('data/setsOverview.js'), 'Surgical Sets Overview Data',
+                        'setsOverview', sets_overview, pretty, memo)
+    
+    # Summarize the sets from the same in-memory catalogue
+    with profiler.section('write data/setsSummary.js', items=len(sets_overview)):
+        write_sets_summary(publication, complete_data, pretty)
+    
+    # Write the sharded manifest and chunks
+    shard_sizes = None
+    if args.sharded:
+        with profiler.section('write data/shards/', items=len(unique_instruments)):
+            shard_sizes = write_shards(unique_instruments, sets_overview,
+                                       publication.directory('data/shards'),
+                                       metadata=complete_data['metadata'], shard_size=args.shard_size,
+                                       memo=memo)
+    else:
+        publication.discard('data/shards')
+    
+    # Write the normalized catalogue and compare it with the current layout
+    size_report = None
+    if args.normalized:
+        with profiler.section('write data/normalizedCatalogue.js', items=len(unique_instruments)):
+            normalized = normalize_catalogue(unique_instruments, sets_overview, complete_data['metadata'])
+            write_normalized_catalogue(normalized, publication.path('data/normalizedCatalogue.js'), pretty)
+        size_report = build_size_report([publication.path('data/completeInstrumentsData.js'),
+                                         publication.path('data/uniqueInstruments.js')],
+                                        publication.path('data/normalizedCatalogue.js'))
+    else:
+        publication.discard('data/normalizedCatalogue.js')
+    
+    # Write the SQLite store
+    if args.sqlite:
+        with profiler.section('write data/catalogue.db', items=len(unique_instruments)):
+            write_database(publication.path('data/catalogue.db'), unique_instruments, sets_overview,
+                           complete_data['metadata'])
+    else:
+        publication.discard('data/catalogue.db')
+    
+    return shard_sizes, size_report
+
+def validate_sets(schema_spec, row_validator, sets_overview, profiler=NULL_PROFILER):
+    """Check the sets, print both --validate summaries and return the validation report"""
+    with profiler.section('validation', items=len(sets_overview)):
+        set_validator = validation.RecordValidator(validation.sets_schema(schema_spec))
+        validation_report = {
+            'instruments': row_validator.report(),
+            'sets': set_validator.validate(sets_overview)
+        }
+    validation.print_validation_report("Instrument row validation", validation_report['instruments'])
+    validation.print_validation_report("Set validation", validation_report['sets'])
+    return validation_report
+
+def write_parsing_report(publication, catalogue, unique_instruments, validation_report=None,
+                         suggested_merges=None, size_report=None, profile=None):
+    """Stage parsing_report.json for a catalogue and return the report"""
+    structure_info = catalogue['structureInfo']
+    report = {
+        'summary': {
+            'totalInstruments': catalogue['totalInstruments'],
+            'uniqueInstruments': len(unique_instruments),
+            'totalSets': len(catalogue['setInfo']),
+            'oldStructureFiles': sum(1 for s in structure_info.values() if s == 'old'),
+            'newStructureFiles': sum(1 for s in structure_info.values() if s == 'new')
+        },
+        'setInfo': catalogue['setInfo'],
+        'structureInfo': structure_info
+    }
+    if validation_report is not None:
+        report['validation'] = validation_report
+    if suggested_merges is not None:
+        report['suggestedMerges'] = suggested_merges
+    if size_report is not None:
+        report['outputSizes'] = size_report
+    if profile is not None:
+        report['profile'] = profile
+    with open(publication.path('parsing_report.json'), 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return report
+
+def run_watch(incremental, args, schema_spec=None):
+    """Republish the data files and parsing report from an in-memory catalogue each time CSVs change"""
+    csv_directory = incremental.csv_directory
+    # Unchanged instruments are the same objects between rebuilds, so their encoding is reused
+    memo = RecordMemo()
+    print(f"\nWatching {csv_directory}/ for changes (Ctrl+C to stop)...")
+    
+    try:
+        for changed in watch_directory(csv_directory, debounce=args.debounce):
+            start = time.perf_counter()
+            affected = incremental.update(changed)
+            catalogue = incremental.catalogue()
+            complete_data = create_complete_data(catalogue['totalInstruments'], catalogue['uniqueInstruments'],
+                                                 catalogue['setsOverview'], catalogue['setInfo'],
+                                                 catalogue['structureInfo'])
+            
+            validation_report = None
+            if args.validate:
+                # Every row is checked again so the report's first errors stay those of a full build
+                row_validator = validation.RecordValidator(validation.row_schema(schema_spec))
+                row_validator.validate(incremental.records())
+                validation_report = validate_sets(schema_spec, row_validator, catalogue['setsOverview'])
+            suggested_merges = None
+            if args.fuzzy_merge:
+                suggested_merges = suggest_merges(catalogue['uniqueInstruments'], args.max_edit_distance)
+                print(f"Suggested merges (edit distance <= {args.max_edit_distance}): {len(suggested_merges)}")
+            
+            publication = StagedPublish()
+            try:
+                _, size_report = write_data_files(publication, complete_data, args, memo=memo)
+                write_parsing_report(publication, catalogue, catalogue['uniqueInstruments'], validation_report,
+                                     suggested_merges, size_report)
+                published = publication.commit()
+            finally:
+                publication.cleanup()
+            memo.sweep()
+            print(f"\n{len(changed)} CSV files changed, {len(affected)} instruments re-merged, "
+                  f"{len(published['changed']) + len(published['removed'])} data files updated "
+                  f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+            for relative in published['changed']:
+                print(f"- updated {relative}")
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+
+def main(argv=None):
+    """Main parsing function"""
+    args = parse_arguments(argv)
+    csv_directory = 'instrument_csvs'
+    
+    if not os.path.exists(csv_directory):
+        print(f"Error: Directory '{csv_directory}' not found!")
+        return
+    
+    print("Starting comprehensive surgical instruments data parsing...")
+    print("=" * 60)
+    
+    # Folded stack output comes from the stage profiler, anything else from cProfile
+    folded_output = args.profile_output and args.profile_output.endswith('.folded')
+    profiler = StageProfiler() if args.profile or folded_output else NULL_PROFILER
+    function_profile = cProfile.Profile() if args.profile_output and not folded_output else None
+    if function_profile is not None:
+        function_profile.enable()
+    profiler.start()
+    
+    # Compile the backend schema once so rows can be checked as they stream past
+    schema_spec = validation.load_spec(args.schema_file) if args.validate else None
+    row_validator = validation.RecordValidator(validation.row_schema(schema_spec)) if args.validate else None
+    
+    # Stream all CSV files through dedup and set aggregation; --watch keeps
+    # the parsed rows so later changes can be patched in
+    cache_dir = None if args.no_cache else args.cache_dir
+    incremental = IncrementalCatalogue(csv_directory) if args.watch else None
+    catalogue = build_catalogue(csv_directory, workers=args.workers, cache_dir=cache_dir,
+                                profiler=profiler, validator=row_validator, recorder=incremental)
+    total_instruments = catalogue['totalInstruments']
+    unique_instruments = catalogue['uniqueInstruments']
+    sets_overview = catalogue['setsOverview']
+    set_info = catalogue['setInfo']
+    structure_info = catalogue['structureInfo']
+    
+    print("\n" + "=" * 60)
+    print("PARSING SUMMARY")
+    print("=" * 60)
+    print(f"Total instruments parsed: {total_instruments}")
+    print(f"Total sets processed: {len(set_info)}")
+    
+    # Count structures
+    old_structure_count = sum(1 for s in structure_info.values() if s == 'old')
+    new_structure_count = sum(1 for s in structure_info.values() if s == 'new')
+    print(f"Files with old structure: {old_structure_count}")
+    print(f"Files with new structure: {new_structure_count}")
+    print(f"Unique instruments: {len(unique_instruments)}")
+    
+    validation_report = None
+    if args.validate:
+        validation_report = validate_sets(schema_spec, row_validator, sets_overview, profiler)
+    
+    # Cluster spelling variants of the same instrument name
+    suggested_merges = None
+    if args.fuzzy_merge:
+        with profiler.section('fuzzy merge', items=len(unique_instruments)):
+            suggested_merges = suggest_merges(unique_instruments, args.max_edit_distance)
+        print(f"\nSuggested merges (edit distance <= {args.max_edit_distance}): {len(suggested_merges)}")
+        for suggestion in suggested_merges:
+            print(f"- {suggestion['canonical']!r} <- {', '.join(map(repr, suggestion['variants']))}")
+        if args.fuzzy_merge == 'apply':
+            unique_instruments = apply_merges(unique_instruments, suggested_merges)
+            print(f"Unique instruments after merging: {len(unique_instruments)}")
+    
+    # Every artifact, reference image assets included, is staged first and
+    # only changed files replace the published ones
+    publication = StagedPublish()
+    try:
+        # Point instruments with local reference images at cached thumbnails
+        if args.image_dir:
+            if images.available():
+                asset_dir = os.path.relpath(args.asset_dir)
+                # An asset directory outside the project is written in place
+                output_dir = None if asset_dir.startswith(os.pardir) else publication.directory(asset_dir)
+                with profiler.section('reference images', items=len(unique_instruments)):
+                    image_stats = images.build_image_assets(unique_instruments, args.image_dir, args.asset_dir,
+                                                            base_url=args.image_base_url, cache_dir=cache_dir,
+                                                            workers=args.workers, output_dir=output_dir)
+                print(f"Reference images: {image_stats['resolved']} instruments resolved to "
+                      f"{image_stats['images']} images ({image_stats['generated']} newly thumbnailed, "
+                      f"{image_stats['failed']} failed)")
+            else:
+                print("Reference image thumbnails need Pillow (pip install pillow)")
+        
+        # Create complete data structure
+        complete_data = create_complete_data(total_instruments, unique_instruments, sets_overview,
+                                             set_info, structure_info)
+        
+        # Write output files
+        print("\nWriting output files...")
+        shard_sizes, size_report = write_data_files(publication, complete_data, args, profiler)
+        
+        profiler.stop()
+        if function_profile is not None:
+            function_profile.disable()
+            function_profile.dump_stats(args.profile_output)
+        
+        # Write detailed parsing report
+        report = write_parsing_report(publication, catalogue, unique_instruments, validation_report,
+                                      suggested_merges, size_report,
+                                      profiler.report() if profiler.enabled else None)
+        
+        # Publish only once every artifact is complete
+        published = publication.commit()
+    finally:
+        publication.cleanup()
+    
+    print("\n" + "=" * 60)
+    print("PARSING COMPLETE!")
+    print("=" * 60)
+    print("Output files created:")
+    print("- data/completeInstrumentsData.js")
+    print("- data/uniqueInstruments.js") 
+    print("- data/searchIndex.js")
+    print("- data/setsOverview.js")
+    print("- data/setsSummary.js")
+    print("- parsing_report.json")
+    if args.normalized:
+        print("- data/normalizedCatalogue.js")
+    if args.sharded:
+        chunk_bytes = sum(size for name, size in shard_sizes.items() if name != 'manifest.json')
+        print(f"- data/shards/ (manifest {shard_sizes['manifest.json'] / 1024:.1f} KB, "
+              f"{len(shard_sizes) - 1} chunks totalling {chunk_bytes / 1024:.1f} KB)")
+    if args.relevance_index:
+        print(f"- data/relevanceIndex.js ({os.path.getsize('data/relevanceIndex.js') / 1024:.1f} KB)")
+    if args.sqlite:
+        print(f"- data/catalogue.db ({os.path.getsize('data/catalogue.db') / 1024:.1f} KB)")
+    
+    # Print some statistics
+    print(f"\nStatistics:")
+    print(f"- Total instruments: {total_instruments}")
+    print(f"- Unique instruments: {len(unique_instruments)}")
+    print(f"- Total sets: {len(set_info)}")
+    print(f"- Files with speciality data: {sum(1 for s in set_info.values() if s['hasSpeciality'])}")
+    print(f"- Files with set description data: {sum(1 for s in set_info.values() if s['hasSetDescription'])}")
+    
+    if size_report is not None:
+        print_size_report(size_report)
+    
+    print_publish_summary(published)
+    
+    if args.stats:
+        print_catalogue_stats(catalogue['columns'])
+    
+    if profiler.enabled:
+        print_profile(report['profile'])
+    if folded_output:
+        with open(args.profile_output, 'w', encoding='utf-8') as f:
+            f.write(profiler.folded_stacks())
+    if args.profile_output:
+        print(f"\nProfile written to {args.profile_output}")
+    
+    if args.watch:
+        incremental.seed(structure_info)
+        run_watch(incremental, args, schema_spec)
+
+def update_sets_summary():
+    """Republish data/setsSummary.js from the published catalogue (update_sets_overview.py)
+    
+    The build already writes the summary; this refreshes it for data written
+    by other tools, such as the legacy fix_parsing scripts.
+    """
+    complete_data = read_js_export('data/completeInstrumentsData.js', 'completeInstrumentsData')
+    if not complete_data:
+        print("Error: Could not read completeInstrumentsData.js")
+        return
+    
+    publication = StagedPublish()
+    try:
+        sets_summary = write_sets_summary(publication, complete_data)
+        published = publication.commit()
+    finally:
+        publication.cleanup()
+    
+    print(f"Total sets: {sets_summary['total_sets']}")
+    print(f"Total instruments: {sets_summary['total_instruments']}")
+    for set_data in sets_summary['sets']:
+        print(f"{set_data['name']}: {set_data['count']} instruments")
+    print_publish_summary(published)
@@ -0,0 +1,138 @@
+"""
+Columnar, array-backed view of the parsed catalogue for bulk analytics
+
+Category, speciality, set description and set name are dictionary-encoded:
+each column is an integer array of codes into a string table, with code 0
+reserved for the empty string. Field completeness is a per-row bitmask over
+the text fields. Group-by counts and filters are NumPy operations over these
+arrays instead of Python loops over record dicts.
+
+NumPy is an optional dependency; use ``available()`` before building a store.
+"""
+
+from array import array
+from itertools import compress
+from operator import attrgetter
+
+from .records import TEXT_FIELDS
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency, only needed for columnar analytics
+    np = None
+
+ENCODED_COLUMNS = ('category', 'speciality', 'setDescription', 'setName')
+
+# Bit value of each text field in the completeness mask
+_FIELD_BITS = tuple(1 << bit for bit in range(len(TEXT_FIELDS)))
+
+def available():
+    """Return True when NumPy is installed and the columnar store can be used"""
+    return np is not None
+
+class ColumnarBuilder:
+    """Incrementally encodes parsed records into compact code arrays
+    
+    Rows are appended to ``array('I')`` buffers, so building the store while
+    streaming costs a few bytes per row rather than keeping the records.
+    """
+    
+    def __init__(self):
+        if np is None:
+            raise ImportError("The columnar catalogue store requires numpy (pip install numpy)")
+        
+        self._tables = {column: [''] for column in ENCODED_COLUMNS}
+        self._codes = {column: {'': 0} for column in ENCODED_COLUMNS}
+        self._columns = {column: array('I') for column in ENCODED_COLUMNS}
+        self._completeness = array('H')
+        self._encoders = [(attrgetter(column), self._codes[column], self._tables[column],
+                           self._columns[column].append) for column in ENCODED_COLUMNS]
+        self._text_fields = attrgetter(*TEXT_FIELDS)
+    
+    def add(self, instrument):
+        """Append one parsed instrument"""
+        for getter, codes, table, append in self._encoders:
+            value = getter(instrument) or ''
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(table)
+                table.append(value)
+            append(code)
+        
+        # compress() keeps the bits of the non-empty fields without a Python-level loop
+        self._completeness.append(sum(compress(_FIELD_BITS, self._text_fields(instrument))))
+    
+    def build(self):
+        """Return the finished ColumnarCatalogue; the builder's buffers are shared, not copied"""
+        columns = {column: np.frombuffer(codes, dtype=np.uint32) if len(codes) else
+                   np.zeros(0, dtype=np.uint32) for column, codes in self._columns.items()}
+        completeness = (np.frombuffer(self._completeness, dtype=np.uint16) if len(self._completeness)
+                        else np.zeros(0, dtype=np.uint16))
+        return ColumnarCatalogue(columns, self._tables, completeness)
+
+class ColumnarCatalogue:
+    """Dictionary-encoded columns plus string tables for the parsed catalogue"""
+    
+    def __init__(self, columns, tables, completeness):
+        self.columns = columns
+        self.tables = tables
+        self.completeness = completeness
+        self._codes = {column: {value: code for code, value in enumerate(table)}
+                       for column, table in tables.items()}
+    
+    @classmethod
+    def from_records(cls, records):
+        """Build the store from an iterable of parsed instruments"""
+        builder = ColumnarBuilder()
+        for record in records:
+            builder.add(record)
+        return builder.build()
+    
+    def __len__(self):
+        return len(self.completeness)
+    
+    def code_for(self, column, value):
+        """Return the integer code of a value in a column, or -1 if it never occurs"""
+        return self._codes[column].get(value, -1)
+    
+    def mask(self, **filters):
+        """Return a boolean row mask matching every ``column=value`` filter"""
+        selected = np.ones(len(self), dtype=bool)
+        for column, value in filters.items():
+            selected &= self.columns[column] == self.code_for(column, value)
+        return selected
+    
+    def count_where(self, **filters):
+        """Count rows matching every ``column=value`` filter"""
+        return int(np.count_nonzero(self.mask(**filters)))
+    
+    def counts_by(self, column, mask=None, include_empty=False):
+        """Return {value: row count} for a column, optionally over a row mask"""
+        codes = self.columns[column] if mask is None else self.columns[column][mask]
+        counts = np.bincount(codes, minlength=len(self.tables[column]))
+        table = self.tables[column]
+        return {table[code]: int(count) for code, count in enumerate(counts)
+                if count and (include_empty or code)}
+    
+    def last_value_by_set(self, column):
+        """Return {set name: value} using the last non-empty value seen in each set
+        
+        Matches the overwrite-as-you-go mapping create_sets_overview builds.
+        """
+        rows = np.flatnonzero(self.columns[column])
+        if not len(rows):
+            return {}
+        
+        # Reverse so np.unique's first-occurrence index picks each set's last row
+        rows = rows[::-1]
+        set_codes, first = np.unique(self.columns['setName'][rows], return_index=True)
+        values = self.columns[column][rows[first]]
+        set_table = self.tables['setName']
+        value_table = self.tables[column]
+        return {set_table[set_code]: value_table[value]
+                for set_code, value in zip(set_codes.tolist(), values.tolist())}
+    
+    def field_completeness(self):
+        """Return {field: number of rows where the field is filled in}"""
+        return {field: int(np.count_nonzero(self.completeness & (1 << bit)))
+                for bit, field in enumerate(TEXT_FIELDS)}
@@ -0,0 +1,269 @@
+"""
+SQLite catalogue store with FTS5 full-text search
+
+An optional build target that writes specialities, sets, unique instruments
+and the set membership each instrument's ``sets`` list records into one
+SQLite file. Everything is inserted with ``executemany`` inside a single
+transaction, with journaling off while the file is built; secondary indexes
+are created after the rows are in, and the FTS5 index is filled with one
+``rebuild`` from the instruments table (an external-content table, so the
+text is stored once).
+
+Instrument columns keep the field names of the data files; the ``sets``
+and ``specialities`` lists live in link tables instead. ``CatalogueDatabase`` is
+the query API: BM25-ranked full-text search with ``name`` weighted highest,
+and set and speciality lookups answered from indexes. The same file can be
+shipped to the device for offline search.
+"""
+
+import os
+import sqlite3
+
+from .normalized import assign_ids
+from .records import UNIQUE_DEFAULTS, record_dict
+from .search_index import tokenize
+
+SCHEMA_VERSION = 1
+
+# Instrument fields stored as columns, in output order
+INSTRUMENT_COLUMNS = ('name', 'category', 'brief', 'description', 'type', 'usage',
+                      'importantConsiderations', 'cleaningSterilization', 'inspectionMaintenance',
+                      'referenceImages', 'image', 'sourceFile', 'rowNumber', 'setName')
+
+# Full-text indexed fields and their BM25 weights; a match in the name counts most
+SEARCH_WEIGHTS = {
+    'name': 10.0,
+    'brief': 4.0,
+    'description': 2.0,
+    'usage': 1.0,
+    'importantConsiderations': 1.0,
+}
+
+SCHEMA = f"""
+CREATE TABLE catalogue_info (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID;
+CREATE TABLE specialities (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE sets (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    count INTEGER NOT NULL,
+    structure TEXT,
+    hasSpeciality INTEGER NOT NULL,
+    hasSetDescription INTEGER NOT NULL,
+    filename TEXT,
+    specialityId INTEGER REFERENCES specialities (id),
+    setDescription TEXT
+);
+CREATE TABLE instruments (
+    id INTEGER PRIMARY KEY,
+    slug TEXT NOT NULL UNIQUE,
+    {', '.join(f'{column} TEXT' if column != 'rowNumber' else 'rowNumber INTEGER'
+               for column in INSTRUMENT_COLUMNS)}
+);
+CREATE TABLE set_instruments (
+    instrumentId INTEGER NOT NULL REFERENCES instruments (id),
+    setId INTEGER NOT NULL REFERENCES sets (id),
+    position INTEGER NOT NULL,
+    PRIMARY KEY (instrumentId, setId)
+) WITHOUT ROWID;
+CREATE TABLE instrument_specialities (
+    instrumentId INTEGER NOT NULL REFERENCES instruments (id),
+    specialityId INTEGER NOT NULL REFERENCES specialities (id),
+    position INTEGER NOT NULL,
+    PRIMARY KEY (instrumentId, specialityId)
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE instrument_search USING fts5 (
+    {', '.join(SEARCH_WEIGHTS)},
+    content='instruments', content_rowid='id', tokenize='porter unicode61'
+);
+"""
+
+# Created once the rows are in, which is cheaper than maintaining them per insert
+INDEXES = """
+CREATE INDEX set_instruments_by_set ON set_instruments (setId, instrumentId);
+CREATE INDEX sets_by_speciality ON sets (specialityId, name);
+CREATE INDEX instruments_by_name ON instruments (name COLLATE NOCASE);
+CREATE INDEX instruments_by_category ON instruments (category);
+"""
+
+def write_database(path, unique_instruments, sets_overview, metadata=None):
+    """Write the catalogue to a new SQLite file at ``path`` and return its size in bytes"""
+    if os.path.exists(path):
+        os.remove(path)
+    
+    connection = sqlite3.connect(path, isolation_level=None)
+    try:
+        # A half-written file is never published, so crash safety is not needed while building
+        connection.execute('PRAGMA journal_mode = OFF')
+        connection.execute('PRAGMA synchronous = OFF')
+        connection.execute('BEGIN')
+        for statement in SCHEMA.split(';'):
+            if statement.strip():
+                connection.execute(statement)
+        
+        speciality_ids = {}
+        
+        def speciality_id(name):
+            if name not in speciality_ids:
+                speciality_ids[name] = len(speciality_ids) + 1
+            return speciality_ids[name]
+        
+        set_ids = {}
+        set_rows = []
+        for set_entry in sets_overview:
+            set_ids[set_entry['name']] = len(set_ids) + 1
+            speciality = set_entry.get('speciality')
+            set_rows.append((set_ids[set_entry['name']], set_entry['name'], set_entry['count'],
+                             set_entry.get('structure'), bool(set_entry.get('hasSpeciality')),
+                             bool(set_entry.get('hasSetDescription')), set_entry.get('filename'),
+                             speciality_id(speciality) if speciality else None, set_entry.get('setDescription')))
+        connection.executemany('INSERT INTO sets VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', set_rows)
+        
+        instruments = [record_dict(instrument) for instrument in unique_instruments]
+        slugs = assign_ids(instruments)
+        connection.executemany(
+            f"INSERT INTO instruments VALUES ({', '.join('?' * (len(INSTRUMENT_COLUMNS) + 2))})",
+            ((instrument_id, slug, *(instrument.get(column) for column in INSTRUMENT_COLUMNS))
+             for instrument_id, (slug, instrument) in enumerate(zip(slugs, instruments), 1)))
+        
+        # Sets only named by instruments (not in the overview) still get a row
+        for instrument in instruments:
+            for set_name in instrument.get('sets') or ():
+                if set_name not in set_ids:
+                    set_ids[set_name] = len(set_ids) + 1
+                    connection.execute('INSERT INTO sets (id, name, count, hasSpeciality, hasSetDescription) '
+                                       'VALUES (?, ?, 0, 0, 0)', (set_ids[set_name], set_name))
+        connection.executemany(
+            'INSERT OR IGNORE INTO set_instruments VALUES (?, ?, ?)',
+            ((instrument_id, set_ids[set_name], position)
+             for instrument_id, instrument in enumerate(instruments, 1)
+             for position, set_name in enumerate(instrument.get('sets') or ())))
+        connection.executemany(
+            'INSERT OR IGNORE INTO instrument_specialities VALUES (?, ?, ?)',
+            ((instrument_id, speciality_id(speciality), position)
+             for instrument_id, instrument in enumerate(instruments, 1)
+             for position, speciality in enumerate(instrument.get('specialities') or ())))
+        connection.executemany('INSERT INTO specialities VALUES (?, ?)',
+                               ((speciality_id, name) for name, speciality_id in speciality_ids.items()))
+        
+        info = {'schemaVersion': SCHEMA_VERSION, **dict(UNIQUE_DEFAULTS), **(metadata or {})}
+        connection.executemany('INSERT INTO catalogue_info VALUES (?, ?)',
+                               ((key, str(value)) for key, value in info.items()))
+        
+        for statement in INDEXES.split(';'):
+            if statement.strip():
+                connection.execute(statement)
+        connection.execute("INSERT INTO instrument_search (instrument_search) VALUES ('rebuild')")
+        connection.execute("INSERT INTO instrument_search (instrument_search) VALUES ('optimize')")
+        # Stored with the table, so ORDER BY rank uses the weights inside FTS5
+        weights = ', '.join(str(weight) for weight in SEARCH_WEIGHTS.values())
+        connection.execute("INSERT INTO instrument_search (instrument_search, rank) VALUES ('rank', ?)",
+                           (f'bm25({weights})',))
+        connection.execute('COMMIT')
+        connection.execute('ANALYZE')
+    finally:
+        connection.close()
+    return os.path.getsize(path)
+
+def match_expression(query):
+    """Turn free text into an FTS5 query: every token must match, the last one as a prefix"""
+    tokens = tokenize(query)
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"' for token in tokens[:-1]) + (' ' if len(tokens) > 1 else '') + f'"{tokens[-1]}"*'
+
+class CatalogueDatabase:
+    """Read-only queries over a database written by ``write_database``"""
+    
+    def __init__(self, path):
+        self.connection = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+        self.connection.row_factory = sqlite3.Row
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def close(self):
+        self.connection.close()
+    
+    def _instruments(self, sql, parameters):
+        return [dict(row) for row in self.connection.execute(sql, parameters)]
+    
+    def search(self, query, limit=20, offset=0):
+        """Return instruments matching every word of ``query``, best BM25 score first
+        
+        Each result carries its ``score`` (lower is better, as in SQLite's bm25).
+        """
+        expression = match_expression(query)
+        if expression is None:
+            return []
+        # Rank and cut to the page inside FTS5 before any instrument row is read
+        return self._instruments(
+            'SELECT instruments.*, hits.score FROM ('
+            ' SELECT rowid, rank AS score FROM instrument_search WHERE instrument_search MATCH ?'
+            ' ORDER BY rank LIMIT ? OFFSET ?) AS hits '
+            'JOIN instruments ON instruments.id = hits.rowid ORDER BY hits.score, instruments.id',
+            (expression, limit, offset))
+    
+    def instrument(self, slug):
+        """Return one instrument by its slug id with its sets and specialities, or None"""
+        rows = self._instruments('SELECT * FROM instruments WHERE slug = ?', (slug,))
+        if not rows:
+            return None
+        instrument = rows[0]
+        instrument['sets'] = [row[0] for row in self.connection.execute(
+            'SELECT sets.name FROM set_instruments JOIN sets ON sets.id = set_instruments.setId '
+            'WHERE set_instruments.instrumentId = ? ORDER BY set_instruments.position', (instrument['id'],))]
+        instrument['specialities'] = [row[0] for row in self.connection.execute(
+            'SELECT specialities.name FROM instrument_specialities '
+            'JOIN specialities ON specialities.id = instrument_specialities.specialityId '
+            'WHERE instrument_specialities.instrumentId = ? ORDER BY instrument_specialities.position',
+            (instrument['id'],))]
+        return instrument
+    
+    def find_by_name(self, name):
+        """Return the instruments with this name, ignoring case"""
+        return self._instruments('SELECT * FROM instruments WHERE name = ? COLLATE NOCASE ORDER BY id', (name,))
+    
+    def instruments_in_set(self, set_name, limit=None, offset=0):
+        """Return a set's instruments in catalogue order"""
+        return self._instruments(
+            'SELECT instruments.* FROM sets '
+            'JOIN set_instruments ON set_instruments.setId = sets.id '
+            'JOIN instruments ON instruments.id = set_instruments.instrumentId '
+            'WHERE sets.name = ? ORDER BY instruments.id LIMIT ? OFFSET ?',
+            (set_name, -1 if limit is None else limit, offset))
+    
+    def sets(self, speciality=None):
+        """Return set overview rows, optionally only those of one speciality"""
+        sql = ('SELECT sets.*, specialities.name AS speciality FROM sets '
+               'LEFT JOIN specialities ON specialities.id = sets.specialityId')
+        if speciality is None:
+            rows = self.connection.execute(sql + ' ORDER BY sets.name')
+        else:
+            rows = self.connection.execute(sql + ' WHERE specialities.name = ? ORDER BY sets.name', (speciality,))
+        return [dict(row) for row in rows]
+    
+    def instruments_in_speciality(self, speciality, limit=None, offset=0):
+        """Return the instruments of every set in a speciality, each once, in catalogue order"""
+        return self._instruments(
+            'SELECT instruments.* FROM instruments WHERE instruments.id IN ('
+            ' SELECT set_instruments.instrumentId FROM specialities'
+            ' JOIN sets ON sets.specialityId = specialities.id'
+            ' JOIN set_instruments ON set_instruments.setId = sets.id'
+            ' WHERE specialities.name = ?) '
+            'ORDER BY instruments.id LIMIT ? OFFSET ?',
+            (speciality, -1 if limit is None else limit, offset))
+    
+    def specialities(self):
+        """Return [{'name', 'sets', 'instruments'}] with set and distinct instrument counts"""
+        return [dict(row) for row in self.connection.execute(
+            'SELECT specialities.name, COUNT(DISTINCT sets.id) AS sets, '
+            'COUNT(DISTINCT set_instruments.instrumentId) AS instruments FROM specialities '
+            'JOIN sets ON sets.specialityId = specialities.id '
+            'LEFT JOIN set_instruments ON set_instruments.setId = sets.id '
+            'GROUP BY specialities.id ORDER BY specialities.name')]
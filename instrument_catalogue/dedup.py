@@ -0,0 +1,71 @@
+"""
+Shared instrument deduplication
+Hash-indexes unique instruments by normalized name and tracks set membership in order
+"""
+
+def normalize_name(name):
+    """Return the dedup key for an instrument name (case-insensitive)"""
+    return name.lower()
+
+class InstrumentIndex:
+    """Unique instruments keyed by normalized name, in first-seen order
+    
+    Lookups and set-membership checks are dict/set operations, so merging
+    n rows costs O(n) instead of the O(n^2) of scanning every known
+    instrument. Each instrument's 'sets' list keeps first-seen order and is
+    mirrored by a set used only for membership tests.
+    """
+    
+    def __init__(self, key=normalize_name):
+        # key=None indexes names exactly as written
+        self._key = key
+        self._by_key = {}
+        self._set_members = {}
+    
+    def _make_key(self, name):
+        return self._key(name) if self._key else name
+    
+    def __len__(self):
+        return len(self._by_key)
+    
+    def __contains__(self, name):
+        return self._make_key(name) in self._by_key
+    
+    def get(self, name):
+        """Return the unique instrument for a name, or None"""
+        return self._by_key.get(self._make_key(name))
+    
+    def insert(self, instrument):
+        """Store a new unique instrument; its 'sets' list seeds set membership"""
+        key = self._make_key(instrument['name'])
+        self._by_key[key] = instrument
+        self._set_members[key] = set(instrument['sets'])
+        return instrument
+    
+    def add_set(self, name, set_name):
+        """Append a set to an indexed instrument's 'sets' unless already present"""
+        key = self._make_key(name)
+        members = self._set_members[key]
+        if set_name not in members:
+            members.add(set_name)
+            self._by_key[key]['sets'].append(set_name)
+    
+    def merge(self, instrument, set_name):
+        """Add an instrument seen in a set, merging it into any existing entry
+        
+        Returns the unique instrument the row was merged into.
+        """
+        existing_instrument = self.get(instrument['name'])
+        
+        if existing_instrument is not None:
+            # Add this set to the existing instrument's sets
+            self.add_set(instrument['name'], set_name)
+            return existing_instrument
+        
+        # Add new instrument
+        instrument['sets'] = [set_name]
+        return self.insert(instrument)
+    
+    def instruments(self):
+        """Return the unique instruments in first-seen order"""
+        return list(self._by_key.values())
@@ -0,0 +1,216 @@
+"""
+Typo-tolerant near-duplicate detection for instrument names
+
+Names are compared on a fuzzy key (lower case, punctuation collapsed to
+single spaces) and clustered when their edit distance is within a limit.
+Candidate pairs come from a segment index instead of comparing every pair
+of names. This is a pigeonhole filter over long grams:
+
+- Each key of length L is cut into ``d + 1`` contiguous segments
+- ``d`` edits can touch at most ``d`` of them, so two keys within edit
+  distance ``d`` always share one whole segment, shifted by at most ``d``
+  characters
+- Keys are indexed by (length, segment number, segment text), and each key
+  only probes the substrings that could be such a shifted segment of a key
+  whose length is within ``d`` of its own; with segment ``i`` preceded by at
+  most ``i`` edits, only a few start positions per segment need probing
+  (the multi-match-aware selection of Pass-Join)
+
+Segments are several characters long, so unlike short trigrams they are
+rare and their posting lists stay short however large the catalogue
+grows. Candidates are verified with a banded Levenshtein distance.
+
+Names whose numbers differ (7" vs 8" scissors) are sizes of different
+instruments and are never clustered. A single letter attached to a number
+is part of it, so No.3 and No.3L (or No.3 L) handles stay apart too. The
+index is partitioned by each name's numbers, so only names with the same
+numbers are ever compared.
+"""
+
+import re
+from collections import defaultdict
+
+from .records import MERGEABLE_FIELDS
+
+DEFAULT_MAX_DISTANCE = 2
+
+_NON_ALPHANUMERIC = re.compile(r'[^0-9a-z]+')
+# A number plus a single-letter suffix (3L, 3 L), but not the x of 7 x 10
+_NUMBER = re.compile(r'\d+(?: ?[a-z](?![a-z0-9]| \d))?')
+
+def fuzzy_key(name):
+    """Return the comparison key for a name: lower case with punctuation collapsed"""
+    return _NON_ALPHANUMERIC.sub(' ', name.lower()).strip()
+
+def number_key(key):
+    """Return the numbers of a fuzzy key, with their letter suffixes, as a partition key"""
+    return tuple(number.replace(' ', '') for number in _NUMBER.findall(key))
+
+def segment_bounds(length, parts):
+    """Return (start, length) of the ``parts`` contiguous segments of a key of ``length``"""
+    short, extra = divmod(length, parts)
+    bounds = []
+    start = 0
+    for part in range(parts):
+        # The last ``extra`` segments are one character longer
+        size = short + (part >= parts - extra)
+        bounds.append((start, size))
+        start += size
+    return bounds
+
+def bounded_levenshtein(a, b, limit):
+    """Return the edit distance between a and b, or limit + 1 once it must exceed limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    
+    # A shared prefix or suffix never changes the distance, so only the middle is compared
+    shortest = min(len(a), len(b))
+    prefix = 0
+    while prefix < shortest and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < shortest - prefix and a[-1 - suffix] == b[-1 - suffix]:
+        suffix += 1
+    a, b = a[prefix:len(a) - suffix], b[prefix:len(b) - suffix]
+    
+    if len(a) > len(b):
+        a, b = b, a
+    if not a:
+        return min(len(b), limit + 1)
+    
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i] + [0] * len(b)
+        # Only cells within ``limit`` of the diagonal can stay within the limit
+        low = max(1, i - limit)
+        high = min(len(b), i + limit)
+        if low > 1:
+            current[low - 1] = limit + 1
+        for j in range(low, high + 1):
+            cost = 0 if char_a == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+        if high < len(b):
+            current[high + 1:] = [limit + 1] * (len(b) - high)
+        if min(current[low - 1:high + 1]) > limit:
+            return limit + 1
+        previous = current
+    
+    return min(previous[len(b)], limit + 1)
+
+class _DisjointSets:
+    def __init__(self, size):
+        self.parent = list(range(size))
+    
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+    
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            # Keep the earliest index as root so clusters are deterministic
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+def similar_pairs(names, max_distance=DEFAULT_MAX_DISTANCE):
+    """Yield (i, j, distance) for name pairs i < j within ``max_distance`` edits"""
+    parts = max_distance + 1
+    index_by_segment = defaultdict(list)
+    # Keys shorter than ``parts`` have empty segments and are compared directly
+    short_keys = defaultdict(list)
+    keys = [fuzzy_key(name) for name in names]
+    
+    for index, key in enumerate(keys):
+        numbers = number_key(key)
+        length = len(key)
+        candidates = set()
+        
+        for other_length in range(max(0, length - max_distance), length + max_distance + 1):
+            if other_length < parts:
+                candidates.update(short_keys[numbers, other_length])
+                continue
+            delta = length - other_length
+            for part, (start, size) in enumerate(segment_bounds(other_length, parts)):
+                # Some segment always survives with at most ``part`` edits before it
+                # and ``max_distance - part`` after it, which bounds where it can be
+                first = max(0, start - part, start + delta - (max_distance - part))
+                last = min(length - size, start + part, start + delta + (max_distance - part))
+                for position in range(first, last + 1):
+                    bucket = index_by_segment.get((numbers, other_length, part, key[position:position + size]))
+                    if bucket:
+                        candidates.update(bucket)
+        
+        for other in sorted(candidates):
+            distance = bounded_levenshtein(keys[other], key, max_distance)
+            if distance <= max_distance:
+                yield other, index, distance
+        
+        if length < parts:
+            short_keys[numbers, length].append(index)
+        else:
+            for part, (start, size) in enumerate(segment_bounds(length, parts)):
+                index_by_segment[numbers, length, part, key[start:start + size]].append(index)
+
+def cluster_names(names, max_distance=DEFAULT_MAX_DISTANCE):
+    """Return clusters of near-duplicate names as lists of indexes, in first-seen order
+    
+    Clustering is transitive: names linked by a chain of close pairs end up
+    in the same cluster. Singletons are not returned.
+    """
+    disjoint_sets = _DisjointSets(len(names))
+    for i, j, _ in similar_pairs(names, max_distance):
+        disjoint_sets.union(i, j)
+    
+    clusters = {}
+    for index in range(len(names)):
+        clusters.setdefault(disjoint_sets.find(index), []).append(index)
+    return [members for members in clusters.values() if len(members) > 1]
+
+def suggest_merges(unique_instruments, max_distance=DEFAULT_MAX_DISTANCE):
+    """Return suggested merges as [{'canonical': name, 'variants': [names]}]
+    
+    The canonical name is the variant found in the most sets, then the first seen.
+    """
+    names = [instrument.name for instrument in unique_instruments]
+    suggestions = []
+    for members in cluster_names(names, max_distance):
+        canonical = min(members, key=lambda index: (-len(unique_instruments[index].sets), index))
+        suggestions.append({
+            'canonical': names[canonical],
+            'variants': [names[index] for index in members if index != canonical]
+        })
+    return suggestions
+
+def _extend_unique(values, others):
+    """Append the items of ``others`` missing from the list ``values``, keeping first-seen order"""
+    seen = set(values)
+    for value in others:
+        if value not in seen:
+            seen.add(value)
+            values.append(value)
+
+def merge_unique_instrument(target, other):
+    """Fold another unique instrument's sets and details into ``target``"""
+    _extend_unique(target.sets, other.sets)
+    
+    for field in MERGEABLE_FIELDS:
+        if not getattr(target, field):
+            value = getattr(other, field)
+            if value:
+                setattr(target, field, value)
+    
+    _extend_unique(target.specialities, other.specialities)
+    _extend_unique(target.setDescriptions, other.setDescriptions)
+
+def apply_merges(unique_instruments, suggestions):
+    """Return the unique instruments with every suggested variant merged into its canonical name"""
+    by_name = {instrument.name: instrument for instrument in unique_instruments}
+    merged_away = set()
+    for suggestion in suggestions:
+        target = by_name[suggestion['canonical']]
+        for variant in suggestion['variants']:
+            merge_unique_instrument(target, by_name[variant])
+            merged_away.add(variant)
+    return [instrument for instrument in unique_instruments if instrument.name not in merged_away]
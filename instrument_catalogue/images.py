@@ -0,0 +1,212 @@
+"""
+Content-addressed reference images with a thumbnail cache
+
+Files named in an instrument's REFERENCE IMAGES column are resolved from a
+local image directory, stored once under their SHA-256 digest and resized
+into THUMBNAIL_WIDTHS in a process pool. Assets are named by content, so an
+image already present in the asset directory is never processed again, and
+source digests are cached by size and mtime so unchanged files are not
+re-hashed on the next build. Resolved instruments then point ``image`` at
+their card-sized thumbnail instead of a placeholder.
+
+Pillow is an optional dependency; use ``available()`` before building assets.
+"""
+
+import os
+import re
+import json
+import shutil
+import multiprocessing
+
+from .cache import hash_file
+from .publish import link_file
+from .records import THUMBNAIL_WIDTHS
+
+try:
+    from PIL import Image
+except ImportError:  # Optional dependency, only needed for the image stage
+    Image = None
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp')
+IMAGE_MANIFEST = 'images.json'
+
+# References are separated by commas, semicolons, pipes or line breaks
+REFERENCE_SEPARATOR = re.compile(r'[,;|\n]+')
+
+def available():
+    """Return True when Pillow is installed and thumbnails can be generated"""
+    return Image is not None
+
+def split_references(value):
+    """Return the individual image references in a REFERENCE IMAGES value"""
+    return [reference.strip() for reference in REFERENCE_SEPARATOR.split(value or '') if reference.strip()]
+
+def index_image_directory(image_dir):
+    """Return {lower-cased file name or stem: path} for every image under a directory"""
+    images = {}
+    for root, _, files in os.walk(image_dir):
+        for filename in sorted(files):
+            stem, extension = os.path.splitext(filename)
+            if extension.lower() not in IMAGE_EXTENSIONS:
+                continue
+            path = os.path.join(root, filename)
+            images.setdefault(filename.lower(), path)
+            images.setdefault(stem.lower(), path)
+    return images
+
+def resolve_references(value, image_index):
+    """Return local image paths for a REFERENCE IMAGES value; remote URLs are skipped"""
+    paths = []
+    for reference in split_references(value):
+        if '://' in reference:
+            continue
+        path = image_index.get(os.path.basename(reference).lower())
+        if path and path not in paths:
+            paths.append(path)
+    return paths
+
+def hash_images(paths, cache_dir=None):
+    """Return {path: SHA-256 digest}, reusing digests of files whose size and mtime are unchanged"""
+    manifest_path = os.path.join(cache_dir, IMAGE_MANIFEST) if cache_dir else None
+    cached = {}
+    if manifest_path:
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            cached = {}
+    
+    digests = {}
+    entries = {}
+    for path in paths:
+        stat = os.stat(path)
+        entry = cached.get(path)
+        if not entry or entry['size'] != stat.st_size or entry['mtimeNs'] != stat.st_mtime_ns:
+            entry = {'size': stat.st_size, 'mtimeNs': stat.st_mtime_ns, 'hash': hash_file(path)}
+        entries[path] = entry
+        digests[path] = entry['hash']
+    
+    if manifest_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_path = manifest_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f)
+        os.replace(temp_path, manifest_path)
+    
+    return digests
+
+def asset_names(digest, source_path):
+    """Return (original file name, {width: thumbnail file name}) for a digest
+    
+    PNG sources keep PNG thumbnails so transparency survives; everything else
+    is thumbnailed as JPEG.
+    """
+    extension = os.path.splitext(source_path)[1].lower()
+    thumbnail_extension = '.png' if extension == '.png' else '.jpg'
+    return (f"{digest}{extension}",
+            {width: f"{digest}-{width}{thumbnail_extension}" for width in THUMBNAIL_WIDTHS})
+
+def write_image_assets(job):
+    """Store one source image and its thumbnails in an asset directory (pool worker)
+    
+    Returns (digest, {width: file name}, error).
+    """
+    source_path, digest, asset_dir = job
+    original, thumbnails = asset_names(digest, source_path)
+    try:
+        missing = {width: name for width, name in thumbnails.items()
+                   if not os.path.exists(os.path.join(asset_dir, name))}
+        if missing:
+            with Image.open(source_path) as image:
+                image.load()
+                as_png = original.endswith('.png')
+                if not as_png and image.mode != 'RGB':
+                    image = image.convert('RGB')
+                for width, name in missing.items():
+                    thumbnail = image.copy()
+                    thumbnail.thumbnail((width, width))
+                    # Write under a temporary name so a crash never leaves a truncated asset
+                    temp_path = os.path.join(asset_dir, f".{name}.tmp")
+                    thumbnail.save(temp_path, format='PNG' if as_png else 'JPEG', optimize=True)
+                    os.replace(temp_path, os.path.join(asset_dir, name))
+        
+        # Only keep the full-size original once the file has proven to be a readable image
+        original_path = os.path.join(asset_dir, original)
+        if not os.path.exists(original_path):
+            shutil.copyfile(source_path, original_path)
+    except Exception as e:
+        return digest, None, e
+    
+    return digest, thumbnails, None
+
+def build_image_assets(unique_instruments, image_dir, asset_dir, base_url=None,
+                       cache_dir=None, workers=1, output_dir=None):
+    """Resolve reference images, generate missing thumbnails and point instruments at them
+    
+    ``base_url`` prefixes asset file names in the written URLs and defaults to
+    ``asset_dir``. Assets are written to ``output_dir`` when given (a staging
+    directory published at ``asset_dir``), with the ones already in
+    ``asset_dir`` linked in. Returns {'resolved', 'images', 'generated',
+    'failed'} counts.
+    """
+    if Image is None:
+        raise ImportError("Reference image thumbnails require Pillow (pip install pillow)")
+    
+    image_index = index_image_directory(image_dir)
+    references = {}
+    for instrument in unique_instruments:
+        paths = resolve_references(instrument.referenceImages, image_index)
+        if paths:
+            references[id(instrument)] = paths[0]
+    
+    sources = sorted(set(references.values()))
+    digests = hash_images(sources, cache_dir)
+    output_dir = output_dir or asset_dir
+    os.makedirs(output_dir, exist_ok=True)
+    
+    # One job per distinct image content, skipping images whose assets all exist
+    jobs = {}
+    thumbnails_by_digest = {}
+    for path in sources:
+        digest = digests[path]
+        original, thumbnails = asset_names(digest, path)
+        if output_dir != asset_dir:
+            for name in (original, *thumbnails.values()):
+                if not os.path.exists(os.path.join(output_dir, name)):
+                    link_file(os.path.join(asset_dir, name), os.path.join(output_dir, name))
+        if all(os.path.exists(os.path.join(output_dir, name)) for name in thumbnails.values()):
+            thumbnails_by_digest[digest] = thumbnails
+        else:
+            jobs.setdefault(digest, (path, digest, output_dir))
+    
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    if workers > 1 and len(jobs) > 1:
+        with multiprocessing.Pool(min(workers, len(jobs))) as pool:
+            results = pool.map(write_image_assets, jobs.values())
+    else:
+        results = [write_image_assets(job) for job in jobs.values()]
+    
+    failed = 0
+    for digest, thumbnails, error in results:
+        if error is not None:
+            print(f"  -> Error processing image {jobs[digest][0]}: {str(error)}")
+            failed += 1
+            continue
+        thumbnails_by_digest[digest] = thumbnails
+    
+    prefix = (base_url if base_url is not None else asset_dir.replace(os.sep, '/')).rstrip('/')
+    resolved = 0
+    for instrument in unique_instruments:
+        path = references.get(id(instrument))
+        thumbnails = thumbnails_by_digest.get(digests[path]) if path else None
+        if thumbnails:
+            instrument.thumbnails = {width: f"{prefix}/{name}" for width, name in thumbnails.items()}
+            resolved += 1
+    
+    return {
+        'resolved': resolved,
+        'images': len(thumbnails_by_digest),
+        'generated': len(jobs) - failed,
+        'failed': failed
+    }
@@ -0,0 +1,269 @@
+"""
+CSV layout strategies for the parsing engine
+
+Three layouts are supported out of the box:
+
+- ``old``: one instrument per row, NAME..REFERENCE IMAGES columns
+- ``new``: the old columns prefixed with SPECIALITY and SET DISCRIPTION
+- ``multiline``: vendor exports where records are packed onto shared lines and
+  separated by runs of nine or more commas instead of newlines
+
+Additional layouts can be plugged in with ``register_layout``. The layout is
+detected once per file from a sample of its first bytes.
+"""
+
+import io
+import csv
+import re
+import mmap
+from itertools import chain
+
+from .records import Instrument
+from .text import clean_fields
+
+# Runs of nine or more commas separate records in the multi-line layout
+RECORD_SEPARATOR = re.compile(r',{9,}')
+RECORD_SEPARATOR_BYTES = re.compile(rb',{9,}')
+
+# Mapped pages already parsed are handed back to the kernel every this many bytes
+RELEASE_INTERVAL = 16 * 1024 * 1024
+
+def detect_structure_from_header(header_fields):
+    """Detect which CSV structure a parsed header row belongs to"""
+    header = ','.join(field or '' for field in header_fields)
+    
+    # Check for new structure with SPECIALITY and SET DISCRIPTION
+    if 'SPECIALITY' in header and 'SET DISCRIPTION' in header:
+        return 'new'
+    else:
+        return 'old'
+
+# CSV columns in Instrument's positional field order; note the space in 'DISCRIPTION '
+OLD_COLUMNS = ('NAME', 'CATEGORY', 'BRIEF', 'DISCRIPTION ', 'TYPE', 'USAGE',
+               'IMPORTANT CONSIDERATIONS', 'CLEANING & STERILIZATION',
+               'INSPECTION & MAINTENANCE', 'REFERENCE IMAGES')
+NEW_COLUMNS = OLD_COLUMNS + ('SPECIALITY', 'SET DISCRIPTION')
+
+def build_instrument_record(row, structure, source_file, row_num):
+    """Build a normalized instrument record from a header-keyed row"""
+    if structure == 'new':
+        values = clean_fields(map(row.get, NEW_COLUMNS))
+    else:
+        values = clean_fields(map(row.get, OLD_COLUMNS))
+        # Speciality and set description are not available in old structure
+        values += ('', '')
+    
+    return Instrument(*values, sourceFile=source_file, rowNumber=row_num)
+
+class CsvLayout:
+    """Base class for a CSV layout strategy
+    
+    Subclasses set ``name``, implement ``matches`` to claim a file from its
+    sampled header and rows, and implement ``iter_records`` to yield
+    normalized instrument records from an open text stream positioned at the
+    start of the file.
+    """
+    
+    name = None
+    
+    def matches(self, header, sample_rows):
+        raise NotImplementedError
+    
+    def structure(self, header):
+        """Return the 'old'/'new' structure reported for files in this layout"""
+        return detect_structure_from_header(header)
+    
+    def iter_records(self, text, source_file):
+        raise NotImplementedError
+
+class RowPerInstrumentLayout(CsvLayout):
+    """Regular CSV with a header row and one instrument per row"""
+    
+    def iter_records(self, text, source_file):
+        reader = csv.DictReader(text)
+        structure = self.structure(reader.fieldnames or [])
+        
+        for row_num, row in enumerate(reader, start=2):  # Start at 2 because header is row 1
+            # Skip empty rows
+            if not any(value.strip() for value in row.values()):
+                continue
+            
+            instrument = build_instrument_record(row, structure, source_file, row_num)
+            
+            # Only yield instruments with names
+            if instrument.name:
+                yield instrument
+
+class OldLayout(RowPerInstrumentLayout):
+    """NAME, CATEGORY, BRIEF, ... REFERENCE IMAGES"""
+    
+    name = 'old'
+    
+    def matches(self, header, sample_rows):
+        return True
+    
+    def structure(self, header):
+        return 'old'
+
+class NewLayout(RowPerInstrumentLayout):
+    """SPECIALITY, SET DISCRIPTION, then the old columns"""
+    
+    name = 'new'
+    
+    def matches(self, header, sample_rows):
+        return detect_structure_from_header(header) == 'new'
+    
+    def structure(self, header):
+        return 'new'
+
+class MultilineLayout(CsvLayout):
+    """Records packed onto shared lines and separated by runs of commas
+    
+    Files are read through a read-only mmap: separator runs are found by
+    scanning the mapped bytes and only each record's own slice is copied and
+    decoded, so even very large exports never exist as a whole Python string.
+    Streams that are not backed by a mappable file are read into memory.
+    """
+    
+    name = 'multiline'
+    use_mmap = True
+    
+    def matches(self, header, sample_rows):
+        # A regular CSV never has more fields in a row than in its header
+        return any(len(row) > len(header) for row in sample_rows)
+    
+    def iter_records(self, text, source_file):
+        mapped = map_stream(text) if self.use_mmap else None
+        if mapped is None:
+            header = next(csv.reader([text.readline()]), [])
+            yield from self._build_records(header, iter_separated_entries(text.read()), source_file)
+            return
+        
+        with mapped:
+            header_end = first_line_end(mapped)
+            header = next(csv.reader([mapped[:header_end].decode('utf-8')]), [])
+            yield from self._build_records(header, iter_mapped_entries(mapped, header_end), source_file)
+    
+    def _build_records(self, header, entries, source_file):
+        structure = self.structure(header)
+        
+        for line_offset, entry in entries:
+            # Quoted fields may span lines, so parse the entry as its own CSV
+            fields = next(csv.reader(io.StringIO(entry), skipinitialspace=True), [])
+            instrument = build_instrument_record(dict(zip(header, fields)), structure,
+                                                 source_file, line_offset + 2)
+            if instrument.name:
+                yield instrument
+
+def map_stream(stream):
+    """Return a read-only mmap of the file behind a stream, or None if it cannot be mapped"""
+    try:
+        mapped = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        # In-memory streams have no file descriptor and empty files cannot be mapped
+        return None
+    
+    if hasattr(mapped, 'madvise'):
+        mapped.madvise(mmap.MADV_SEQUENTIAL)
+    return mapped
+
+def first_line_end(buffer):
+    """Return the offset just past the first line, which ends at \\n, \\r or \\r\\n
+    
+    Matches where ``readline()`` stops on a text stream opened with newline=''.
+    """
+    newline = buffer.find(b'\n')
+    carriage_return = buffer.find(b'\r', 0, newline if newline != -1 else len(buffer))
+    if carriage_return != -1:
+        if buffer[carriage_return + 1:carriage_return + 2] == b'\n':
+            return carriage_return + 2
+        return carriage_return + 1
+    return newline + 1 if newline != -1 else len(buffer)
+
+def iter_separated_entries(content):
+    """Yield (line offset, stripped entry) for each record between separator runs"""
+    start = 0
+    line_offset = 0
+    ends = [match.span() for match in RECORD_SEPARATOR.finditer(content)]
+    ends.append((len(content), len(content)))
+    
+    for end, next_start in ends:
+        entry = content[start:end]
+        stripped = entry.strip()
+        if stripped:
+            leading = len(entry) - len(entry.lstrip())
+            yield line_offset + entry.count('\n', 0, leading), stripped
+        line_offset += content.count('\n', start, next_start)
+        start = next_start
+
+def iter_mapped_entries(buffer, start=0):
+    """Yield (line offset, stripped entry) like iter_separated_entries over a bytes-like buffer
+    
+    The separator regex runs over the buffer in place. A comma byte never
+    occurs inside a multi-byte UTF-8 sequence, so splitting before decoding
+    is safe. Pages of an mmap that have been parsed are released as the scan
+    moves on, so resident memory stays flat however large the file is.
+    """
+    line_offset = 0
+    released = 0
+    release = hasattr(buffer, 'madvise') and hasattr(mmap, 'MADV_DONTNEED')
+    ends = chain((match.span() for match in RECORD_SEPARATOR_BYTES.finditer(buffer, start)),
+                 [(len(buffer), len(buffer))])
+    
+    for end, next_start in ends:
+        raw = buffer[start:end]
+        entry = raw.decode('utf-8')
+        stripped = entry.strip()
+        if stripped:
+            leading = len(entry) - len(entry.lstrip())
+            yield line_offset + entry.count('\n', 0, leading), stripped
+        # Separator runs are all commas, so only the entry itself holds newlines
+        line_offset += raw.count(b'\n')
+        start = next_start
+        
+        if release and start - released >= RELEASE_INTERVAL:
+            boundary = start - start % mmap.PAGESIZE
+            buffer.madvise(mmap.MADV_DONTNEED, released, boundary - released)
+            released = boundary
+
+# Checked in order; the first layout whose ``matches`` returns True wins
+_LAYOUTS = [MultilineLayout(), NewLayout(), OldLayout()]
+
+def register_layout(layout, first=True):
+    """Register an additional layout strategy, checked before the built-ins by default"""
+    if first:
+        _LAYOUTS.insert(0, layout)
+    else:
+        _LAYOUTS.insert(len(_LAYOUTS) - 1, layout)  # Always keep the old-layout fallback last
+
+def get_layout(name):
+    """Return the registered layout strategy with the given name"""
+    for layout in _LAYOUTS:
+        if layout.name == name:
+            return layout
+    raise KeyError(f"Unknown CSV layout: {name}")
+
+def sample_rows(sample, complete=False):
+    """Parse a text sample into CSV rows, dropping a possibly truncated last line"""
+    lines = sample.splitlines(keepends=True)
+    if not complete and len(lines) > 1:
+        lines = lines[:-1]
+    
+    rows = []
+    try:
+        for row in csv.reader(lines):
+            rows.append(row)
+    except csv.Error:
+        pass  # A quoted field cut off by the end of the sample
+    return rows
+
+def detect_layout(sample, complete=False):
+    """Pick the layout strategy for a file from a sample of its first bytes"""
+    rows = sample_rows(sample, complete)
+    header = rows[0] if rows else []
+    
+    for layout in _LAYOUTS:
+        if layout.matches(header, rows[1:]):
+            return layout, header
+    
+    return get_layout('old'), header
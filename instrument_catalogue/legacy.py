@@ -0,0 +1,123 @@
+"""
+Legacy set-embedded output used by the fix_parsing* scripts
+Each set carries its own instrument list alongside the global unique list
+"""
+
+import os
+import json
+
+from .dedup import InstrumentIndex, normalize_name
+from .normalized import (build_size_report, normalize_catalogue, print_size_report,
+                         write_normalized_catalogue)
+from .parsing import extract_set_name_from_filename, list_csv_files, stream_csv_file
+from .binary_snapshot import binary_snapshot_path
+from .output import snapshot_path, write_snapshot
+from .publish import StagedPublish, print_publish_summary
+
+def placeholder_image_url(name):
+    """Return the placeholder image URL used for instruments without artwork"""
+    text = name.replace(" ", "+").replace("/", "%2F").replace("'", "%27")
+    return f'https://via.placeholder.com/300x200/4A90E2/FFFFFF?text={text}'
+
+def build_legacy_instrument(record):
+    """Convert a parsed record into the legacy fix_parsing instrument shape"""
+    return {
+        'name': record.name,
+        'category': record.category or 'General',
+        'brief': record.brief or 'Surgical instrument',
+        'description': record.description,
+        'type': record.type,
+        'usage': record.usage or 'General surgical use',
+        'importantConsiderations': record.importantConsiderations,
+        'cleaningSterilization': record.cleaningSterilization,
+        'inspectionMaintenance': record.inspectionMaintenance,
+        'referenceImages': record.referenceImages,
+        'features': [],
+        'material': 'Stainless Steel',
+        'size': 'Various',
+        'sterilization': 'Standard sterilization procedures',
+        'manufacturer': 'Various',
+        'image': placeholder_image_url(record.name)
+    }
+
+def parse_csv_file(filepath):
+    """Parse a CSV file and extract instruments in the legacy shape"""
+    instruments = []
+    
+    try:
+        _, records = stream_csv_file(filepath)
+        for record in records:
+            instruments.append(build_legacy_instrument(record))
+    except Exception as e:
+        print(f"Error reading file {filepath}: {e}")
+    
+    return instruments
+
+def build_legacy_catalogue(csv_dir):
+    """Parse every set CSV into legacy sets with embedded instruments plus unique instruments"""
+    all_sets = []
+    instrument_index = InstrumentIndex()
+    
+    for csv_file in list_csv_files(csv_dir):
+        filepath = os.path.join(csv_dir, csv_file)
+        set_name = extract_set_name_from_filename(csv_file)
+        
+        print(f"Processing {csv_file}...")
+        instruments = parse_csv_file(filepath)
+        
+        print(f"  Found {len(instruments)} instruments")
+        
+        # Add set information
+        set_data = {
+            'name': set_name,
+            'count': len(instruments),
+            'instruments': instruments,
+            'filename': csv_file
+        }
+        all_sets.append(set_data)
+        
+        # Add instruments to global index and track which sets they belong to
+        for instrument in instruments:
+            instrument_index.merge(instrument, set_name)
+    
+    return {
+        'sets': all_sets,
+        'instruments': instrument_index.instruments()
+    }
+
+def main():
+    """Parse instrument_csvs into the legacy completeInstrumentsData.js layout"""
+    complete_data = build_legacy_catalogue('instrument_csvs')
+    all_sets = complete_data['sets']
+    all_instruments = complete_data['instruments']
+    
+    publication = StagedPublish()
+    try:
+        # Write to JavaScript file
+        with open(publication.path('data/completeInstrumentsData.js'), 'w', encoding='utf-8') as f:
+            f.write('// Complete Surgical Instruments Data\n')
+            f.write('export const completeInstrumentsData = ')
+            f.write(json.dumps(complete_data, indent=2))
+            f.write(';\n')
+        write_snapshot(publication.path(snapshot_path('data/completeInstrumentsData.js')), complete_data)
+        # The binary snapshot of a comprehensive build would describe other data
+        publication.discard(binary_snapshot_path('data/completeInstrumentsData.js'))
+        
+        # Store each instrument once and compare with the set-embedded layout
+        normalized = normalize_catalogue(all_instruments, all_sets, key=normalize_name)
+        write_normalized_catalogue(normalized, publication.path('data/normalizedCatalogue.js'))
+        size_report = build_size_report([publication.path('data/completeInstrumentsData.js')],
+                                        publication.path('data/normalizedCatalogue.js'))
+        published = publication.commit()
+    finally:
+        publication.cleanup()
+    
+    print(f"\nTotal sets: {len(all_sets)}")
+    print(f"Total unique instruments: {len(all_instruments)}")
+    
+    # Print summary for each set
+    for set_data in all_sets:
+        print(f"{set_data['name']}: {set_data['count']} instruments")
+    
+    print_size_report(size_report)
+    print_publish_summary(published)
@@ -0,0 +1,126 @@
+"""
+Normalized catalogue output: every instrument stored once, referenced by id
+Sets hold id arrays plus per-set overrides instead of copies of their instruments
+"""
+
+import os
+import re
+import gzip
+
+from .output import write_js_export
+from .records import UNIQUE_DEFAULTS, record_dict
+
+# Fields every instrument shares unless a set overrides them
+NORMALIZED_DEFAULTS = dict(UNIQUE_DEFAULTS, features=[])
+
+def instrument_id(name):
+    """Return the stable id slug for an instrument name"""
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-') or 'instrument'
+
+def assign_ids(instruments):
+    """Return a stable id per instrument, suffixing -2, -3, ... on slug collisions"""
+    ids = []
+    seen = set()
+    for instrument in instruments:
+        base = candidate = instrument_id(instrument['name'])
+        suffix = 2
+        while candidate in seen:
+            candidate = f"{base}-{suffix}"
+            suffix += 1
+        seen.add(candidate)
+        ids.append(candidate)
+    return ids
+
+def normalize_catalogue(instruments, sets, metadata=None, key=None):
+    """Return the normalized {'defaults', 'instruments', 'sets', 'metadata'} layout
+    
+    ``instruments`` are the unique instruments; ``sets`` are set entries, either
+    overview entries (membership comes from each instrument's 'sets' list) or
+    legacy entries embedding their own 'instruments' copies. Embedded copies
+    are resolved to ids by name using ``key`` (exact names when None), and any
+    field where a copy differs from the stored instrument becomes a per-set
+    override, keyed by the copy's position in the set's ``instrumentIds`` (a
+    set can list the same instrument twice with different text).
+    """
+    instruments = [record_dict(instrument) for instrument in instruments]
+    ids = assign_ids(instruments)
+    make_key = key or (lambda name: name)
+    id_by_key = {make_key(instrument['name']): instrument_id
+                 for instrument_id, instrument in zip(ids, instruments)}
+    
+    stored = {}
+    members = {}
+    for instrument_id, instrument in zip(ids, instruments):
+        stored[instrument_id] = {field: value for field, value in instrument.items()
+                                 if field != 'sets' and NORMALIZED_DEFAULTS.get(field) != value}
+        for set_name in instrument.get('sets', []):
+            members.setdefault(set_name, []).append(instrument_id)
+    
+    normalized_sets = []
+    for set_entry in sets:
+        set_data = {field: value for field, value in set_entry.items() if field != 'instruments'}
+        if 'instruments' not in set_entry:
+            set_data['instrumentIds'] = members.get(set_entry['name'], [])
+            normalized_sets.append(set_data)
+            continue
+        
+        instrument_ids = []
+        overrides = {}
+        for position, copy in enumerate(map(record_dict, set_entry['instruments'])):
+            instrument_id = id_by_key[make_key(copy['name'])]
+            instrument_ids.append(instrument_id)
+            base = dict(NORMALIZED_DEFAULTS, **stored[instrument_id])
+            changed = {field: value for field, value in copy.items()
+                       if field != 'sets' and base.get(field) != value}
+            if changed:
+                overrides[str(position)] = changed
+        
+        set_data['instrumentIds'] = instrument_ids
+        if overrides:
+            set_data['overrides'] = overrides
+        normalized_sets.append(set_data)
+    
+    return {
+        'version': 1,
+        'defaults': NORMALIZED_DEFAULTS,
+        'instruments': stored,
+        'sets': normalized_sets,
+        'metadata': metadata or {}
+    }
+
+def write_normalized_catalogue(normalized, path, pretty=True):
+    """Write the normalized catalogue as an ES module, formatted like the other data files"""
+    write_js_export(path, 'Normalized Surgical Instruments Catalogue', 'normalizedCatalogue',
+                    normalized, pretty)
+
+def file_sizes(path):
+    """Return {'bytes', 'gzipBytes'} for one output file"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return {'bytes': len(data), 'gzipBytes': len(gzip.compress(data))}
+
+def build_size_report(current_paths, normalized_path):
+    """Compare the files of the current layout against the normalized file"""
+    current = {os.path.basename(path): file_sizes(path) for path in current_paths}
+    normalized = file_sizes(normalized_path)
+    current_bytes = sum(sizes['bytes'] for sizes in current.values())
+    current_gzip = sum(sizes['gzipBytes'] for sizes in current.values())
+    return {
+        'current': current,
+        'normalized': {os.path.basename(normalized_path): normalized},
+        'currentBytes': current_bytes,
+        'normalizedBytes': normalized['bytes'],
+        'ratio': round(normalized['bytes'] / current_bytes, 3) if current_bytes else None,
+        'gzipRatio': round(normalized['gzipBytes'] / current_gzip, 3) if current_gzip else None
+    }
+
+def print_size_report(report):
+    """Print the size comparison"""
+    print("\nOutput size report:")
+    for name, sizes in report['current'].items():
+        print(f"- {name}: {sizes['bytes'] / 1024:.1f} KB ({sizes['gzipBytes'] / 1024:.1f} KB gzipped)")
+    for name, sizes in report['normalized'].items():
+        print(f"- {name}: {sizes['bytes'] / 1024:.1f} KB ({sizes['gzipBytes'] / 1024:.1f} KB gzipped)")
+    if report['ratio'] is not None:
+        print(f"- Normalized layout is {report['ratio']:.0%} of the current size "
+              f"({report['gzipRatio']:.0%} gzipped)")
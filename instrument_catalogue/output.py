@@ -0,0 +1,134 @@
+"""
+Streaming JSON / ES module writer for the data files
+
+``json.dumps`` of the whole catalogue builds the complete output string
+before a byte is written, so the largest file briefly exists twice in
+memory. ``dump_json`` instead walks the outer containers itself and encodes
+one record at a time, writing each piece through a bounded file buffer; only
+one record's text is held at once. Pretty output is byte-for-byte what
+``json.dumps(value, indent=2)`` produces, and compact output drops all
+whitespace for production builds.
+
+Data files can also get a compact JSON sidecar (``*.snapshot.json``) so
+Python tools read the data with ``json.load`` instead of picking the JSON
+back out of the generated JavaScript.
+"""
+
+import os
+import json
+
+from .records import Record, serialize_record
+
+PRETTY_INDENT = 2
+COMPACT_SEPARATORS = (',', ':')
+
+# Bytes buffered before each write to the output file
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# Written next to data/name.js; the different stem keeps Metro's extension-less imports unambiguous
+SNAPSHOT_SUFFIX = '.snapshot.json'
+
+# Containers this many levels deep are encoded in one piece; above it they are streamed
+STREAM_DEPTH = 2
+
+def _encoder(pretty, ensure_ascii):
+    if pretty:
+        return json.JSONEncoder(indent=PRETTY_INDENT, ensure_ascii=ensure_ascii, default=serialize_record)
+    # Without indentation the C encoder handles each record
+    return json.JSONEncoder(separators=COMPACT_SEPARATORS, ensure_ascii=ensure_ascii,
+                            default=serialize_record)
+
+def iter_json_chunks(value, pretty=True, ensure_ascii=False, stream_depth=STREAM_DEPTH, memo=None):
+    """Yield the JSON text of ``value`` in pieces of at most one record each
+    
+    With a ``RecordMemo`` the text of each record or dict is reused when the
+    same object is written again at the same depth.
+    """
+    encoder = _encoder(pretty, ensure_ascii)
+    encode_key = json.JSONEncoder(ensure_ascii=ensure_ascii).encode
+    item_separator, key_separator = (',', ': ') if pretty else COMPACT_SEPARATORS
+    
+    def encode(value, level):
+        text = encoder.encode(value)
+        # Raw newlines only come from indentation, so nesting is a re-indent
+        return text.replace('\n', '\n' + ' ' * (PRETTY_INDENT * level)) if pretty and level else text
+    
+    def chunks(value, level):
+        if memo is not None and level and isinstance(value, (Record, dict)):
+            # Remembered whole, even above stream_depth; the text is the same either way
+            yield memo.get(value, ('json', pretty, ensure_ascii, level), lambda: encode(value, level))
+            return
+        
+        streamed = level < stream_depth and not isinstance(value, Record)
+        if streamed and isinstance(value, dict) and value:
+            items = value.items()
+            opening, closing = '{', '}'
+        elif streamed and isinstance(value, (list, tuple)) and value:
+            items = value
+            opening, closing = '[', ']'
+        else:
+            yield encode(value, level)
+            return
+        
+        if pretty:
+            newline = '\n' + ' ' * (PRETTY_INDENT * (level + 1))
+            separator = item_separator + newline
+        else:
+            newline = ''
+            separator = item_separator
+        
+        yield opening + newline
+        for index, item in enumerate(items):
+            if index:
+                yield separator
+            if closing == '}':
+                key, item = item
+                yield encode_key(key if isinstance(key, str) else str(key)) + key_separator
+            yield from chunks(item, level + 1)
+        yield ('\n' + ' ' * (PRETTY_INDENT * level) if pretty else '') + closing
+    
+    return chunks(value, 0)
+
+def dump_json(value, file, pretty=True, ensure_ascii=False, memo=None):
+    """Write ``value`` as JSON to an open text file, one record at a time"""
+    for chunk in iter_json_chunks(value, pretty, ensure_ascii, memo=memo):
+        file.write(chunk)
+
+def write_js_export(path, comment, name, value, pretty=True, memo=None):
+    """Write ``value`` as an ES module: a comment line then ``export const name = ...;``"""
+    with open(path, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+        f.write(f'// {comment}\n')
+        f.write(f'export const {name} = ')
+        dump_json(value, f, pretty, memo=memo)
+        f.write(';\n')
+
+def snapshot_path(js_path):
+    """Return the JSON sidecar path of an ES module data file"""
+    return os.path.splitext(js_path)[0] + SNAPSHOT_SUFFIX
+
+def write_snapshot(path, value, memo=None):
+    """Write ``value`` as compact JSON for tools that read the data back"""
+    with open(path, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+        dump_json(value, f, pretty=False, memo=memo)
+
+def read_js_export(path, name):
+    """Return the value a data file exports as ``name``, or None if it has no such export
+    
+    The JSON sidecar is read when it is at least as new as the module;
+    otherwise the JSON is decoded in place after the export statement.
+    """
+    sidecar = snapshot_path(path)
+    try:
+        if os.path.getmtime(sidecar) >= os.path.getmtime(path):
+            with open(sidecar, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    except OSError:
+        pass
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    start = content.find(f'export const {name} = ')
+    if start == -1:
+        return None
+    value, _ = json.JSONDecoder().raw_decode(content, start + len(f'export const {name} = '))
+    return value
@@ -0,0 +1,122 @@
+"""
+Single-pass CSV parsing engine
+Detects each file's layout once from a buffered sample and streams its records
+"""
+
+import io
+import os
+
+from .layouts import detect_layout, get_layout
+
+# Bytes peeked from the start of each file to detect its layout
+SAMPLE_SIZE = 64 * 1024
+
+def extract_set_name_from_filename(filename):
+    """Extract set name from CSV filename"""
+    # Remove "Instrument Description - " prefix and ".csv" suffix
+    name = filename.replace('Instrument Description - ', '').replace('.csv', '')
+    return name
+
+def list_csv_files(csv_directory):
+    """Return the CSV filenames in a directory in processing order"""
+    csv_files = [f for f in os.listdir(csv_directory) if f.endswith('.csv')]
+    csv_files.sort()  # Sort for consistent ordering
+    return csv_files
+
+def open_csv_file(file_path, layout=None):
+    """Open a CSV file once and detect its layout, returning (layout, header, text)
+    
+    The layout is detected from bytes peeked out of the read buffer, so the
+    returned text stream still starts at the beginning of the file and no
+    byte is read from disk twice.
+    """
+    raw = open(file_path, 'rb', buffering=SAMPLE_SIZE)
+    try:
+        sample_bytes = raw.peek(SAMPLE_SIZE)[:SAMPLE_SIZE]
+        complete = len(sample_bytes) < SAMPLE_SIZE
+        sample = sample_bytes.decode('utf-8', errors='ignore')
+        
+        detected, header = detect_layout(sample, complete)
+        if layout is not None:
+            detected = get_layout(layout)
+        
+        text = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+    except Exception:
+        raw.close()
+        raise
+    
+    return detected, header, text
+
+def _iter_and_close(records, text):
+    """Yield from a record iterator, closing its file when done"""
+    try:
+        yield from records
+    finally:
+        text.close()
+
+def stream_csv_file(file_path, layout=None):
+    """Open a CSV file once and return its structure plus a lazy instrument iterator
+    
+    The returned generator owns the file handle and closes it when it is
+    exhausted or garbage collected. ``layout`` forces a registered layout
+    strategy instead of auto-detecting one.
+    """
+    detected, header, text = open_csv_file(file_path, layout)
+    records = detected.iter_records(text, os.path.basename(file_path))
+    return detected.structure(header), _iter_and_close(records, text)
+
+def detect_csv_structure(file_path):
+    """Detect which CSV structure is being used"""
+    detected, header, text = open_csv_file(file_path)
+    text.close()
+    return detected.structure(header)
+
+def parse_csv_file(file_path, set_name=None):
+    """Parse a single CSV file and return instruments data"""
+    structure, records = stream_csv_file(file_path)
+    instruments = list(records)
+    
+    return instruments, structure
+
+def parse_file_fully(file_path):
+    """Fully parse one CSV, returning picklable (structure, instruments, open_error, row_error)
+    
+    Used by worker processes and the build cache, which need a file's records
+    materialized rather than streamed.
+    """
+    try:
+        structure, records = stream_csv_file(file_path)
+    except Exception as e:
+        return None, [], e, None
+    
+    instruments = []
+    try:
+        for instrument in records:
+            instruments.append(instrument)
+    except Exception as e:
+        return structure, instruments, None, e
+    
+    return structure, instruments, None, None
+
+def replay_records(instruments, error):
+    """Yield already-parsed records, then re-raise the error parsing stopped on"""
+    yield from instruments
+    if error is not None:
+        raise error
+
+def stream_csv_files(file_paths):
+    """Open each CSV in turn, yielding (structure, records, open_error)"""
+    for file_path in file_paths:
+        try:
+            structure, records = stream_csv_file(file_path)
+        except Exception as e:
+            yield None, None, e
+            continue
+        yield structure, records, None
+
+def parse_csv_files(pool, file_paths):
+    """Parse CSVs across a process pool, yielding (structure, records, open_error) in input order"""
+    # imap returns results in submission order, so the merge downstream
+    # sees files in exactly the same order as a serial run
+    for structure, instruments, open_error, row_error in pool.imap(parse_file_fully, file_paths):
+        yield structure, replay_records(instruments, row_error), open_error
@@ -0,0 +1,182 @@
+"""
+Per-stage timing for the catalogue build
+
+A ``StageProfiler`` accumulates wall time, CPU time, item counts and peak
+traced allocations per named stage. The build streams rows through parsing
+and dedup in one pass, so stages interleave: each stage is timed in many
+short sections (one per file or row) and the totals are summed. A disabled
+profiler, the default everywhere, reduces every section to a no-op.
+
+Peak allocations come from ``tracemalloc`` and are the highest traced
+Python memory seen while the stage was running, including data held by
+earlier stages. Python 3.8 cannot reset the traced peak, so there each
+stage reports the highest seen since tracing started. Tracing slows
+allocation-heavy stages down, so compare timings between profiled runs
+rather than against unprofiled ones.
+"""
+
+import time
+import tracemalloc
+
+# tracemalloc.reset_peak is new in Python 3.9
+_reset_peak = getattr(tracemalloc, 'reset_peak', None)
+
+class _Stage:
+    """Accumulated totals for one named stage"""
+    
+    __slots__ = ('name', 'first_started', 'wall', 'cpu', 'items', 'calls', 'peak')
+    
+    def __init__(self, name):
+        self.name = name
+        self.first_started = None
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.items = 0
+        self.calls = 0
+        self.peak = 0
+    
+    def to_dict(self):
+        return {
+            'stage': self.name,
+            'wallSeconds': round(self.wall, 6),
+            'cpuSeconds': round(self.cpu, 6),
+            'items': self.items,
+            'itemsPerSecond': round(self.items / self.wall) if self.wall else None,
+            'sections': self.calls,
+            'peakAllocatedKb': self.peak // 1024
+        }
+
+class _Section:
+    """Times one run of a stage; reusable, and cheap enough to enter once per row"""
+    
+    __slots__ = ('stage', 'tracing', 'items', 'wall', 'cpu')
+    
+    def __init__(self, stage, tracing):
+        self.stage = stage
+        self.tracing = tracing
+        self.items = 1
+    
+    def __enter__(self):
+        if self.tracing and _reset_peak is not None:
+            _reset_peak()
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        if self.stage.first_started is None:
+            self.stage.first_started = self.wall
+        return self
+    
+    def __exit__(self, *exc_info):
+        stage = self.stage
+        stage.wall += time.perf_counter() - self.wall
+        stage.cpu += time.process_time() - self.cpu
+        stage.items += self.items
+        stage.calls += 1
+        if self.tracing:
+            stage.peak = max(stage.peak, tracemalloc.get_traced_memory()[1])
+        return False
+
+class _NullSection:
+    __slots__ = ('items',)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_SECTION = _NullSection()
+
+class StageProfiler:
+    """Collects per-stage wall time, CPU time, throughput and peak allocations"""
+    
+    def __init__(self, enabled=True, trace_allocations=True):
+        self.enabled = enabled
+        self.trace_allocations = enabled and trace_allocations
+        self.stages = {}
+        self.started = None
+        self.finished = None
+    
+    def start(self):
+        """Begin the run; starts allocation tracing when requested"""
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.started = (time.perf_counter(), time.process_time())
+    
+    def stop(self):
+        """End the run and stop allocation tracing"""
+        self.finished = (time.perf_counter(), time.process_time())
+        if self.trace_allocations and tracemalloc.is_tracing():
+            tracemalloc.stop()
+    
+    def _stage(self, name):
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = _Stage(name)
+        return stage
+    
+    def section(self, name, items=1):
+        """Return a context manager timing one run of a stage over ``items`` items
+        
+        The returned object can be entered repeatedly, so hot loops create it
+        once and re-enter it per row. Its ``items`` may be updated before exit.
+        """
+        if not self.enabled:
+            return _NULL_SECTION
+        section = _Section(self._stage(name), self.trace_allocations)
+        section.items = items
+        return section
+    
+    def iterate(self, name, iterable):
+        """Yield from ``iterable``, charging the time spent producing each item to a stage"""
+        if not self.enabled:
+            return iterable
+        return self._iterate(self.section(name), iter(iterable))
+    
+    def _iterate(self, section, iterator):
+        while True:
+            with section:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    section.items = 0
+                    return
+            section.items = 1
+            yield item
+    
+    def report(self):
+        """Return the stages that ran, in the order they first started, plus a 'total' entry"""
+        stages = [stage.to_dict() for stage in self._started_stages()]
+        if self.started is not None:
+            (wall_start, cpu_start), (wall_end, cpu_end) = self.started, self.finished or (
+                time.perf_counter(), time.process_time())
+            stages.append({
+                'stage': 'total',
+                'wallSeconds': round(wall_end - wall_start, 6),
+                'cpuSeconds': round(cpu_end - cpu_start, 6)
+            })
+        return stages
+    
+    def _started_stages(self):
+        stages = [stage for stage in self.stages.values() if stage.first_started is not None]
+        return sorted(stages, key=lambda stage: stage.first_started)
+    
+    def folded_stacks(self, root='build'):
+        """Return stage times as collapsed stacks ("root;stage microseconds" per line)
+        
+        This is the input format of flamegraph.pl and speedscope.
+        """
+        return ''.join(f"{root};{stage.name.replace(';', ',')} {round(stage.wall * 1e6)}\n"
+                       for stage in self._started_stages())
+
+def print_profile(stages):
+    """Print a profiler report as a table"""
+    print(f"\n{'stage':<40} {'wall s':>9} {'cpu s':>9} {'items':>9} {'items/s':>10} {'peak MB':>9}")
+    for stage in stages:
+        if stage['stage'] == 'total':
+            print(f"{'total':<40} {stage['wallSeconds']:>9.3f} {stage['cpuSeconds']:>9.3f}")
+            continue
+        rate = stage['itemsPerSecond'] if stage['itemsPerSecond'] is not None else '-'
+        print(f"{stage['stage']:<40} {stage['wallSeconds']:>9.3f} {stage['cpuSeconds']:>9.3f} "
+              f"{stage['items']:>9} {rate:>10} {stage['peakAllocatedKb'] / 1024:>9.1f}")
+
+NULL_PROFILER = StageProfiler(enabled=False)
@@ -0,0 +1,214 @@
+"""
+Staged publishing of build outputs
+
+Every artifact of a build is first written to a staging directory next to
+the outputs, never to its final path. ``commit`` then hashes the staged
+files and, holding a lock so concurrent builds cannot interleave, renames
+only the artifacts whose content changed over the published ones. Each
+rename is atomic, so the dev server never reads a half-written file, and
+all renames happen back to back after every artifact is complete, so it
+sees at most a sub-millisecond window between builds instead of the whole
+build. Published outputs stay regular files, and unchanged ones keep their
+mtime and do not trigger a rebundle.
+
+Artifacts a build did not write are left in place and keep their manifest
+entries, so partial builds keep the manifest complete; a build that drops
+an optional output calls ``discard`` for it. The manifest, with the
+generation number, each artifact's SHA-256 and the directories published
+as a whole, is written last and only when something changed.
+"""
+
+import os
+import json
+import shutil
+import tempfile
+
+from .cache import hash_file
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; builds are then not serialized
+    fcntl = None
+
+PUBLISH_MANIFEST = 'data/publishManifest.json'
+STAGING_PREFIX = '.staging-'
+LOCK_FILE = '.publish.lock'
+
+def load_publish_manifest(path):
+    """Load the manifest of the published generation, or an empty one"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'generation': 0, 'artifacts': {}, 'directories': []}
+
+def link_file(source, destination):
+    """Hard-link ``source`` at ``destination``, copying where links are not supported
+    
+    Returns False, creating nothing, when ``source`` does not exist.
+    """
+    if not os.path.isfile(source):
+        return False
+    os.makedirs(os.path.dirname(destination) or '.', exist_ok=True)
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+    return True
+
+def _sync(path):
+    """Flush a staged file to disk so a crash after the rename cannot leave it empty"""
+    with open(path, 'rb+') as f:
+        os.fsync(f.fileno())
+
+def _within(relative, directories):
+    """Return True if ``relative`` is one of ``directories`` or lies inside one"""
+    return any(relative == directory or relative.startswith(directory + '/') for directory in directories)
+
+class StagedPublish:
+    """Collects a build's artifacts in a staging directory and publishes them together
+    
+    Write each artifact to ``path(relative)`` (or into ``directory(relative)``
+    for a directory the build owns entirely), call ``discard(relative)`` for
+    earlier outputs the build no longer produces, then call ``commit``. Call
+    ``cleanup`` in a ``finally`` so a failed build leaves the published files
+    untouched and no staging directory behind.
+    """
+    
+    def __init__(self, root='.', manifest=PUBLISH_MANIFEST):
+        self.root = root
+        self.manifest = manifest
+        # Staged on the same filesystem as the outputs so os.replace is a rename
+        self.staging = tempfile.mkdtemp(prefix=STAGING_PREFIX, dir=root)
+        self.files = []
+        self.directories = []
+        self.discarded = []
+    
+    def _staged(self, relative):
+        return os.path.join(self.staging, relative)
+    
+    def _published(self, relative):
+        return os.path.join(self.root, relative)
+    
+    def path(self, relative):
+        """Return the staging path to write the artifact published at ``relative``"""
+        staged = self._staged(relative)
+        os.makedirs(os.path.dirname(staged), exist_ok=True)
+        if relative not in self.files:
+            self.files.append(relative)
+        return staged
+    
+    def directory(self, relative):
+        """Return a staging directory published as a whole at ``relative``
+        
+        Files in the published directory that the build did not write are removed.
+        """
+        staged = self._staged(relative)
+        os.makedirs(staged, exist_ok=True)
+        if relative not in self.directories:
+            self.directories.append(relative)
+        return staged
+    
+    def discard(self, relative):
+        """Remove the published artifact (or directory) at ``relative`` on commit"""
+        if relative not in self.discarded:
+            self.discarded.append(relative)
+    
+    def _artifacts(self):
+        """Return the relative paths of every staged file, in write order"""
+        artifacts = list(self.files)
+        for directory in self.directories:
+            for root, _, files in os.walk(self._staged(directory)):
+                for filename in sorted(files):
+                    relative = os.path.relpath(os.path.join(root, filename), self.staging)
+                    artifacts.append(relative.replace(os.sep, '/'))
+        return artifacts
+    
+    def _published_files(self, relative):
+        """Return the relative paths of the published files at or under ``relative``"""
+        published = self._published(relative)
+        if os.path.isfile(published):
+            return [relative]
+        found = []
+        for root, _, files in os.walk(published):
+            for filename in files:
+                found.append(os.path.relpath(os.path.join(root, filename), self.root).replace(os.sep, '/'))
+        return found
+    
+    def commit(self):
+        """Publish the changed artifacts and return {'generation', 'changed', 'unchanged', 'removed'}"""
+        artifacts = {relative: {'sha256': hash_file(self._staged(relative)),
+                                'bytes': os.path.getsize(self._staged(relative))}
+                     for relative in self._artifacts()}
+        
+        with open(os.path.join(self.root, LOCK_FILE), 'w') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            
+            manifest_path = self._published(self.manifest)
+            previous = load_publish_manifest(manifest_path)
+            changed = []
+            unchanged = []
+            for relative, entry in artifacts.items():
+                target = self._published(relative)
+                # Assets linked in from the published tree are the same file
+                if os.path.isfile(target) and (os.path.samefile(self._staged(relative), target) or
+                                               hash_file(target) == entry['sha256']):
+                    unchanged.append(relative)
+                else:
+                    changed.append(relative)
+            
+            removed = set()
+            for directory in self.directories:
+                removed.update(relative for relative in self._published_files(directory)
+                               if relative not in artifacts)
+            for relative in self.discarded:
+                removed.update(self._published_files(relative))
+            removed = sorted(removed)
+            
+            # Outputs this build neither wrote nor discarded stay published as they are
+            written = set(self.files) | set(self.directories) | set(self.discarded)
+            for relative, entry in previous.get('artifacts', {}).items():
+                if relative != self.manifest and not _within(relative, written) and \
+                        os.path.isfile(self._published(relative)):
+                    artifacts.setdefault(relative, entry)
+            kept = [directory for directory in previous.get('directories', []) if not _within(directory, written)]
+            directories = sorted(set(self.directories) | set(kept))
+            
+            # Everything is staged and compared before the first published file is touched
+            for relative in changed:
+                _sync(self._staged(relative))
+            for relative in changed:
+                target = self._published(relative)
+                os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+                os.replace(self._staged(relative), target)
+            for relative in removed:
+                os.remove(self._published(relative))
+            for relative in self.discarded:
+                if os.path.isdir(self._published(relative)):
+                    shutil.rmtree(self._published(relative))
+            
+            generation = previous.get('generation', 0)
+            if changed or removed or previous.get('artifacts') != artifacts or \
+                    previous.get('directories', []) != directories:
+                generation += 1
+                temp_path = manifest_path + '.tmp'
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'generation': generation, 'artifacts': artifacts, 'directories': directories},
+                              f, indent=2)
+                os.replace(temp_path, manifest_path)
+        
+        return {'generation': generation, 'changed': changed, 'unchanged': unchanged, 'removed': removed}
+    
+    def cleanup(self):
+        """Remove the staging directory"""
+        shutil.rmtree(self.staging, ignore_errors=True)
+
+def print_publish_summary(result):
+    """Print which artifacts a commit replaced"""
+    print(f"\nPublished generation {result['generation']}: {len(result['changed'])} changed, "
+          f"{len(result['unchanged'])} unchanged, {len(result['removed'])} removed")
+    for relative in result['changed']:
+        print(f"- updated {relative}")
+    for relative in result['removed']:
+        print(f"- removed {relative}")
@@ -0,0 +1,178 @@
+"""
+Compact instrument record types
+Parsed rows and merged unique instruments are __slots__ objects rather than dicts,
+and are only turned into the JSON shape the app expects when they are written out
+"""
+
+import sys
+
+# Text fields shared by parsed rows and unique instruments, in output order
+TEXT_FIELDS = ('name', 'category', 'brief', 'description', 'type', 'usage',
+               'importantConsiderations', 'cleaningSterilization',
+               'inspectionMaintenance', 'referenceImages')
+
+# Fields merged from later rows when the first row seen left them empty
+MERGEABLE_FIELDS = TEXT_FIELDS[1:]
+
+# Fields of a parsed row as written to the build cache
+ROW_FIELDS = TEXT_FIELDS + ('speciality', 'setDescription', 'sourceFile', 'rowNumber')
+
+# Low-cardinality fields whose values repeat across many rows and are interned
+INTERNED_FIELDS = ('category', 'type', 'speciality', 'setDescription')
+
+# Compatibility fields every unique instrument carries; stored once here
+# instead of being copied into each record
+UNIQUE_DEFAULTS = (
+    ('material', "Stainless Steel"),
+    ('size', "Various"),
+    ('sterilization', "Standard sterilization procedures"),
+    ('manufacturer', "Various"),
+)
+
+# Thumbnail widths generated for reference images; cards show the middle one
+THUMBNAIL_WIDTHS = (160, 320, 640)
+CARD_THUMBNAIL_WIDTH = 320
+
+def intern_value(value):
+    """Intern a short repeated string so equal values share one object"""
+    return sys.intern(value) if value else value
+
+class Record:
+    """Dict-style access over __slots__ so records can stand in for the old row dicts"""
+    
+    __slots__ = ()
+    
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+    
+    def __setitem__(self, key, value):
+        setattr(self, key, value)
+    
+    def __contains__(self, key):
+        return key in self.__slots__
+    
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+class Instrument(Record):
+    """A single instrument row parsed from a set CSV"""
+    
+    __slots__ = ROW_FIELDS + ('setName', 'sets')
+    
+    def __init__(self, name='', category='', brief='', description='', type='', usage='',
+                 importantConsiderations='', cleaningSterilization='', inspectionMaintenance='',
+                 referenceImages='', speciality='', setDescription='', sourceFile='',
+                 rowNumber=0, setName=None, sets=None):
+        self.name = name
+        self.category = intern_value(category)
+        self.brief = brief
+        self.description = description
+        self.type = intern_value(type)
+        self.usage = usage
+        self.importantConsiderations = importantConsiderations
+        self.cleaningSterilization = cleaningSterilization
+        self.inspectionMaintenance = inspectionMaintenance
+        self.referenceImages = referenceImages
+        self.speciality = intern_value(speciality)
+        self.setDescription = intern_value(setDescription)
+        self.sourceFile = sourceFile
+        self.rowNumber = rowNumber
+        self.setName = setName
+        self.sets = sets
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a record from the dict produced by ``to_dict``"""
+        return cls(**data)
+    
+    def to_dict(self):
+        """Return the record in the JSON shape of the original per-row dicts"""
+        data = {field: getattr(self, field) for field in ROW_FIELDS}
+        if self.sets is not None:
+            data['setName'] = self.setName
+            data['sets'] = self.sets
+        return data
+
+class UniqueInstrument(Record):
+    """An instrument merged across every set it appears in"""
+    
+    # Fields written to the data files, in output order
+    OUTPUT_FIELDS = TEXT_FIELDS + ('sourceFile', 'rowNumber', 'setName', 'sets',
+                                   'specialities', 'setDescriptions')
+    
+    # thumbnails maps thumbnail width to URL once reference images are resolved
+    __slots__ = OUTPUT_FIELDS + ('thumbnails',)
+    
+    @classmethod
+    def from_instrument(cls, instrument):
+        """Start a unique instrument from the first row seen with its name"""
+        unique_instrument = cls()
+        for field in TEXT_FIELDS:
+            setattr(unique_instrument, field, getattr(instrument, field))
+        unique_instrument.sourceFile = instrument.sourceFile
+        unique_instrument.rowNumber = instrument.rowNumber
+        unique_instrument.setName = instrument.setName
+        unique_instrument.sets = list(instrument.sets)
+        unique_instrument.specialities = [instrument.speciality] if instrument.speciality else []
+        unique_instrument.setDescriptions = [instrument.setDescription] if instrument.setDescription else []
+        unique_instrument.thumbnails = None
+        return unique_instrument
+    
+    @property
+    def image(self):
+        if self.thumbnails:
+            return self.thumbnails[CARD_THUMBNAIL_WIDTH]
+        return f"https://via.placeholder.com/300x200/4A90E2/FFFFFF?text={self.name.replace(' ', '+')}"
+    
+    def to_dict(self):
+        """Return the instrument in the JSON shape written to the data files"""
+        data = {field: getattr(self, field) for field in self.OUTPUT_FIELDS}
+        data['features'] = []
+        data.update(UNIQUE_DEFAULTS)
+        data['image'] = self.image
+        if self.thumbnails:
+            data['thumbnails'] = {str(width): url for width, url in self.thumbnails.items()}
+        return data
+
+def serialize_record(record):
+    """``default`` hook for json.dump(s) that serializes records on the fly"""
+    if isinstance(record, Record):
+        return record.to_dict()
+    raise TypeError(f"Object of type {type(record).__name__} is not JSON serializable")
+
+def record_dict(record):
+    """Return a record, or a dict read back from a data file, as a new dict"""
+    return record.to_dict() if isinstance(record, Record) else dict(record)
+
+class RecordMemo:
+    """Values derived from records, reused while the same objects are written again
+    
+    Entries are keyed by object identity, so this is only safe for records
+    (or dicts) that are replaced rather than mutated when their content
+    changes, as watch mode does. ``sweep`` after each build drops entries
+    the build did not use.
+    """
+    
+    def __init__(self):
+        self.current = {}
+        self.previous = {}
+    
+    def get(self, value, key, compute):
+        """Return ``compute()`` for ``value``, computed once per object and key"""
+        memo_key = (id(value), key)
+        entry = self.current.get(memo_key)
+        if entry is None:
+            entry = self.previous.pop(memo_key, None)
+            if entry is None:
+                # Holding the object keeps its id from being reused by another one
+                entry = (value, compute())
+            self.current[memo_key] = entry
+        return entry[1]
+    
+    def sweep(self):
+        """Forget everything not used since the previous sweep"""
+        self.previous = self.current
+        self.current = {}
@@ -0,0 +1,338 @@
+"""
+BM25 relevance ranking for catalogue search
+
+``SearchIndex`` answers "which instruments contain these words" with fixed
+per-field weights, so a common word such as "forceps" ranks hundreds of
+hits by little more than their position. ``RelevanceIndex`` scores them
+with BM25F: each field's term frequency is normalized by that field's
+length, scaled by the field's boost (``name`` counts most), summed, and
+saturated once per term, then weighted by the term's inverse document
+frequency. Tokens are stemmed so "clamps", "clamping" and "clamp" match.
+
+None of that depends on the query, so the score of every (term,
+instrument) pair is computed when the index is built. Each term's postings
+are kept in descending score order, which lets ``search`` stop early: the
+heap of the best ``limit`` results is only compared against the highest
+score any unseen instrument could still reach. That bound is loose when
+every query word is common (scores of a word in most instruments are
+nearly flat), so with NumPy installed those queries instead sum dense
+per-instrument score columns kept for common terms.
+
+``to_dict`` exports the same term statistics and scores for the client.
+"""
+
+import math
+import heapq
+from functools import lru_cache
+
+from .output import write_js_export
+from .search_index import (best_scores, field_text, flatten_postings, posting_pairs, rank_key,
+                           term_range, tokenize)
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency, only needed for dense scoring of common terms
+    np = None
+
+# Fields scored, and how much a normalized occurrence in each counts
+FIELD_BOOSTS = {
+    'name': 5.0,
+    'category': 2.0,
+    'brief': 1.5,
+    'description': 1.0,
+}
+
+# Term frequency saturation and field length normalization
+K1 = 1.2
+B = 0.75
+
+# Prefix expansions kept merged between queries; typing repeats them a lot
+PREFIX_CACHE_SIZE = 1024
+
+# Terms in at least this share of instruments also get a dense score column (with
+# NumPy), so queries made only of common words are summed as whole arrays
+DENSE_FRACTION = 1 / 16
+
+# Prefixes matching at most this many terms are merged lazily while ranking
+# top results instead of in full, which for common words means whole posting lists
+LAZY_PREFIX_TERMS = 64
+
+_VOWELS = frozenset('aeiou')
+
+@lru_cache(maxsize=65536)
+def stem(token):
+    """Strip common English inflections: plurals, -ed, -ing and a final -y
+    
+    A light suffix stripper rather than a full Porter stemmer; it only
+    needs to give index and query terms the same stem. Short and numeric
+    tokens are left alone.
+    """
+    if len(token) <= 3 or not token.isalpha():
+        return token
+    if token.endswith('sses'):
+        token = token[:-2]
+    elif token.endswith('ies'):
+        token = token[:-2]
+    elif token.endswith('s') and not token.endswith(('ss', 'us')):
+        token = token[:-1]
+    
+    for suffix in ('ing', 'ed'):
+        stripped = token[:-len(suffix)]
+        if token.endswith(suffix) and len(stripped) >= 3 and _VOWELS.intersection(stripped):
+            token = stripped
+            # Undouble a final consonant: "clamping" -> "clamp", "cutting" -> "cut"
+            if len(token) > 3 and token[-1] == token[-2] and token[-1] not in 'lsz':
+                token = token[:-1]
+            break
+    
+    if token.endswith('y') and len(token) > 3 and token[-2] not in _VOWELS:
+        token = token[:-1] + 'i'
+    return token
+
+def analyze(text):
+    """Return the stemmed tokens of a piece of text"""
+    return [stem(token) for token in tokenize(text)]
+
+class _PrefixUnion:
+    """The scores of several terms read as one mapping, keeping each instrument's best
+    
+    Iterating merges the terms' posting lists lazily in descending score
+    order, so a search that stops early never touches most of them.
+    """
+    
+    def __init__(self, postings):
+        self.postings = postings
+    
+    def items(self):
+        seen = set()
+        for instrument_id, score in heapq.merge(*(scores.items() for scores in self.postings), key=rank_key):
+            if instrument_id not in seen:
+                seen.add(instrument_id)
+                yield instrument_id, score
+    
+    def get(self, instrument_id):
+        best = None
+        for scores in self.postings:
+            score = scores.get(instrument_id)
+            if score is not None and (best is None or score > best):
+                best = score
+        return best
+
+class RelevanceIndex:
+    """Stemmed vocabulary with BM25F scores per instrument, highest first"""
+    
+    def __init__(self, terms, postings, size, average_lengths, document_frequencies=None):
+        self.terms = terms
+        # postings[i] is {instrument id: score} for terms[i], in descending score order
+        self.postings = postings
+        self.size = size
+        self.average_lengths = average_lengths
+        self.document_frequencies = document_frequencies or [len(scores) for scores in postings]
+        self._term_ids = {term: term_id for term_id, term in enumerate(terms)}
+        self._prefix_scores = lru_cache(maxsize=PREFIX_CACHE_SIZE)(self._merge_prefix)
+        self.dense_threshold = max(1, math.ceil(size * DENSE_FRACTION))
+        self._columns = {}
+        if np is not None:
+            for term_id, frequency in enumerate(self.document_frequencies):
+                if frequency >= self.dense_threshold:
+                    self._columns[term_id] = self._scatter(np.full(size, -np.inf), postings[term_id])
+    
+    @classmethod
+    def from_instruments(cls, instruments):
+        """Index instruments (records or dicts); ids are their list positions"""
+        instruments = list(instruments)
+        size = len(instruments)
+        
+        # Field lengths first: every field's normalization needs its average length
+        totals = dict.fromkeys(FIELD_BOOSTS, 0)
+        for instrument in instruments:
+            for field in FIELD_BOOSTS:
+                totals[field] += len(tokenize(field_text(instrument, field)))
+        average_lengths = {field: total / size if size else 0.0 for field, total in totals.items()}
+        
+        frequencies_by_term = {}
+        for instrument_id, instrument in enumerate(instruments):
+            frequencies = {}
+            for field, boost in FIELD_BOOSTS.items():
+                tokens = analyze(field_text(instrument, field))
+                if not tokens:
+                    continue
+                weight = boost / (1 - B + B * len(tokens) / average_lengths[field])
+                for token in tokens:
+                    frequencies[token] = frequencies.get(token, 0.0) + weight
+            for term, frequency in frequencies.items():
+                postings = frequencies_by_term.get(term)
+                if postings is None:
+                    postings = frequencies_by_term[term] = []
+                postings.append((instrument_id, frequency))
+        
+        terms = sorted(frequencies_by_term)
+        postings = []
+        for term in terms:
+            term_postings = frequencies_by_term[term]
+            idf = math.log(1 + (size - len(term_postings) + 0.5) / (len(term_postings) + 0.5))
+            scores = [(instrument_id, idf * frequency * (K1 + 1) / (K1 + frequency))
+                      for instrument_id, frequency in term_postings]
+            scores.sort(key=rank_key)
+            postings.append(dict(scores))
+        return cls(terms, postings, size, average_lengths)
+    
+    def to_dict(self, precision=4):
+        """Return the index for the client, scores rounded to ``precision`` places
+        
+        Postings are flattened as in ``SearchIndex.to_dict``, highest score first.
+        """
+        return {
+            'version': 1,
+            'size': self.size,
+            'k1': K1,
+            'b': B,
+            'fieldBoosts': FIELD_BOOSTS,
+            'averageFieldLengths': {field: round(length, precision)
+                                    for field, length in self.average_lengths.items()},
+            'terms': self.terms,
+            'documentFrequencies': self.document_frequencies,
+            'postings': [flatten_postings((instrument_id, round(score, precision))
+                                          for instrument_id, score in scores.items())
+                         for scores in self.postings]
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild an index from ``to_dict`` output"""
+        postings = [dict(posting_pairs(flat)) for flat in data['postings']]
+        return cls(data['terms'], postings, data['size'], data['averageFieldLengths'],
+                   data['documentFrequencies'])
+    
+    def _merge_prefix(self, prefix):
+        """Return {instrument id: best score of any term starting with prefix}, highest first"""
+        start, end = term_range(self.terms, prefix)
+        merged = best_scores(scores.items() for scores in self.postings[start:end])
+        return dict(sorted(merged.items(), key=rank_key))
+    
+    def _query_terms(self, query, prefix):
+        """Return, per distinct query token, the range of term ids it matches"""
+        terms = list(dict.fromkeys(analyze(query)))
+        ranges = []
+        for position, term in enumerate(terms):
+            if prefix and position == len(terms) - 1:
+                ranges.append(range(*term_range(self.terms, term)))
+            else:
+                term_id = self._term_ids.get(term)
+                ranges.append(range(0) if term_id is None else range(term_id, term_id + 1))
+        return terms, ranges
+    
+    def _token_scores(self, terms, ranges, lazy):
+        """Return one {instrument id: score} mapping per query token"""
+        scores = []
+        for term, term_ids in zip(terms, ranges):
+            if len(term_ids) == 1:
+                scores.append(self.postings[term_ids[0]])
+            elif lazy and len(term_ids) <= LAZY_PREFIX_TERMS:
+                scores.append(_PrefixUnion(self.postings[term_ids.start:term_ids.stop]))
+            else:
+                scores.append(self._prefix_scores(term))
+        return scores
+    
+    @staticmethod
+    def _scatter(column, scores):
+        """Raise ``column`` to the given scores where they are higher; return it"""
+        ids = np.fromiter(scores.keys(), dtype=np.intp, count=len(scores))
+        values = np.fromiter(scores.values(), dtype=np.float64, count=len(scores))
+        column[ids] = np.maximum(column[ids], values)
+        return column
+    
+    def _dense_search(self, ranges, limit):
+        """Top ``limit`` by summing one dense score column per token; -inf marks a missing token"""
+        total = None
+        for term_ids in ranges:
+            if len(term_ids) == 1 and term_ids[0] in self._columns:
+                column = self._columns[term_ids[0]]
+            else:
+                column = np.full(self.size, -np.inf)
+                for term_id in term_ids:
+                    if term_id in self._columns:
+                        np.maximum(column, self._columns[term_id], out=column)
+                    else:
+                        self._scatter(column, self.postings[term_id])
+            # Added in token order, as _total does, so both paths give identical scores
+            total = column.copy() if total is None else np.add(total, column, out=total)
+        
+        matches = np.flatnonzero(total > -np.inf)
+        if len(matches) > limit:
+            scores = total[matches]
+            cutoff = np.partition(scores, len(scores) - limit)[len(scores) - limit]
+            matches = matches[scores >= cutoff]
+        order = np.lexsort((matches, -total[matches]))[:limit]
+        return [(int(instrument_id), float(total[instrument_id])) for instrument_id in matches[order]]
+    
+    def search(self, query, limit=10, prefix=True):
+        """Return the top ``limit`` [(instrument id, score)] matching every query token
+        
+        Ordered by score, then id. With ``prefix`` the last token also matches
+        longer terms, so results update while typing. ``limit=None`` ranks
+        every match.
+        """
+        if limit is not None and limit <= 0:
+            return []
+        terms, ranges = self._query_terms(query, prefix)
+        sizes = [sum(self.document_frequencies[term_id] for term_id in term_ids) for term_ids in ranges]
+        if not sizes or not all(sizes):
+            return []
+        if limit is not None and self._columns and min(sizes) >= self.dense_threshold:
+            # Only common words: reading postings would touch most of the catalogue anyway
+            return self._dense_search(ranges, limit)
+        
+        token_scores = self._token_scores(terms, ranges, lazy=limit is not None)
+        if limit is None:
+            # Every instrument in the shortest posting list is a candidate
+            matches = ((instrument_id, _total(token_scores, instrument_id))
+                       for instrument_id in min(token_scores, key=len))
+            return sorted(((instrument_id, score) for instrument_id, score in matches if score is not None),
+                          key=rank_key)
+        
+        # Threshold algorithm: read every token's postings in descending score
+        # order, one instrument from each per round, scoring each new one in full.
+        # No instrument not yet read can beat the sum of the last scores read;
+        # once a list runs out, every instrument left lacks that token.
+        readers = [iter(scores.items()) for scores in token_scores]
+        last_scores = [0.0] * len(readers)
+        seen = set()
+        heap = []
+        while True:
+            for position, reader in enumerate(readers):
+                item = next(reader, None)
+                if item is None:
+                    return _ranked(heap)
+                instrument_id, last_scores[position] = item
+                if instrument_id in seen:
+                    continue
+                seen.add(instrument_id)
+                score = _total(token_scores, instrument_id)
+                if score is None:
+                    continue
+                entry = (score, -instrument_id)
+                if len(heap) < limit:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+            if len(heap) == limit and sum(last_scores) < heap[0][0]:
+                return _ranked(heap)
+
+def _total(token_scores, instrument_id):
+    """Return an instrument's summed score over every token, or None if one is missing"""
+    total = 0.0
+    for scores in token_scores:
+        score = scores.get(instrument_id)
+        if score is None:
+            return None
+        total += score
+    return total
+
+def _ranked(heap):
+    return [(-negative_id, score) for score, negative_id in sorted(heap, reverse=True)]
+
+def write_relevance_index(index, path):
+    """Write the index as a compact ES module next to data/searchIndex.js"""
+    write_js_export(path, 'Surgical Instruments Relevance Index', 'relevanceIndex', index.to_dict(),
+                    pretty=False)
@@ -0,0 +1,199 @@
+"""
+Precomputed inverted search index for the app's instrument search
+
+Instead of lower-casing and substring-scanning every instrument on each
+keystroke, the client looks query tokens up in a sorted vocabulary. Every
+vocabulary term has a posting list of (instrument id, weight) pairs, where
+the weight sums the per-field weights of the fields containing the term.
+Because the vocabulary is sorted, all terms starting with a prefix form one
+contiguous range that can be found with two binary searches, so prefixes
+need no postings of their own.
+
+Instrument ids are positions in the ``instruments`` list of
+completeInstrumentsData.js.
+"""
+
+import re
+import heapq
+from itertools import chain
+from bisect import bisect_left
+
+from .output import write_js_export
+
+# Fields the app searches, and how much a match in each counts towards ranking
+FIELD_WEIGHTS = {
+    'name': 8,
+    'category': 4,
+    'sets': 3,
+    'features': 2,
+    'usage': 1,
+    'description': 1,
+}
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+def tokenize(text):
+    """Split text into lower-case alphanumeric tokens"""
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+def field_text(instrument, field):
+    """Return a field's searchable text, joining list fields such as sets"""
+    value = instrument.get(field)
+    if isinstance(value, list):
+        return ' '.join(value)
+    return value or ''
+
+def term_weights(instrument):
+    """Return {term: summed field weight} for the fields of one instrument"""
+    weights = {}
+    for field, field_weight in FIELD_WEIGHTS.items():
+        for token in set(tokenize(field_text(instrument, field))):
+            weights[token] = weights.get(token, 0) + field_weight
+    return weights
+
+def term_range(terms, prefix):
+    """Return the [start, end) range of the sorted ``terms`` starting with prefix"""
+    start = bisect_left(terms, prefix)
+    end = bisect_left(terms, prefix + '\uffff', start)
+    return start, end
+
+def best_scores(postings):
+    """Return {instrument id: best score} over several terms' (id, score) pairs"""
+    scores = {}
+    for pairs in postings:
+        for instrument_id, score in pairs:
+            # A token matching several terms of one instrument counts once
+            if score > scores.get(instrument_id, 0):
+                scores[instrument_id] = score
+    return scores
+
+def flatten_postings(pairs):
+    """Flatten one posting list to [id, score, id, score, ...] for the client"""
+    return list(chain.from_iterable(pairs))
+
+def posting_pairs(flat):
+    """Read a flattened posting list back as (id, score) pairs"""
+    return zip(flat[::2], flat[1::2])
+
+class SearchIndex:
+    """Sorted vocabulary with weighted posting lists"""
+    
+    def __init__(self, terms, postings, size):
+        self.terms = terms
+        self.postings = postings
+        self.size = size
+    
+    @classmethod
+    def from_instruments(cls, instruments, memo=None):
+        """Index instruments (records or dicts); ids are their list positions
+        
+        A ``RecordMemo`` reuses each instrument's term weights from the previous build.
+        """
+        weights_by_term = {}
+        
+        for instrument_id, instrument in enumerate(instruments):
+            if memo is not None:
+                weights = memo.get(instrument, 'term weights', lambda: term_weights(instrument))
+            else:
+                weights = term_weights(instrument)
+            
+            for token, weight in weights.items():
+                postings = weights_by_term.get(token)
+                if postings is None:
+                    postings = weights_by_term[token] = []
+                postings.append((instrument_id, weight))
+        
+        terms = sorted(weights_by_term)
+        return cls(terms, [weights_by_term[term] for term in terms], len(instruments))
+    
+    def to_dict(self):
+        """Return the index as a compact JSON-ready dict
+        
+        Each posting list is flattened to [id, weight, id, weight, ...].
+        """
+        return {
+            'version': 1,
+            'size': self.size,
+            'fieldWeights': FIELD_WEIGHTS,
+            'terms': self.terms,
+            'postings': [flatten_postings(postings) for postings in self.postings]
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild an index from ``to_dict`` output"""
+        postings = [list(posting_pairs(flat)) for flat in data['postings']]
+        return cls(data['terms'], postings, data['size'])
+    
+    def _token_scores(self, token, prefix):
+        """Return {instrument id: weight} for one query token"""
+        if prefix:
+            start, end = term_range(self.terms, token)
+        else:
+            start = bisect_left(self.terms, token)
+            end = start + 1 if start < len(self.terms) and self.terms[start] == token else start
+        
+        if end - start == 1:
+            return dict(self.postings[start])
+        return best_scores(self.postings[start:end])
+    
+    def match(self, query):
+        """Return {instrument id: score} for instruments matching every query token
+        
+        The last token is matched as a prefix so results update while typing;
+        earlier tokens must match whole terms.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return {}
+        
+        # Intersect starting from the rarest token so the candidate set shrinks fastest
+        token_scores = sorted((self._token_scores(token, prefix=position == len(tokens) - 1)
+                               for position, token in enumerate(tokens)), key=len)
+        scores = token_scores[0]
+        for other in token_scores[1:]:
+            if not scores:
+                break
+            scores = {instrument_id: score + other[instrument_id]
+                      for instrument_id, score in scores.items() if instrument_id in other}
+        return scores
+    
+    def search(self, query, limit=None):
+        """Return [(instrument id, score)] for instruments matching every query token
+        
+        Results are ordered by score, then id; see ``match`` for how tokens match.
+        """
+        return rank_matches(self.match(query), limit)
+
+def rank_key(item):
+    """Sort key putting (instrument id, score) pairs in descending score, then id, order"""
+    return -item[1], item[0]
+
+def rank_matches(scores, limit=None):
+    """Order {instrument id: score} by score then id, keeping only the top ``limit``"""
+    if limit is not None:
+        return heapq.nsmallest(limit, scores.items(), key=rank_key)
+    return sorted(scores.items(), key=rank_key)
+
+def linear_search(instruments, query):
+    """Return the ids ``SearchIndex.match`` finds, by tokenizing every instrument
+    
+    The full-scan baseline for the index: each query token must be a term of
+    some searched field, the last one only as a prefix.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    whole, last = set(tokens[:-1]), tokens[-1]
+    matches = []
+    for instrument_id, instrument in enumerate(instruments):
+        terms = set()
+        for field in FIELD_WEIGHTS:
+            terms.update(tokenize(field_text(instrument, field)))
+        if whole <= terms and any(term.startswith(last) for term in terms):
+            matches.append(instrument_id)
+    return matches
+
+def write_search_index(index, path):
+    """Write the index as a compact ES module next to the other data files"""
+    write_js_export(path, 'Surgical Instruments Search Index', 'searchIndex', index.to_dict(), pretty=False)
@@ -0,0 +1,336 @@
+"""
+Local catalogue query service: a small asyncio HTTP/1.1 server
+
+The catalogue is parsed once at startup by the same engine as the build and
+kept in memory with name, set, speciality and token indexes, so clients can
+page through instruments, sets and specialities or search instead of
+downloading the whole completeInstrumentsData bundle. Every instrument is
+JSON-encoded once at load time; a page response is those bytes joined, and
+recent responses are kept in a small LRU cache.
+
+The catalogue never changes while the service runs, so one ETag (a hash of
+the loaded catalogue) covers every successful response. A conditional GET
+whose If-None-Match carries it is answered 304 once the path and parameters
+are known to be valid; a repeated request is answered from the response
+cache without parsing the URL again.
+
+Endpoints (all GET, JSON):
+    /instruments?set=&speciality=&category=&offset=&limit=
+    /instruments?name=           exact (case-insensitive) name lookup
+    /instruments/<id>            id is the normalized catalogue slug
+    /sets?speciality=&offset=&limit=
+    /specialities?offset=&limit=
+    /search?q=&offset=&limit=    ranked by the search index weights
+"""
+
+import json
+import asyncio
+import hashlib
+import argparse
+from collections import OrderedDict
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from .catalogue import build_catalogue
+from .dedup import normalize_name
+from .normalized import assign_ids
+from .records import record_dict
+from .search_index import SearchIndex, rank_matches
+from .shards import build_speciality_summaries
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Encoded response bodies kept for repeated requests
+RESPONSE_CACHE_SIZE = 1024
+
+# Seconds an idle keep-alive connection is held open
+KEEP_ALIVE_TIMEOUT = 15
+MAX_HEADERS = 100
+
+COMPACT_SEPARATORS = (',', ':')
+
+REASONS = {200: 'OK', 204: 'No Content', 304: 'Not Modified', 400: 'Bad Request',
+           404: 'Not Found', 405: 'Method Not Allowed'}
+
+class QueryError(Exception):
+    """A request the catalogue cannot answer; carries the HTTP status"""
+    
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def _encode(value):
+    return json.dumps(value, ensure_ascii=False, separators=COMPACT_SEPARATORS).encode('utf-8')
+
+def _page_params(params):
+    """Return (offset, limit) from query parameters"""
+    try:
+        offset = int(params.get('offset', 0))
+        limit = int(params.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise QueryError(400, "offset and limit must be integers")
+    if offset < 0 or not 1 <= limit <= MAX_PAGE_SIZE:
+        raise QueryError(400, f"offset must be >= 0 and limit between 1 and {MAX_PAGE_SIZE}")
+    return offset, limit
+
+def _page(total, offset, limit, items):
+    """Encode one page from already-encoded items"""
+    return (b'{"total":%d,"offset":%d,"limit":%d,"items":[' % (total, offset, limit)
+            + b','.join(items) + b']}')
+
+class CatalogueQueryIndex:
+    """The loaded catalogue with its lookup indexes and pre-encoded records"""
+    
+    def __init__(self, instruments, sets_overview):
+        self.instruments = []
+        for instrument_id, instrument in zip(assign_ids(instruments), instruments):
+            data = record_dict(instrument)
+            data['id'] = instrument_id
+            self.instruments.append(data)
+        self.sets = list(sets_overview)
+        self.specialities = [{'name': name, **summary} for name, summary
+                             in sorted(build_speciality_summaries(self.sets).items())]
+        
+        # Positions in self.instruments, in catalogue order
+        self.by_id = {data['id']: position for position, data in enumerate(self.instruments)}
+        self.by_name = {}
+        self.by_set = {}
+        self.by_category = {}
+        for position, data in enumerate(self.instruments):
+            self.by_name.setdefault(normalize_name(data['name']), position)
+            for set_name in data.get('sets') or ():
+                self.by_set.setdefault(set_name, []).append(position)
+            if data.get('category'):
+                self.by_category.setdefault(data['category'], []).append(position)
+        
+        self.by_speciality = {}
+        for summary in self.specialities:
+            members = sorted({position for set_name in summary['sets']
+                              for position in self.by_set.get(set_name, ())})
+            self.by_speciality[summary['name']] = members
+        self.sets_by_speciality = {}
+        for position, set_entry in enumerate(self.sets):
+            if set_entry.get('speciality'):
+                self.sets_by_speciality.setdefault(set_entry['speciality'], []).append(position)
+        
+        self.search_index = SearchIndex.from_instruments(self.instruments)
+        
+        self.encoded_instruments = [_encode(data) for data in self.instruments]
+        self.encoded_sets = [_encode(set_entry) for set_entry in self.sets]
+        self.encoded_specialities = [_encode(summary) for summary in self.specialities]
+        
+        digest = hashlib.sha256()
+        for encoded in self.encoded_instruments + self.encoded_sets:
+            digest.update(encoded)
+            digest.update(b'\n')
+        self.etag = f'"{digest.hexdigest()[:20]}"'
+    
+    @classmethod
+    def from_build(cls, catalogue):
+        """Index the result of ``build_catalogue``"""
+        return cls(catalogue['uniqueInstruments'], catalogue['setsOverview'])
+    
+    def _filtered_instruments(self, params):
+        """Return the instrument positions matching the set / speciality / category filters"""
+        candidates = None
+        for param, index in [('set', self.by_set), ('speciality', self.by_speciality),
+                             ('category', self.by_category)]:
+            if param not in params:
+                continue
+            members = index.get(params[param], [])
+            if candidates is None:
+                candidates = members
+            else:
+                selected = set(members)
+                candidates = [position for position in candidates if position in selected]
+        return range(len(self.instruments)) if candidates is None else candidates
+    
+    def query(self, path, params):
+        """Return the encoded JSON body for an endpoint, raising QueryError if it has none"""
+        offset, limit = _page_params(params)
+        
+        if path == '/instruments':
+            if 'name' in params:
+                position = self.by_name.get(normalize_name(params['name']))
+                positions = [] if position is None else [position]
+            else:
+                positions = self._filtered_instruments(params)
+            return _page(len(positions), offset, limit,
+                         [self.encoded_instruments[position] for position in positions[offset:offset + limit]])
+        
+        if path.startswith('/instruments/'):
+            position = self.by_id.get(path[len('/instruments/'):])
+            if position is None:
+                raise QueryError(404, "No instrument with that id")
+            return self.encoded_instruments[position]
+        
+        if path == '/sets':
+            if 'speciality' in params:
+                positions = self.sets_by_speciality.get(params['speciality'], [])
+            else:
+                positions = range(len(self.sets))
+            return _page(len(positions), offset, limit,
+                         [self.encoded_sets[position] for position in positions[offset:offset + limit]])
+        
+        if path == '/specialities':
+            return _page(len(self.specialities), offset, limit, self.encoded_specialities[offset:offset + limit])
+        
+        if path == '/search':
+            if not params.get('q', '').strip():
+                raise QueryError(400, "search needs a q parameter")
+            scores = self.search_index.match(params['q'])
+            # Only the requested page is ranked, through a heap of offset + limit entries
+            ranked = rank_matches(scores, offset + limit)[offset:]
+            return _page(len(scores), offset, limit,
+                         [b'{"score":%d,"instrument":%s}' % (score, self.encoded_instruments[position])
+                          for position, score in ranked])
+        
+        raise QueryError(404, "Unknown endpoint")
+
+def etag_matches(header, etag):
+    """Return whether an If-None-Match header value matches ``etag`` (weak comparison)"""
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        tag = candidate[2:] if candidate.startswith('W/') else candidate
+        if candidate == '*' or tag == etag:
+            return True
+    return False
+
+class CatalogueService:
+    """Answers HTTP requests against a CatalogueQueryIndex"""
+    
+    def __init__(self, index, cache_size=RESPONSE_CACHE_SIZE):
+        self.index = index
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.requests = 0
+    
+    def respond(self, method, target, headers):
+        """Return (status, extra headers, body) for one request"""
+        self.requests += 1
+        if method == 'OPTIONS':
+            return 204, [('Access-Control-Allow-Methods', 'GET, HEAD, OPTIONS'),
+                         ('Access-Control-Allow-Headers', 'If-None-Match')], b''
+        if method not in ('GET', 'HEAD'):
+            return 405, [('Allow', 'GET, HEAD, OPTIONS')], _encode({'error': "Only GET and HEAD are supported"})
+        
+        # Keyed by the raw request target, so repeated requests skip URL parsing too
+        body = self.cache.get(target)
+        if body is not None:
+            self.cache.move_to_end(target)
+        else:
+            url = urlsplit(target)
+            path = unquote(url.path).rstrip('/') or '/'
+            params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            try:
+                body = self.index.query(path, params)
+            except QueryError as e:
+                return e.status, [], _encode({'error': str(e)})
+            
+            self.cache[target] = body
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        
+        # Only successful responses are conditional; errors are reported as usual
+        validators = [('ETag', self.index.etag), ('Cache-Control', 'no-cache')]
+        if etag_matches(headers.get('if-none-match', ''), self.index.etag):
+            return 304, validators, b''
+        return 200, validators, body
+    
+    async def handle_connection(self, reader, writer):
+        """Serve keep-alive HTTP/1.1 requests on one connection until it closes"""
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line.strip():
+                    break
+                
+                parts = request_line.decode('latin-1').split()
+                headers = {}
+                while len(headers) <= MAX_HEADERS:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                
+                if len(parts) != 3 or len(headers) > MAX_HEADERS:
+                    status, extra, body = 400, [], _encode({'error': "Malformed request"})
+                    method, keep_alive = 'GET', False
+                else:
+                    method, target, version = parts
+                    # Request bodies are not used but must be drained to keep the connection in sync
+                    if headers.get('content-length', '0').isdigit() and int(headers.get('content-length', '0')):
+                        await reader.readexactly(int(headers['content-length']))
+                    connection = headers.get('connection', '').lower()
+                    keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+                    status, extra, body = self.respond(method, target, headers)
+                
+                head = [f"HTTP/1.1 {status} {REASONS[status]}",
+                        'Content-Type: application/json; charset=utf-8',
+                        'Access-Control-Allow-Origin: *',
+                        'Access-Control-Expose-Headers: ETag',
+                        f"Content-Length: {len(body)}",
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+                head.extend(f"{name}: {value}" for name, value in extra)
+                writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1'))
+                if method != 'HEAD' and status not in (204, 304):
+                    writer.write(body)
+                await writer.drain()
+                
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            # Client went away or sent an oversized line; drop the connection
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+async def start_service(index, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Start serving ``index`` and return (service, asyncio server)"""
+    service = CatalogueService(index)
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    return service, server
+
+def parse_arguments(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Serve the parsed instrument catalogue over HTTP")
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f"Address to listen on (default {DEFAULT_HOST})")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"Port to listen on (default {DEFAULT_PORT})")
+    parser.add_argument('--csv-dir', default='instrument_csvs',
+                        help="Directory of set CSVs to load (default instrument_csvs)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Parse CSV files across N processes at startup (0 = one per CPU, default 1)")
+    parser.add_argument('--cache-dir', default='.instrument_cache',
+                        help="Directory for the incremental build cache (default .instrument_cache)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Re-parse every CSV without reading or updating the build cache")
+    return parser.parse_args(argv)
+
+async def serve(index, host, port):
+    service, server = await start_service(index, host, port)
+    address = server.sockets[0].getsockname()
+    print(f"Serving {len(index.instruments)} instruments and {len(index.sets)} sets "
+          f"on http://{address[0]}:{address[1]} (ETag {index.etag})")
+    async with server:
+        await server.serve_forever()
+
+def main(argv=None):
+    """Load the catalogue once and serve it until interrupted"""
+    args = parse_arguments(argv)
+    catalogue = build_catalogue(args.csv_dir, workers=args.workers,
+                                cache_dir=None if args.no_cache else args.cache_dir)
+    index = CatalogueQueryIndex.from_build(catalogue)
+    try:
+        asyncio.run(serve(index, args.host, args.port))
+    except KeyboardInterrupt:
+        print("\nStopped")
@@ -0,0 +1,121 @@
+"""
+Sharded catalogue output the app can load lazily
+
+A small manifest holds the set and speciality summaries plus a light summary
+of every instrument (id, name, category, sets, ...), enough for the overview,
+set and search-result screens. The heavy text fields live in chunk files of
+``shard_size`` instruments each, keyed by id range, and are only parsed when
+a detail screen asks for them. Instrument ids are positions in the unique
+instrument list, so instrument ``id`` lives at ``chunks[id // shardSize]``
+index ``id % shardSize``.
+"""
+
+import os
+import glob
+import json
+
+from .records import UNIQUE_DEFAULTS, record_dict
+
+DEFAULT_SHARD_SIZE = 50
+
+# Instrument fields kept in the manifest; everything else goes to the chunks
+SUMMARY_FIELDS = ('name', 'category', 'type', 'sets', 'specialities', 'image')
+
+MANIFEST_FILE = 'manifest.json'
+CHUNK_PATTERN = 'chunk-{:04d}.json'
+
+def build_speciality_summaries(sets_overview):
+    """Return {speciality: {'sets': [set names], 'count': instruments}} as App.js groups them"""
+    specialities = {}
+    for set_entry in sets_overview:
+        speciality = set_entry.get('speciality')
+        if not speciality:
+            continue
+        summary = specialities.setdefault(speciality, {'sets': [], 'count': 0})
+        summary['sets'].append(set_entry['name'])
+        summary['count'] += set_entry['count']
+    return specialities
+
+def build_shards(unique_instruments, sets_overview, metadata=None, shard_size=DEFAULT_SHARD_SIZE, memo=None):
+    """Split the catalogue into (manifest, chunks)
+    
+    Fields every unique instrument shares (UNIQUE_DEFAULTS) are stored once in
+    the manifest instead of in each chunk entry. A ``RecordMemo`` reuses each
+    instrument's summary and chunk entry from the previous build.
+    """
+    defaults = dict(UNIQUE_DEFAULTS)
+    summaries = []
+    chunks = []
+    set_ids = {}
+    
+    def split(instrument):
+        data = record_dict(instrument)
+        fields = {field: data[field] for field in SUMMARY_FIELDS if field in data}
+        entry = {field: value for field, value in data.items()
+                 if field not in SUMMARY_FIELDS and defaults.get(field) != value}
+        return fields, entry
+    
+    for instrument_id, instrument in enumerate(unique_instruments):
+        if memo is not None:
+            fields, entry = memo.get(instrument, 'shard entry', lambda: split(instrument))
+        else:
+            fields, entry = split(instrument)
+        chunk = instrument_id // shard_size
+        if chunk == len(chunks):
+            chunks.append([])
+        
+        summary = {'id': instrument_id, 'chunk': chunk}
+        summary.update(fields)
+        summaries.append(summary)
+        
+        chunks[chunk].append(entry)
+        
+        for set_name in fields.get('sets', []):
+            set_ids.setdefault(set_name, []).append(instrument_id)
+    
+    manifest = {
+        'version': 1,
+        'shardSize': shard_size,
+        'chunkCount': len(chunks),
+        'metadata': metadata or {},
+        'defaults': defaults,
+        'specialities': build_speciality_summaries(sets_overview),
+        'sets': [dict(set_entry, instrumentIds=set_ids.get(set_entry['name'], []))
+                 for set_entry in sets_overview],
+        'instruments': summaries
+    }
+    return manifest, chunks
+
+def _dump(data, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        # json.dumps takes the C encoder; json.dump never does
+        f.write(json.dumps(data, ensure_ascii=False, separators=(',', ':')))
+    return os.path.getsize(path)
+
+def write_shards(unique_instruments, sets_overview, directory, metadata=None,
+                 shard_size=DEFAULT_SHARD_SIZE, memo=None):
+    """Write the manifest, chunk files and an index.js loader; return {file name: bytes}"""
+    manifest, chunks = build_shards(unique_instruments, sets_overview, metadata, shard_size, memo)
+    os.makedirs(directory, exist_ok=True)
+    
+    sizes = {MANIFEST_FILE: _dump(manifest, os.path.join(directory, MANIFEST_FILE))}
+    chunk_files = [CHUNK_PATTERN.format(chunk) for chunk in range(len(chunks))]
+    for chunk_file, chunk in zip(chunk_files, chunks):
+        sizes[chunk_file] = _dump(chunk, os.path.join(directory, chunk_file))
+    
+    # Chunks left over from a larger catalogue or smaller shard size
+    for path in glob.glob(os.path.join(directory, 'chunk-*.json')):
+        if os.path.basename(path) not in sizes:
+            os.remove(path)
+    
+    # Requires inside the loader functions are only evaluated when first called,
+    # so the app parses a chunk when a screen needs it rather than at startup
+    with open(os.path.join(directory, 'index.js'), 'w', encoding='utf-8') as f:
+        f.write('// Sharded Surgical Instruments Data\n')
+        f.write(f"export const manifest = require('./{MANIFEST_FILE}');\n")
+        f.write('export const chunkLoaders = [\n')
+        for chunk_file in chunk_files:
+            f.write(f"  () => require('./{chunk_file}'),\n")
+        f.write('];\n')
+    
+    return sizes
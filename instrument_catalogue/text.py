@@ -0,0 +1,32 @@
+"""
+Text normalization helpers shared by the parsing engine
+"""
+
+def clean_text(text):
+    """Clean and normalize text data"""
+    if not text:
+        return ""
+    
+    # Collapse whitespace runs to single spaces and strip the ends in one pass;
+    # str.split() uses the same whitespace definition as re's \s
+    text = ' '.join(text.split())
+    
+    # Remove quotes if they wrap the entire text
+    if text[:1] == '"' and text[-1:] == '"':
+        text = text[1:-1]
+    
+    return text
+
+def clean_fields(values):
+    """Clean every field value of a row in one pass; missing (None) values become ''"""
+    cleaned = []
+    append = cleaned.append
+    for text in values:
+        if text:
+            text = ' '.join(text.split())
+            if text[:1] == '"' and text[-1:] == '"':
+                text = text[1:-1]
+            append(text)
+        else:
+            append('')
+    return cleaned
@@ -0,0 +1,337 @@
+"""
+Schema validation of parsed records against backend_data_structure.json
+
+The field rules in backend_data_structure.json ("Required, max 200
+characters", enums, "integer > 0", "from availableSpecialties", "valid URL")
+are translated once into a JSON Schema, which is then compiled into per-field
+batch checks. Records are buffered and checked a batch at a time, one field
+at a time: each check first tries a whole-batch test that runs in C
+(``max(map(len, values))``, set containment, ``all``) and only walks the
+batch value by value when that test fails, so valid rows cost a few
+builtin calls per field.
+
+jsonschema is an optional dependency used as a reference validator for the
+same schema; use ``available()`` before calling ``jsonschema_errors``.
+"""
+
+import re
+import json
+from collections import Counter
+from operator import attrgetter, methodcaller
+
+from .records import Instrument, Record
+
+try:
+    import jsonschema
+except ImportError:  # Optional dependency, only needed for the reference validator
+    jsonschema = None
+
+DEFAULT_SPEC_PATH = 'backend_data_structure.json'
+DEFAULT_BATCH_SIZE = 4096
+
+# Only the first errors are kept in full; every error is still counted
+DEFAULT_MAX_ERRORS = 1000
+VALUE_PREVIEW_LENGTH = 80
+
+URL_PATTERN = r'^[A-Za-z][A-Za-z0-9+.-]*://\S+$'
+
+_MAX_LENGTH = re.compile(r'max (\d+) characters', re.IGNORECASE)
+_INTEGER_BOUND = re.compile(r'integer\s*(>=?)\s*(-?\d+)', re.IGNORECASE)
+
+# Parsed rows carry one speciality and set description; they follow the
+# item rules of the merged instrument's lists
+ROW_ALIASES = {'speciality': 'specialities', 'setDescription': 'setDescriptions'}
+
+_JSON_TYPES = {'string': 'string', 'number': 'number', 'boolean': 'boolean', 'array': 'array'}
+
+def available():
+    """Return True when jsonschema is installed and the reference validator can be used"""
+    return jsonschema is not None
+
+def load_spec(path=DEFAULT_SPEC_PATH):
+    """Load the backend data structure document"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def field_schema(field, required, specialities):
+    """Return the JSON Schema of one field described in the backend data structure"""
+    rule = field.get('validation', '')
+    schema = {'type': _JSON_TYPES.get(field.get('type'), 'string')}
+    
+    bound = _INTEGER_BOUND.search(rule)
+    if bound:
+        schema['type'] = 'integer'
+        operator, limit = bound.groups()
+        schema['minimum' if operator == '>=' else 'exclusiveMinimum'] = int(limit)
+    
+    constraints = {}
+    max_length = _MAX_LENGTH.search(rule)
+    if max_length:
+        constraints['maxLength'] = int(max_length.group(1))
+    if 'enum' in field:
+        constraints['enum'] = field['enum']
+    if 'availablespecialties' in rule.lower():
+        constraints['enum'] = specialities
+    if 'valid url' in rule.lower():
+        constraints['pattern'] = URL_PATTERN
+    
+    if schema['type'] == 'array':
+        # Array rules such as "max 500 characters each" apply to the items
+        schema['items'] = dict({'type': 'string'}, **constraints)
+    else:
+        schema.update(constraints)
+        if required and schema['type'] == 'string':
+            schema['minLength'] = 1
+    return schema
+
+def build_json_schema(spec, section):
+    """Return a JSON Schema for records of a section such as 'instrumentStructure'"""
+    specialities = spec['specialties']['availableSpecialties']
+    structure = spec[section]
+    properties = {}
+    for name, field in structure.get('requiredFields', {}).items():
+        properties[name] = field_schema(field, True, specialities)
+    for name, field in structure.get('optionalFields', {}).items():
+        properties[name] = field_schema(field, False, specialities)
+    return {
+        'type': 'object',
+        'required': list(structure.get('requiredFields', {})),
+        'properties': properties
+    }
+
+def row_schema(spec):
+    """Return the instrument schema restricted to the fields of a parsed row"""
+    schema = build_json_schema(spec, 'instrumentStructure')
+    properties = schema['properties']
+    for alias, field in ROW_ALIASES.items():
+        if field in properties:
+            properties[alias] = properties[field]['items']
+    row_fields = set(Instrument.__slots__)
+    schema['properties'] = {name: rules for name, rules in properties.items() if name in row_fields}
+    schema['required'] = [name for name in schema['required'] if name in row_fields]
+    return schema
+
+def sets_schema(spec):
+    """Return the schema of a sets overview entry"""
+    return build_json_schema(spec, 'setStructure')
+
+def _all_valid(test):
+    """Wrap a whole-batch test so values of an unexpected type fall back to per-value checks"""
+    def check(values):
+        try:
+            return test(values)
+        except TypeError:
+            return False
+    return check
+
+def _value_checks(rules, required):
+    """Return [(rule, message, batch test, value test)] for one value's schema
+    
+    Value tests pass values of the wrong type, which the type check reports,
+    and pass missing optional values.
+    """
+    checks = []
+    kind = rules.get('type')
+    
+    if kind == 'string':
+        checks.append(('type', "must be a string",
+                       lambda values: set(map(type, values)) <= {str},
+                       lambda value: type(value) is str or (value is None and not required)))
+    elif kind == 'integer':
+        checks.append(('type', "must be an integer",
+                       lambda values: set(map(type, values)) <= {int},
+                       lambda value: type(value) is int or (value is None and not required)))
+    elif kind == 'boolean':
+        checks.append(('type', "must be a boolean",
+                       lambda values: set(map(type, values)) <= {bool},
+                       lambda value: type(value) is bool or (value is None and not required)))
+    elif kind == 'array':
+        checks.append(('type', "must be a list",
+                       lambda values: set(map(type, values)) <= {list},
+                       lambda value: type(value) is list or (value is None and not required)))
+    
+    if rules.get('minLength'):
+        checks.append(('required', "is required",
+                       all,
+                       lambda value: type(value) is not str or bool(value)))
+    
+    limit = rules.get('maxLength')
+    if limit is not None:
+        checks.append(('maxLength', f"exceeds {limit} characters",
+                       _all_valid(lambda values: max(map(len, values), default=0) <= limit),
+                       lambda value: type(value) is not str or len(value) <= limit))
+    
+    if 'enum' in rules:
+        allowed = frozenset(rules['enum'])
+        # Empty optional values are absent rather than out of range
+        accepted = allowed if required else allowed | {'', None}
+        checks.append(('enum', f"must be one of {len(allowed)} allowed values",
+                       _all_valid(accepted.issuperset),
+                       lambda value: value in accepted if isinstance(value, (str, type(None))) else True))
+    
+    if 'pattern' in rules:
+        match = re.compile(rules['pattern']).match
+        checks.append(('pattern', "is not a valid URL" if rules['pattern'] == URL_PATTERN
+                       else f"does not match {rules['pattern']}",
+                       _all_valid(lambda values: not any(value and not match(value) for value in values)),
+                       lambda value: type(value) is not str or not value or bool(match(value))))
+    
+    for keyword, message, test in [('minimum', "must be at least", int.__ge__),
+                                   ('exclusiveMinimum', "must be greater than", int.__gt__)]:
+        if keyword in rules:
+            bound = rules[keyword]
+            checks.append((keyword, f"{message} {bound}",
+                           _all_valid(lambda values, test=test, bound=bound:
+                                      test(min(values, default=bound + 1), bound)),
+                           lambda value, test=test, bound=bound:
+                               type(value) is not int or test(value, bound)))
+    return checks
+
+def _item_checks(rules):
+    """Return checks for the items of an array field, run over every item of the batch"""
+    return [(f"items.{rule}", f"has an item that {message}", test,
+             lambda value, valid=valid: type(value) is not list or all(map(valid, value)))
+            for rule, message, test, valid in _value_checks(rules, True)]
+
+class _CompiledField:
+    __slots__ = ('name', 'attribute', 'key', 'checks', 'item_checks')
+    
+    def __init__(self, name, rules, required):
+        self.name = name
+        self.attribute = attrgetter(name)
+        self.key = methodcaller('get', name)
+        self.checks = _value_checks(rules, required)
+        self.item_checks = _item_checks(rules['items']) if 'items' in rules else []
+
+def compile_schema(schema):
+    """Compile a JSON Schema from ``build_json_schema`` into per-field batch checks"""
+    required = set(schema.get('required', ()))
+    return [_CompiledField(name, rules, name in required)
+            for name, rules in schema['properties'].items()]
+
+def record_location(record):
+    """Return (file, row) for a parsed row or (filename, None) for a sets overview entry"""
+    if isinstance(record, Record):
+        return record.sourceFile, record.rowNumber
+    return record.get('sourceFile') or record.get('filename'), record.get('rowNumber')
+
+def _preview(value):
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+    return text if len(text) <= VALUE_PREVIEW_LENGTH else text[:VALUE_PREVIEW_LENGTH] + '...'
+
+class RecordValidator:
+    """Validates streamed records in batches against a compiled schema
+    
+    Call ``add`` for each record and ``flush`` once the stream ends; ``report``
+    then returns the error summary and the first ``max_errors`` errors with
+    their file and row number.
+    """
+    
+    def __init__(self, schema, batch_size=DEFAULT_BATCH_SIZE, max_errors=DEFAULT_MAX_ERRORS):
+        self.fields = compile_schema(schema)
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.batch = []
+        self.records = 0
+        self.invalid_records = 0
+        self.error_count = 0
+        self.errors = []
+        self.counts = Counter()
+    
+    def add(self, record):
+        """Queue a record, validating the batch once it is full"""
+        self.batch.append(record)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+    
+    def validate(self, records):
+        """Validate every record of an iterable and return the report"""
+        for record in records:
+            self.add(record)
+        self.flush()
+        return self.report()
+    
+    def flush(self):
+        """Validate the queued records"""
+        batch = self.batch
+        if not batch:
+            return
+        self.batch = []
+        self.records += len(batch)
+        
+        invalid = set()
+        slotted = isinstance(batch[0], Record)
+        for field in self.fields:
+            if slotted and not all(isinstance(record, Record) for record in batch):
+                slotted = False
+            values = list(map(field.attribute if slotted else field.key, batch))
+            for rule, message, test, valid in field.checks:
+                if not test(values):
+                    self._record_errors(batch, values, field.name, rule, message, valid, invalid)
+            
+            if field.item_checks:
+                items = [item for value in values if type(value) is list for item in value]
+                for rule, message, test, valid in field.item_checks:
+                    if not test(items):
+                        self._record_errors(batch, values, field.name, rule, message, valid, invalid)
+        
+        self.invalid_records += len(invalid)
+    
+    def _record_errors(self, batch, values, field, rule, message, valid, invalid):
+        for index, value in enumerate(values):
+            if valid(value):
+                continue
+            invalid.add(index)
+            self.error_count += 1
+            self.counts[f"{field}: {rule}"] += 1
+            if len(self.errors) < self.max_errors:
+                source_file, row_number = record_location(batch[index])
+                self.errors.append({
+                    'file': source_file,
+                    'row': row_number,
+                    'field': field,
+                    'rule': rule,
+                    'message': f"{field} {message}",
+                    'value': _preview(value)
+                })
+    
+    def report(self):
+        """Return {'records', 'invalidRecords', 'errors', 'byRule', 'details'}"""
+        return {
+            'records': self.records,
+            'invalidRecords': self.invalid_records,
+            'errors': self.error_count,
+            'byRule': dict(self.counts.most_common()),
+            'details': sorted(self.errors, key=lambda error: (str(error['file']), error['row'] or 0))
+        }
+
+def jsonschema_errors(records, schema):
+    """Return (file, row, field, message) for every error the jsonschema package finds
+    
+    A reference implementation of the same schema, checked record by record.
+    Empty optional strings are treated as absent, as in ``RecordValidator``.
+    """
+    if jsonschema is None:
+        raise ImportError("Reference validation requires jsonschema (pip install jsonschema)")
+    
+    validator = jsonschema.Draft7Validator(schema)
+    required = set(schema.get('required', ()))
+    errors = []
+    for record in records:
+        data = record.to_dict() if isinstance(record, Record) else record
+        if isinstance(record, Instrument):
+            data = dict(data, sets=record.sets)
+        data = {key: value for key, value in data.items()
+                if key in required or (value != '' and value is not None)}
+        source_file, row_number = record_location(record)
+        for error in validator.iter_errors(data):
+            field = error.path[0] if error.path else None
+            errors.append((source_file, row_number, field, error.message))
+    return errors
+
+def print_validation_report(title, report, limit=10):
+    """Print a validation summary with the most common failing rules"""
+    print(f"\n{title}: {report['errors']} errors in {report['invalidRecords']} "
+          f"of {report['records']} records")
+    for rule, count in list(report['byRule'].items())[:limit]:
+        print(f"- {rule}: {count}")
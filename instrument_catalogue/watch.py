@@ -0,0 +1,240 @@
+"""
+Watch mode: keep the catalogue in memory and patch it as CSVs are saved
+
+``IncrementalCatalogue`` keeps every file's parsed rows grouped by
+instrument name, plus which files each name appears in. When files change
+only those files are parsed again. Each unique instrument whose name they
+contained, before or after the change, is re-merged from its rows across
+the files it still appears in. Every other instrument is reused as it is.
+The sets overview is rebuilt from per-file summaries, one entry per file. The
+result is the same as a full build of the directory.
+
+``watch_directory`` polls file sizes and mtimes and waits for a burst of
+saves to settle before reporting it, so an editor saving several sets (or
+writing a file in pieces) triggers one rebuild.
+"""
+
+import os
+import time
+from itertools import chain
+from operator import attrgetter
+
+from .catalogue import add_to_unique_instruments, build_sets_overview, iter_all_csv_files
+from .dedup import InstrumentIndex
+from .parsing import extract_set_name_from_filename
+
+# Seconds between directory scans, and of quiet after the last change before rebuilding
+POLL_INTERVAL = 0.1
+DEBOUNCE = 0.2
+
+def scan_directory(csv_directory):
+    """Return {filename: (mtime_ns, size)} for the CSVs in a directory"""
+    signatures = {}
+    with os.scandir(csv_directory) as entries:
+        for entry in entries:
+            if entry.name.endswith('.csv') and entry.is_file():
+                stat = entry.stat()
+                signatures[entry.name] = (stat.st_mtime_ns, stat.st_size)
+    return signatures
+
+def watch_directory(csv_directory, poll_interval=POLL_INTERVAL, debounce=DEBOUNCE):
+    """Yield the sorted names of CSVs added, modified or removed, one settled burst at a time"""
+    known = scan_directory(csv_directory)
+    while True:
+        time.sleep(poll_interval)
+        current = scan_directory(csv_directory)
+        if current == known:
+            continue
+        
+        # Keep scanning until nothing has changed for ``debounce`` seconds
+        settled = time.monotonic() + debounce
+        while time.monotonic() < settled:
+            time.sleep(poll_interval)
+            latest = scan_directory(csv_directory)
+            if latest != current:
+                current = latest
+                settled = time.monotonic() + debounce
+        
+        changed = {filename for filename in known.keys() | current.keys()
+                   if known.get(filename) != current.get(filename)}
+        known = current
+        yield sorted(changed)
+
+def _file_state(filename):
+    """Return the empty state of one file: rows grouped by name plus set details"""
+    return {'setName': extract_set_name_from_filename(filename), 'rows': {}, 'firstRow': {},
+            'count': 0, 'speciality': '', 'setDescription': ''}
+
+def _add_row(state, instrument):
+    """Record one parsed row in its file's state"""
+    rows = state['rows'].get(instrument.name)
+    if rows is None:
+        rows = state['rows'][instrument.name] = []
+        state['firstRow'][instrument.name] = state['count']
+    rows.append(instrument)
+    state['count'] += 1
+    # The last row carrying a value wins, as in build_catalogue
+    if instrument.speciality:
+        state['speciality'] = instrument.speciality
+    if instrument.setDescription:
+        state['setDescription'] = instrument.setDescription
+
+def _finish_states(states, structure_info):
+    """Fill in each file's set info once its rows have all been recorded"""
+    # set_info is keyed by set name, so files sharing one overwrite each
+    # other there; each file's entry is rebuilt from its own rows instead
+    for filename, state in states.items():
+        if filename not in structure_info:
+            state['info'] = None  # Could not be opened; left out like a full build does
+            continue
+        state['info'] = {
+            'filename': filename,
+            'instrumentCount': state['count'],
+            'structure': structure_info[filename],
+            'hasSpeciality': bool(state['speciality']),
+            'hasSetDescription': bool(state['setDescription'])
+        }
+
+class IncrementalCatalogue:
+    """The parsed rows of every CSV, merged into unique instruments and sets on demand
+    
+    Unlike ``build_catalogue`` this holds every parsed row in memory, which
+    is what lets a change to one file be merged without re-reading the rest.
+    Fill it either with ``load``, or by passing it to ``build_catalogue`` as
+    ``recorder`` and calling ``seed`` afterwards, so the initial build's rows
+    are kept instead of parsed a second time.
+    """
+    
+    def __init__(self, csv_directory):
+        self.csv_directory = csv_directory
+        self.files = {}
+        self.files_by_name = {}
+        self.unique_instruments = {}
+        self.first_seen = {}
+        self.set_entries = {}
+        self.recorded = {}
+    
+    def _parse(self, filenames, cache_dir=None):
+        """Parse files into per-file states: rows grouped by name plus set details"""
+        set_info = {}
+        structure_info = {}
+        states = {filename: _file_state(filename) for filename in filenames}
+        for instrument in iter_all_csv_files(self.csv_directory, set_info, structure_info,
+                                             cache_dir=cache_dir, filenames=filenames):
+            _add_row(states[instrument.sourceFile], instrument)
+        _finish_states(states, structure_info)
+        return states
+    
+    def load(self, cache_dir=None):
+        """Parse every CSV in the directory"""
+        filenames = sorted(scan_directory(self.csv_directory))
+        self._apply(filenames, self._parse(filenames, cache_dir))
+    
+    def add(self, instrument):
+        """Keep a row streamed past by ``build_catalogue``"""
+        state = self.recorded.get(instrument.sourceFile)
+        if state is None:
+            state = self.recorded[instrument.sourceFile] = _file_state(instrument.sourceFile)
+        _add_row(state, instrument)
+    
+    def seed(self, structure_info):
+        """Take the rows kept by ``add`` as the parsed state of every file of the build"""
+        states = self.recorded
+        self.recorded = {}
+        for filename in structure_info:
+            # Files without a single parsed row
+            if filename not in states:
+                states[filename] = _file_state(filename)
+        _finish_states(states, structure_info)
+        self._apply(sorted(states), states)
+    
+    def records(self):
+        """Yield every parsed row in file and row order, as a full build streams them"""
+        for filename in sorted(self.files):
+            rows = chain.from_iterable(self.files[filename]['rows'].values())
+            yield from sorted(rows, key=attrgetter('rowNumber'))
+    
+    def update(self, filenames):
+        """Re-parse the given files (dropping any that no longer exist) and return the changed names"""
+        present = [filename for filename in filenames
+                   if os.path.isfile(os.path.join(self.csv_directory, filename))]
+        # Parsed without the build cache, which would forget every other file
+        return self._apply(filenames, self._parse(present))
+    
+    def _apply(self, filenames, states):
+        """Swap in new file states and re-merge every instrument name they touch"""
+        affected = set()
+        for filename in filenames:
+            old = self.files.pop(filename, None)
+            if old is not None:
+                affected.update(old['rows'])
+                for name in old['rows']:
+                    self.files_by_name[name].discard(filename)
+            state = states.get(filename)
+            if state is not None:
+                self.files[filename] = state
+                affected.update(state['rows'])
+                for name in state['rows']:
+                    self.files_by_name.setdefault(name, set()).add(filename)
+        
+        for name in affected:
+            self._merge(name)
+        return affected
+    
+    def _merge(self, name):
+        """Rebuild one unique instrument from its rows in file processing order"""
+        filenames = sorted(self.files_by_name.get(name, ()))
+        if not filenames:
+            self.files_by_name.pop(name, None)
+            self.unique_instruments.pop(name, None)
+            self.first_seen.pop(name, None)
+            return
+        
+        index = InstrumentIndex(key=None)
+        for filename in filenames:
+            for row in self.files[filename]['rows'][name]:
+                add_to_unique_instruments(index, row)
+        merged = index.get(name)
+        previous = self.unique_instruments.get(name)
+        # An unchanged instrument stays the same object, so its encoding can be reused
+        if previous is None or previous.to_dict() != merged.to_dict():
+            self.unique_instruments[name] = merged
+        self.first_seen[name] = (filenames[0], self.files[filenames[0]]['firstRow'][name])
+    
+    def catalogue(self):
+        """Return the build_catalogue fields the data files are written from"""
+        set_info = {}
+        structure_info = {}
+        set_specialty_map = {}
+        set_description_map = {}
+        total_instruments = 0
+        for filename in sorted(self.files):
+            state = self.files[filename]
+            if state['info'] is None:
+                continue
+            set_name = state['setName']
+            set_info[set_name] = state['info']
+            structure_info[filename] = state['info']['structure']
+            total_instruments += state['count']
+            if state['speciality']:
+                set_specialty_map[set_name] = state['speciality']
+            if state['setDescription']:
+                set_description_map[set_name] = state['setDescription']
+        
+        # Set entries equal to the previous build's are kept as the same objects,
+        # so a RecordMemo can reuse their encoding like that of unchanged instruments
+        sets_overview = []
+        for set_entry in build_sets_overview(set_info, set_specialty_map, set_description_map):
+            previous = self.set_entries.get(set_entry['name'])
+            sets_overview.append(previous if previous == set_entry else set_entry)
+        self.set_entries = {set_entry['name']: set_entry for set_entry in sets_overview}
+        
+        # Unique instruments keep the order in which a full build first meets them
+        names = sorted(self.unique_instruments, key=self.first_seen.__getitem__)
+        return {
+            'totalInstruments': total_instruments,
+            'uniqueInstruments': [self.unique_instruments[name] for name in names],
+            'setsOverview': sets_overview,
+            'setInfo': set_info,
+            'structureInfo': structure_info
+        }
@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+"""
+Local Surgical Instruments Catalogue Service
+Serves paginated instruments, sets, specialities and search over HTTP
+
+Thin CLI wrapper around instrument_catalogue.service.
+"""
+
+from instrument_catalogue.service import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Shared fixtures for the instrument_catalogue tests
+
+Tests build from a scratch copy of the repository's instrument_csvs/, so
+they can edit, add and remove files without touching the real corpus.
+"""
+
+import os
+import sys
+import shutil
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from instrument_catalogue.catalogue import build_catalogue
+
+CSV_DIRECTORY = os.path.join(ROOT, 'instrument_csvs')
+
+def catalogue_data(catalogue):
+    """Return the build_catalogue fields the data files are written from, as plain data"""
+    return {
+        'totalInstruments': catalogue['totalInstruments'],
+        'uniqueInstruments': [instrument.to_dict() for instrument in catalogue['uniqueInstruments']],
+        'setsOverview': catalogue['setsOverview'],
+        'setInfo': catalogue['setInfo'],
+        'structureInfo': catalogue['structureInfo']
+    }
+
+@pytest.fixture
+def csv_dir(tmp_path):
+    """A writable copy of instrument_csvs/"""
+    directory = tmp_path / 'instrument_csvs'
+    shutil.copytree(CSV_DIRECTORY, directory)
+    return str(directory)
+
+@pytest.fixture
+def build():
+    """Run build_catalogue with the given options and return ``catalogue_data`` of the result"""
+    def build(csv_directory, **options):
+        return catalogue_data(build_catalogue(csv_directory, **options))
+    return build
+
+@pytest.fixture
+def edit_csv(csv_dir):
+    """Replace the first occurrence of some text in one CSV of ``csv_dir``"""
+    def edit_csv(filename, old, new):
+        path = os.path.join(csv_dir, filename)
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        assert old in content
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content.replace(old, new, 1))
+    return edit_csv
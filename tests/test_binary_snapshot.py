@@ -0,0 +1,80 @@
+"""Binary snapshot round trip against the JSON data"""
+
+import json
+from collections import Counter
+
+import pytest
+
+from instrument_catalogue.binary_snapshot import BinarySnapshot, write_binary_snapshot
+from instrument_catalogue.catalogue import build_catalogue
+from instrument_catalogue.cli import create_complete_data
+from instrument_catalogue.records import serialize_record
+
+from conftest import CSV_DIRECTORY
+
+@pytest.fixture(scope='module')
+def complete_data():
+    catalogue = build_catalogue(CSV_DIRECTORY)
+    return create_complete_data(catalogue['totalInstruments'], catalogue['uniqueInstruments'],
+                                catalogue['setsOverview'], catalogue['setInfo'], catalogue['structureInfo'])
+
+@pytest.fixture(scope='module')
+def expected(complete_data):
+    """completeInstrumentsData as a client reading the JSON sees it"""
+    return json.loads(json.dumps(complete_data, default=serialize_record))
+
+@pytest.fixture
+def snapshot(tmp_path, complete_data):
+    path = str(tmp_path / 'catalogue.snapshot.bin')
+    write_binary_snapshot(path, complete_data)
+    with BinarySnapshot(path) as snapshot:
+        yield snapshot
+
+def test_round_trip(snapshot, expected):
+    assert len(snapshot) == len(expected['instruments'])
+    assert [snapshot.instrument(index) for index in range(len(snapshot))] == expected['instruments']
+    assert snapshot.sets() == expected['sets']
+    assert snapshot.metadata == expected['metadata']
+    assert snapshot[-1] == expected['instruments'][-1]
+
+def test_plain_dicts_write_the_same_file(tmp_path, complete_data, expected):
+    from_records = tmp_path / 'records.bin'
+    from_dicts = tmp_path / 'dicts.bin'
+    write_binary_snapshot(str(from_records), complete_data)
+    write_binary_snapshot(str(from_dicts), expected)
+    assert from_records.read_bytes() == from_dicts.read_bytes()
+
+def test_field_matches_instrument(snapshot, expected):
+    fields = {field for instrument in expected['instruments'] for field in instrument}
+    for index, instrument in enumerate(expected['instruments']):
+        for field in fields:
+            assert snapshot.field(index, field) == instrument.get(field)
+
+def test_out_of_range(snapshot):
+    with pytest.raises(IndexError):
+        snapshot.instrument(len(snapshot))
+    with pytest.raises(IndexError):
+        snapshot.field(-1, 'name')
+
+def test_find(snapshot, expected):
+    names = [instrument['name'] for instrument in expected['instruments']]
+    for name in set(names):
+        assert snapshot.find(name) == [index for index, other in enumerate(names) if other == name]
+    assert snapshot.find('No Such Instrument') == []
+    assert snapshot.find('') == []
+
+def test_counts_by(snapshot, expected):
+    instruments = expected['instruments']
+    assert snapshot.counts_by('category') == Counter(instrument['category'] for instrument in instruments
+                                                     if 'category' in instrument)
+    assert snapshot.counts_by('sets') == Counter(set_name for instrument in instruments
+                                                 for set_name in instrument['sets'])
+
+def test_rejects_other_files(tmp_path):
+    empty = tmp_path / 'empty.bin'
+    empty.write_bytes(b'')
+    other = tmp_path / 'other.bin'
+    other.write_bytes(b'\0' * 4096)
+    for path in (empty, other):
+        with pytest.raises(ValueError):
+            BinarySnapshot(str(path))
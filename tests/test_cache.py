@@ -0,0 +1,94 @@
+"""Build cache reuse and invalidation"""
+
+import os
+import json
+
+from instrument_catalogue import cache
+
+SET_FILE = 'Instrument Description - Hand Surgery.csv'
+
+def cache_summary(output):
+    """Return the (unchanged, to parse, removed) counts a cached build printed"""
+    line = next(line for line in output.splitlines() if line.startswith('Build cache:'))
+    return tuple(int(word) for word in line.replace(',', ' ').split() if word.isdigit())
+
+def cached_build(build, capsys, csv_dir, cache_dir, **options):
+    capsys.readouterr()
+    data = build(csv_dir, cache_dir=cache_dir, **options)
+    return data, cache_summary(capsys.readouterr().out)
+
+def test_cold_and_warm_cache_match_uncached_build(build, capsys, csv_dir, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    expected = build(csv_dir)
+    files = len(expected['structureInfo'])
+    
+    cold, summary = cached_build(build, capsys, csv_dir, cache_dir)
+    assert summary == (0, files, 0)
+    assert cold == expected
+    
+    warm, summary = cached_build(build, capsys, csv_dir, cache_dir)
+    assert summary == (files, 0, 0)
+    assert warm == expected
+
+def test_edited_file_is_parsed_again(build, capsys, csv_dir, tmp_path, edit_csv):
+    cache_dir = str(tmp_path / 'cache')
+    cached_build(build, capsys, csv_dir, cache_dir)
+    edit_csv(SET_FILE, 'Orthopedic Surgery', 'Hand Surgery')
+    
+    data, summary = cached_build(build, capsys, csv_dir, cache_dir)
+    assert summary[1:] == (1, 0)
+    assert data == build(csv_dir)
+    assert any(set_entry.get('speciality') == 'Hand Surgery' for set_entry in data['setsOverview'])
+
+def test_touched_file_is_matched_by_content_hash(build, capsys, csv_dir, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    cached_build(build, capsys, csv_dir, cache_dir)
+    path = os.path.join(csv_dir, SET_FILE)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    
+    _, summary = cached_build(build, capsys, csv_dir, cache_dir)
+    assert summary[1] == 0
+    # The new mtime is recorded, so the next build skips hashing the file
+    manifest = cache.load_cache_manifest(cache_dir)
+    assert manifest[path]['mtime'] == stat.st_mtime_ns + 10 ** 9
+
+def test_removed_file_is_dropped_from_cache(build, capsys, csv_dir, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    cached_build(build, capsys, csv_dir, cache_dir)
+    os.remove(os.path.join(csv_dir, SET_FILE))
+    
+    data, summary = cached_build(build, capsys, csv_dir, cache_dir)
+    assert summary == (len(data['structureInfo']), 0, 1)
+    assert data == build(csv_dir)
+    manifest = cache.load_cache_manifest(cache_dir)
+    records = os.listdir(os.path.join(cache_dir, 'records'))
+    assert sorted(records) == sorted({entry['hash'] + '.json' for entry in manifest.values()})
+
+def test_stale_cache_version_is_ignored(build, capsys, csv_dir, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    cached_build(build, capsys, csv_dir, cache_dir)
+    manifest_path = os.path.join(cache_dir, cache.CACHE_MANIFEST)
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    manifest['version'] = cache.CACHE_VERSION - 1
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    
+    data, summary = cached_build(build, capsys, csv_dir, cache_dir)
+    assert summary == (0, len(data['structureInfo']), 0)
+
+def test_interrupted_build_keeps_only_finished_files(capsys, csv_dir, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    file_paths = sorted(os.path.join(csv_dir, filename) for filename in os.listdir(csv_dir))
+    results = cache.cached_file_results(file_paths, cache_dir, workers=1)
+    _, records, _ = next(results)
+    list(records)
+    # A second file is started but abandoned part-way
+    _, records, _ = next(results)
+    next(records)
+    records.close()
+    results.close()
+    
+    assert list(cache.load_cache_manifest(cache_dir)) == [file_paths[0]]
+    assert not [name for name in os.listdir(os.path.join(cache_dir, 'records')) if name.endswith('.tmp')]
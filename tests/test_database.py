@@ -0,0 +1,107 @@
+"""SQLite catalogue store: lookups and full-text search agree with the in-memory catalogue"""
+
+import pytest
+
+from instrument_catalogue.catalogue import build_catalogue
+from instrument_catalogue.database import INSTRUMENT_COLUMNS, SEARCH_WEIGHTS, CatalogueDatabase, write_database
+from instrument_catalogue.normalized import assign_ids
+
+from conftest import CSV_DIRECTORY
+
+@pytest.fixture(scope='module')
+def catalogue():
+    catalogue = build_catalogue(CSV_DIRECTORY)
+    return {
+        'instruments': [instrument.to_dict() for instrument in catalogue['uniqueInstruments']],
+        'setsOverview': catalogue['setsOverview'],
+        'uniqueInstruments': catalogue['uniqueInstruments']
+    }
+
+@pytest.fixture(scope='module')
+def database(tmp_path_factory, catalogue):
+    path = str(tmp_path_factory.mktemp('database') / 'catalogue.db')
+    write_database(path, catalogue['uniqueInstruments'], catalogue['setsOverview'])
+    with CatalogueDatabase(path) as database:
+        yield database
+
+def names(rows):
+    return [row['name'] for row in rows]
+
+def searched_text(instrument):
+    return ' '.join(instrument.get(field) or '' for field in SEARCH_WEIGHTS).lower()
+
+def test_every_instrument_by_slug(database, catalogue):
+    instruments = catalogue['instruments']
+    for slug, instrument in zip(assign_ids(instruments), instruments):
+        stored = database.instrument(slug)
+        assert {column: stored[column] for column in INSTRUMENT_COLUMNS} == \
+            {column: instrument.get(column) for column in INSTRUMENT_COLUMNS}
+        assert stored['sets'] == instrument['sets']
+        assert stored['specialities'] == instrument['specialities']
+    assert database.instrument('no-such-instrument') is None
+
+def test_find_by_name_ignores_case(database, catalogue):
+    for instrument in catalogue['instruments'][::10]:
+        # Names that differ only in case (B.P.Handle No.4 and NO.4) are separate instruments
+        expected = [other['name'] for other in catalogue['instruments']
+                    if other['name'].lower() == instrument['name'].lower()]
+        assert names(database.find_by_name(instrument['name'].upper())) == expected
+    assert database.find_by_name('No Such Instrument') == []
+
+def test_instruments_in_set(database, catalogue):
+    for set_entry in catalogue['setsOverview']:
+        expected = [instrument['name'] for instrument in catalogue['instruments']
+                    if set_entry['name'] in instrument['sets']]
+        assert names(database.instruments_in_set(set_entry['name'])) == expected
+        assert names(database.instruments_in_set(set_entry['name'], limit=3, offset=2)) == expected[2:5]
+
+def test_sets_by_speciality(database, catalogue):
+    overview = sorted(catalogue['setsOverview'], key=lambda set_entry: set_entry['name'])
+    rows = database.sets()
+    assert names(rows) == names(overview)
+    assert [row['speciality'] for row in rows] == [set_entry.get('speciality') for set_entry in overview]
+    assert [row['count'] for row in rows] == [set_entry['count'] for set_entry in overview]
+    
+    specialities = sorted({set_entry['speciality'] for set_entry in overview if set_entry.get('speciality')})
+    assert specialities
+    for speciality in specialities:
+        assert names(database.sets(speciality)) == \
+            [set_entry['name'] for set_entry in overview if set_entry.get('speciality') == speciality]
+
+def test_instruments_in_speciality(database, catalogue):
+    summary = {row['name']: row for row in database.specialities()}
+    for speciality in summary:
+        set_names = {set_entry['name'] for set_entry in catalogue['setsOverview']
+                     if set_entry.get('speciality') == speciality}
+        expected = [instrument['name'] for instrument in catalogue['instruments']
+                    if set_names & set(instrument['sets'])]
+        assert names(database.instruments_in_speciality(speciality)) == expected
+        assert (summary[speciality]['sets'], summary[speciality]['instruments']) == (len(set_names), len(expected))
+
+@pytest.mark.parametrize('word', ['retractor', 'scissors', 'clamp'])
+def test_search_finds_every_instrument_with_the_word(database, catalogue, word):
+    results = database.search(word, limit=len(catalogue['instruments']))
+    found = set(names(results))
+    assert found
+    # Porter stemming may match other forms of the word too, never fewer instruments
+    assert {instrument['name'] for instrument in catalogue['instruments']
+            if word in searched_text(instrument).split()} <= found
+    stem = word.rstrip('s')
+    assert all(stem in searched_text(instrument) for instrument in catalogue['instruments']
+               if instrument['name'] in found)
+    scores = [row['score'] for row in results]
+    assert scores == sorted(scores)
+
+def test_search_narrows_and_pages(database, catalogue):
+    everything = len(catalogue['instruments'])
+    forceps = set(names(database.search('forceps', limit=everything)))
+    curved = set(names(database.search('curved forceps', limit=everything)))
+    assert curved and curved < forceps
+    # The last word is a prefix
+    assert forceps <= set(names(database.search('forc', limit=everything)))
+    assert database.search('forceps', limit=5, offset=5) == database.search('forceps', limit=10)[5:]
+    assert database.search('') == [] and database.search('zzzz') == []
+
+def test_name_matches_rank_first(database):
+    results = database.search('retractor', limit=5)
+    assert all('retractor' in row['name'].lower() for row in results)
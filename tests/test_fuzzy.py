@@ -0,0 +1,105 @@
+"""Near-duplicate names: number keys, the pigeonhole candidate filter, clusters and merges"""
+
+import random
+import itertools
+
+import pytest
+
+from instrument_catalogue.catalogue import build_catalogue
+from instrument_catalogue.fuzzy import (apply_merges, bounded_levenshtein, cluster_names, fuzzy_key, number_key,
+                                        similar_pairs, suggest_merges)
+from instrument_catalogue.records import Instrument, UniqueInstrument
+
+from conftest import CSV_DIRECTORY
+
+def levenshtein(a, b):
+    """Plain dynamic-programming edit distance, the reference for the banded one"""
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+def all_pairs(names, max_distance):
+    """Every pair within ``max_distance`` edits and with the same numbers, by comparing all of them"""
+    keys = [fuzzy_key(name) for name in names]
+    pairs = []
+    for i, j in itertools.combinations(range(len(keys)), 2):
+        # More length difference than edits can never be within reach
+        if abs(len(keys[i]) - len(keys[j])) > max_distance or number_key(keys[i]) != number_key(keys[j]):
+            continue
+        distance = levenshtein(keys[i], keys[j])
+        if distance <= max_distance:
+            pairs.append((i, j, distance))
+    return pairs
+
+def unique(name, sets, **fields):
+    return UniqueInstrument.from_instrument(Instrument(name=name, setName=sets[0], sets=list(sets), **fields))
+
+@pytest.mark.parametrize('name, numbers', [
+    ('Mayo Scissors', ()),
+    ('Mayo Scissors 7"', ('7',)),
+    ('8 inch scissors', ('8',)),
+    ('B.P.Handle No.3', ('3',)),
+    ('B.P.Handle No.3L', ('3l',)),
+    ('B.P.Handle No.3 L', ('3l',)),
+    ('Langenbeck Retractor 7 x 10', ('7', '10')),
+    ('Size 10 Blade', ('10',)),
+])
+def test_number_key(name, numbers):
+    assert number_key(fuzzy_key(name)) == numbers
+
+@pytest.mark.parametrize('seed', range(5))
+def test_bounded_levenshtein_matches_full_distance(seed):
+    generator = random.Random(seed)
+    for _ in range(300):
+        a = ''.join(generator.choice('abc ') for _ in range(generator.randint(0, 9)))
+        b = ''.join(generator.choice('abc ') for _ in range(generator.randint(0, 9)))
+        limit = generator.randint(0, 4)
+        assert bounded_levenshtein(a, b, limit) == min(levenshtein(a, b), limit + 1)
+
+@pytest.mark.parametrize('max_distance', [0, 1, 2, 3])
+@pytest.mark.parametrize('seed', range(3))
+def test_candidate_filter_finds_every_close_pair(seed, max_distance):
+    # Short names over a small alphabet, with shared numbers, give many close pairs of every length
+    generator = random.Random(seed)
+    names = [''.join(generator.choice('ab .') for _ in range(generator.randint(0, 10))) +
+             generator.choice(['', ' 3', ' 3l', ' 7 x 10'])
+             for _ in range(250)]
+    assert sorted(similar_pairs(names, max_distance)) == all_pairs(names, max_distance)
+
+def test_candidate_filter_on_repository_names():
+    names = [instrument.name for instrument in build_catalogue(CSV_DIRECTORY)['uniqueInstruments']]
+    for max_distance in (1, 2, 3):
+        assert sorted(similar_pairs(names, max_distance)) == all_pairs(names, max_distance)
+
+def test_clusters_are_transitive_and_respect_numbers():
+    names = ['Mayo Scissors', 'Kelly Clamp', 'Mayo Scisors', 'Mayo Scissors 7"', 'Mayo Scissors 8"',
+             'Mayo Scisor', 'B.P.Handle No.3', 'B.P.Handle No.3L', 'B.P.Handle No 3', 'Kelly Clamp']
+    # Scissors -> Scisors -> Scisor is linked in two steps of one edit each
+    assert cluster_names(names, max_distance=1) == [[0, 2, 5], [1, 9], [6, 8]]
+    # Punctuation is not an edit: No.3 and No 3 have the same key
+    assert cluster_names(names, max_distance=0) == [[1, 9], [6, 8]]
+
+def test_suggested_merges_are_applied_to_the_canonical_name():
+    instruments = [
+        unique('Mayo Scisors', ['Hand Surgery'], brief='Curved blades', usage='Cutting sutures'),
+        unique('Mayo Scissors', ['Hand Surgery', 'Spinal Set'], usage='Cutting tissue',
+               speciality='Orthopedic Surgery'),
+        unique('Kelly Clamp', ['Appendisectomy']),
+        unique('Mayo Scisor', ['Thyroid Set'], speciality='General Surgery'),
+    ]
+    # The spelling found in the most sets is canonical
+    suggestions = suggest_merges(instruments, max_distance=1)
+    assert suggestions == [{'canonical': 'Mayo Scissors', 'variants': ['Mayo Scisors', 'Mayo Scisor']}]
+    
+    merged = apply_merges(instruments, suggestions)
+    assert [instrument.name for instrument in merged] == ['Mayo Scissors', 'Kelly Clamp']
+    mayo = merged[0]
+    assert mayo.sets == ['Hand Surgery', 'Spinal Set', 'Thyroid Set']
+    assert mayo.specialities == ['Orthopedic Surgery', 'General Surgery']
+    # Empty fields are filled from the variants, filled ones are kept
+    assert (mayo.brief, mayo.usage) == ('Curved blades', 'Cutting tissue')
+    assert merged[1].sets == ['Appendisectomy']
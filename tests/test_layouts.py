@@ -0,0 +1,79 @@
+"""CSV layout detection and the records each layout yields"""
+
+import os
+
+import pytest
+
+from instrument_catalogue.layouts import NEW_COLUMNS, OLD_COLUMNS, detect_layout, get_layout
+from instrument_catalogue.parsing import detect_csv_structure, list_csv_files, stream_csv_file
+
+from conftest import CSV_DIRECTORY
+
+OLD_ROW = 'Mayo Scissors,Scissors,Cuts tissue,Curved blades,Curved,Cutting,Handle with care,Autoclave,Check hinge,'
+NEW_ROW = 'General Surgery,Basic set,' + OLD_ROW
+
+def write_csv(tmp_path, name, lines):
+    path = tmp_path / name
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return str(path)
+
+@pytest.mark.parametrize('header, rows, expected', [
+    (OLD_COLUMNS, [OLD_ROW], 'old'),
+    (('SPECIALITY', 'SET DISCRIPTION') + OLD_COLUMNS, [NEW_ROW], 'new'),
+    # Records packed onto one line give a row more fields than the header
+    (OLD_COLUMNS, [OLD_ROW + ',' * 10 + OLD_ROW], 'multiline'),
+])
+def test_detect_layout(header, rows, expected):
+    sample = '\n'.join([','.join(header)] + rows) + '\n'
+    layout, detected_header = detect_layout(sample, complete=True)
+    assert layout.name == expected
+    assert detected_header == list(header)
+
+def test_truncated_sample_drops_partial_last_line():
+    sample = ','.join(OLD_COLUMNS) + '\n' + OLD_ROW + '\n' + OLD_ROW + ',' * 10 + 'Kelly'
+    # The cut-off line would look like a multi-line record if it were parsed
+    assert detect_layout(sample, complete=False)[0].name == 'old'
+    assert detect_layout(sample, complete=True)[0].name == 'multiline'
+
+def test_unknown_header_falls_back_to_old():
+    assert detect_layout('a,b,c\n1,2,3\n', complete=True)[0].name == 'old'
+    with pytest.raises(KeyError):
+        get_layout('spreadsheet')
+
+def test_old_layout_records(tmp_path):
+    path = write_csv(tmp_path, 'Instrument Description - Basic.csv',
+                     [','.join(OLD_COLUMNS), OLD_ROW, ',' * (len(OLD_COLUMNS) - 1), 'Kelly Forceps,Forceps'])
+    structure, records = stream_csv_file(path)
+    records = list(records)
+    assert structure == 'old'
+    assert [(record.name, record.rowNumber) for record in records] == [('Mayo Scissors', 2), ('Kelly Forceps', 4)]
+    assert records[0].category == 'Scissors'
+    assert records[0].speciality == '' and records[0].setDescription == ''
+
+def test_new_layout_records(tmp_path):
+    header = ','.join(NEW_COLUMNS[-2:] + NEW_COLUMNS[:-2])
+    path = write_csv(tmp_path, 'new.csv', [header, NEW_ROW])
+    structure, records = stream_csv_file(path)
+    (record,) = records
+    assert structure == 'new'
+    assert (record.name, record.speciality, record.setDescription) == ('Mayo Scissors', 'General Surgery', 'Basic set')
+
+def test_multiline_layout_records(tmp_path):
+    path = write_csv(tmp_path, 'packed.csv',
+                     [','.join(OLD_COLUMNS), OLD_ROW + ',' * 10 + OLD_ROW.replace('Mayo Scissors', 'Kelly Forceps')])
+    structure, records = stream_csv_file(path)
+    assert structure == 'old'
+    assert [record.name for record in records] == ['Mayo Scissors', 'Kelly Forceps']
+
+def test_forced_layout(tmp_path):
+    path = write_csv(tmp_path, 'forced.csv', [','.join(OLD_COLUMNS), OLD_ROW + ',' * 10 + OLD_ROW])
+    _, records = stream_csv_file(path, layout='old')
+    # Read as one regular row, the packed line is a single record
+    assert len(list(records)) == 1
+
+def test_repository_corpus_structures():
+    structures = {filename: detect_csv_structure(os.path.join(CSV_DIRECTORY, filename))
+                  for filename in list_csv_files(CSV_DIRECTORY)}
+    assert set(structures.values()) == {'old', 'new'}
+    assert structures['Instrument Description -  Single Instruments.csv'] == 'old'
+    assert structures['Instrument Description - Tracheostomy Set.csv'] == 'new'
@@ -0,0 +1,30 @@
+"""Parallel parsing gives the same catalogue as a serial build"""
+
+import os
+
+import pytest
+
+@pytest.mark.parametrize('workers', [2, 3, 0])
+def test_workers_match_serial_build(build, csv_dir, workers):
+    assert build(csv_dir, workers=workers) == build(csv_dir, workers=1)
+
+def test_workers_with_cache_match_serial_build(build, csv_dir, tmp_path, edit_csv):
+    cache_dir = str(tmp_path / 'cache')
+    expected = build(csv_dir)
+    assert build(csv_dir, workers=2, cache_dir=cache_dir) == expected
+    
+    # Only some files are parsed in the pool, interleaved with cache hits
+    edit_csv('Instrument Description - Spinal Set.csv', 'Orthopedic Surgery', 'Spinal Surgery')
+    edit_csv('Instrument Description - Appendisectomy.csv', 'General Surgery', 'Abdominal Surgery')
+    assert build(csv_dir, workers=2, cache_dir=cache_dir) == build(csv_dir)
+
+def test_unreadable_file_is_skipped_in_every_mode(build, csv_dir, tmp_path):
+    # A directory named like a CSV fails to open, like a file deleted during the build
+    os.mkdir(os.path.join(csv_dir, 'Instrument Description - Broken.csv'))
+    serial = build(csv_dir, workers=1)
+    assert 'Instrument Description - Broken.csv' not in serial['structureInfo']
+    assert build(csv_dir, workers=2) == serial
+    # The cache hashes each file before parsing it
+    cache_dir = str(tmp_path / 'cache')
+    assert build(csv_dir, workers=1, cache_dir=cache_dir) == serial
+    assert build(csv_dir, workers=2, cache_dir=cache_dir) == serial
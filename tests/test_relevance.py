@@ -0,0 +1,87 @@
+"""BM25F relevance index: ranking paths agree and the exported index round-trips"""
+
+import json
+
+import pytest
+
+from instrument_catalogue import relevance
+from instrument_catalogue.catalogue import build_catalogue
+from instrument_catalogue.relevance import RelevanceIndex, stem, write_relevance_index
+
+from conftest import CSV_DIRECTORY
+
+QUERIES = ['forceps', 'retractor', 'curved artery forceps', 'scis', 'used to', 'bone cut', 'tissue ret',
+           'no such instrument']
+
+@pytest.fixture(scope='module')
+def instruments():
+    return build_catalogue(CSV_DIRECTORY)['uniqueInstruments']
+
+@pytest.fixture(scope='module')
+def index(instruments):
+    return RelevanceIndex.from_instruments(instruments)
+
+def test_stemming():
+    assert stem('clamps') == stem('clamping') == stem('clamp') == 'clamp'
+    assert stem('cutting') == 'cut'
+    assert stem('biopsies') == stem('biopsy')
+    assert stem('scissors') == 'scissor'
+    assert stem('sterilized') == 'steriliz'
+    assert stem('4mm') == '4mm' and stem('use') == 'use'
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_top_results_are_the_head_of_the_full_ranking(index, query):
+    ranking = index.search(query, limit=None)
+    for limit in (1, 5, 20):
+        top = index.search(query, limit)
+        assert [instrument_id for instrument_id, _ in top] == [instrument_id for instrument_id, _ in ranking[:limit]]
+        assert [score for _, score in top] == pytest.approx([score for _, score in ranking[:limit]])
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_sparse_scoring_without_numpy(monkeypatch, instruments, index, query):
+    expected = index.search(query, 10)
+    monkeypatch.setattr(relevance, 'np', None)
+    sparse = RelevanceIndex.from_instruments(instruments)
+    assert not sparse._columns
+    results = sparse.search(query, 10)
+    assert [instrument_id for instrument_id, _ in results] == [instrument_id for instrument_id, _ in expected]
+    assert [score for _, score in results] == pytest.approx([score for _, score in expected])
+
+@pytest.mark.parametrize('limit', [0, -1])
+@pytest.mark.parametrize('dense', [True, False])
+def test_empty_limit(monkeypatch, index, limit, dense):
+    if not dense:
+        # Read postings even for the common words below
+        monkeypatch.setattr(index, 'dense_threshold', index.size + 1)
+    for query in ('forceps', 'curved artery forceps'):
+        assert index.search(query, limit) == []
+
+def test_every_query_token_must_match(index):
+    forceps = {instrument_id for instrument_id, _ in index.search('forceps', limit=None)}
+    curved = {instrument_id for instrument_id, _ in index.search('curved forceps', limit=None)}
+    assert curved and curved < forceps
+    assert index.search('forceps zzzz') == []
+    # Only the last token is a prefix
+    assert index.search('scis') and not index.search('scis forceps', prefix=True)
+
+def test_round_trip(index):
+    exported = index.to_dict()
+    loaded = RelevanceIndex.from_dict(json.loads(json.dumps(exported)))
+    assert loaded.to_dict() == exported
+    assert loaded.terms == index.terms and loaded.size == index.size
+    for query in QUERIES:
+        expected = dict(index.search(query, limit=None))
+        results = dict(loaded.search(query, limit=None))
+        # Scores are exported rounded, so only near-ties may swap places
+        assert results.keys() == expected.keys()
+        assert list(results.values()) == pytest.approx(list(expected[key] for key in results), abs=1e-3)
+
+def test_written_module(tmp_path, index):
+    path = tmp_path / 'relevanceIndex.js'
+    write_relevance_index(index, str(path))
+    text = path.read_text(encoding='utf-8')
+    prefix = 'export const relevanceIndex = '
+    assert text.startswith('// Surgical Instruments Relevance Index\n')
+    body = text.split('\n', 1)[1]
+    assert body.startswith(prefix) and body.endswith(';\n')
+    assert json.loads(body[len(prefix):-2]) == json.loads(json.dumps(index.to_dict()))
@@ -0,0 +1,102 @@
+"""Query service responses, ETags and conditional requests"""
+
+import json
+import asyncio
+
+import pytest
+
+from instrument_catalogue.catalogue import build_catalogue
+from instrument_catalogue.service import CatalogueQueryIndex, CatalogueService, etag_matches, start_service
+
+from conftest import CSV_DIRECTORY
+
+@pytest.fixture(scope='module')
+def index():
+    return CatalogueQueryIndex.from_build(build_catalogue(CSV_DIRECTORY))
+
+@pytest.mark.parametrize('header, matches', [
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"xyz", W/"abc"', True),
+    ('*', True),
+    ('"xyz"', False),
+    ('abc', False),
+    ('', False),
+])
+def test_etag_matches(header, matches):
+    assert etag_matches(header, '"abc"') is matches
+
+def test_get_returns_etag_and_body(index):
+    status, headers, body = CatalogueService(index).respond('GET', '/instruments?limit=2', {})
+    assert status == 200
+    assert dict(headers)['ETag'] == index.etag
+    page = json.loads(body)
+    assert page['total'] == len(index.instruments) and len(page['items']) == 2
+
+@pytest.mark.parametrize('header', ['{etag}', 'W/{etag}', '"stale", {etag}', '*'])
+def test_matching_if_none_match_is_not_modified(index, header):
+    service = CatalogueService(index)
+    status, headers, body = service.respond('GET', '/sets', {'if-none-match': header.format(etag=index.etag)})
+    assert (status, body) == (304, b'')
+    assert dict(headers)['ETag'] == index.etag
+
+def test_stale_etag_gets_full_response(index):
+    status, _, body = CatalogueService(index).respond('GET', '/sets', {'if-none-match': '"stale"'})
+    assert status == 200 and json.loads(body)['total'] == len(index.sets)
+
+@pytest.mark.parametrize('target, status', [
+    ('/instruments?limit=x', 400),
+    ('/search', 400),
+    ('/instruments/no-such-instrument', 404),
+    ('/nowhere', 404),
+])
+def test_errors_are_not_conditional(index, target, status):
+    service = CatalogueService(index)
+    for headers in ({'if-none-match': index.etag}, {}):
+        error_status, error_headers, body = service.respond('GET', target, headers)
+        assert error_status == status and 'error' in json.loads(body)
+        assert 'ETag' not in dict(error_headers)
+
+def test_cached_response_is_not_modified(index):
+    service = CatalogueService(index)
+    assert service.respond('GET', '/sets?limit=3', {})[0] == 200
+    assert service.respond('GET', '/sets?limit=3', {'if-none-match': index.etag})[0] == 304
+
+def test_etag_follows_catalogue_content(index):
+    catalogue = build_catalogue(CSV_DIRECTORY)
+    assert CatalogueQueryIndex.from_build(catalogue).etag == index.etag
+    changed = CatalogueQueryIndex(catalogue['uniqueInstruments'][1:], catalogue['setsOverview'])
+    assert changed.etag != index.etag
+
+async def _request(port, lines):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+    await writer.drain()
+    responses = []
+    for _ in range(2):
+        head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+        headers = dict(line.split(': ', 1) for line in head[1:] if line)
+        body = await reader.readexactly(int(headers['Content-Length']))
+        responses.append((head[0], headers, body))
+    writer.close()
+    await writer.wait_closed()
+    return responses
+
+def test_conditional_request_over_http(index):
+    async def exchange():
+        _, server = await start_service(index, port=0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            # Two requests on one keep-alive connection: a full response, then a 304
+            return await _request(port, ['GET /specialities HTTP/1.1', 'Host: localhost', '',
+                                         'GET /specialities HTTP/1.1', f'If-None-Match: {index.etag}'])
+        finally:
+            server.close()
+            await server.wait_closed()
+    
+    (first_status, first_headers, body), (second_status, second_headers, empty) = asyncio.run(exchange())
+    assert first_status == 'HTTP/1.1 200 OK'
+    assert json.loads(body)['total'] == len(index.specialities)
+    assert second_status == 'HTTP/1.1 304 Not Modified'
+    assert second_headers['ETag'] == first_headers['ETag'] == index.etag
+    assert second_headers['Connection'] == 'keep-alive' and empty == b''
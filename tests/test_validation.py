@@ -0,0 +1,123 @@
+"""Batch schema validation of rows and sets, checked against jsonschema where installed"""
+
+import os
+
+import pytest
+
+from instrument_catalogue import validation
+from instrument_catalogue.catalogue import build_catalogue, iter_all_csv_files
+
+from conftest import CSV_DIRECTORY, ROOT
+
+SPEC = validation.load_spec(os.path.join(ROOT, validation.DEFAULT_SPEC_PATH))
+
+needs_jsonschema = pytest.mark.skipif(not validation.available(), reason="jsonschema is not installed")
+
+VALID_ROW = {
+    'name': 'Mayo Scissors',
+    'category': 'Cutting',
+    'sourceFile': 'Instrument Description - Hand Surgery.csv',
+    'rowNumber': 2,
+    'sets': ['Hand Surgery'],
+    'referenceImages': 'https://example.com/mayo.jpg',
+    'speciality': 'Orthopedic Surgery'
+}
+
+VALID_SET = {
+    'name': 'Hand Surgery',
+    'count': 12,
+    'structure': 'new',
+    'hasSpeciality': True,
+    'hasSetDescription': False,
+    'filename': 'Instrument Description - Hand Surgery.csv',
+    'speciality': 'Orthopedic Surgery'
+}
+
+# (schema, base record, changes) for records every rule accepts
+VALID_CASES = [
+    ('row', VALID_ROW, {}),
+    ('row', VALID_ROW, {'name': 'x' * 200}),
+    ('row', VALID_ROW, {'referenceImages': ''}),
+    ('row', VALID_ROW, {'referenceImages': 'http://example.org/images/a.png'}),
+    ('row', VALID_ROW, {'speciality': ''}),
+    ('row', VALID_ROW, {'rowNumber': 1}),
+    ('set', VALID_SET, {'count': 0}),
+    ('set', VALID_SET, {'structure': 'old'}),
+    ('set', VALID_SET, {'speciality': None}),
+]
+
+# (schema, base record, changes, field, rule) for records breaking exactly one rule
+INVALID_CASES = [
+    ('row', VALID_ROW, {'category': ''}, 'category', 'required'),
+    ('set', VALID_SET, {'name': ''}, 'name', 'required'),
+    ('row', VALID_ROW, {'name': 'x' * 201}, 'name', 'maxLength'),
+    ('set', VALID_SET, {'name': 'x' * 101}, 'name', 'maxLength'),
+    ('row', VALID_ROW, {'speciality': 'Cardiology'}, 'speciality', 'enum'),
+    ('set', VALID_SET, {'structure': 'mixed'}, 'structure', 'enum'),
+    ('row', VALID_ROW, {'rowNumber': 0}, 'rowNumber', 'exclusiveMinimum'),
+    ('set', VALID_SET, {'count': -1}, 'count', 'minimum'),
+    ('set', VALID_SET, {'count': '12'}, 'count', 'type'),
+    ('set', VALID_SET, {'hasSpeciality': 'yes'}, 'hasSpeciality', 'type'),
+    ('row', VALID_ROW, {'referenceImages': 'mayo.jpg'}, 'referenceImages', 'pattern'),
+    ('row', VALID_ROW, {'referenceImages': 'https://example.com/mayo scissors.jpg'}, 'referenceImages', 'pattern'),
+    ('row', VALID_ROW, {'sets': ['Hand Surgery', 3]}, 'sets', 'items.type'),
+]
+
+SCHEMAS = {'row': validation.row_schema(SPEC), 'set': validation.sets_schema(SPEC)}
+
+def report_errors(schema, records, **options):
+    """Return (row, field, rule) for every error the batch validator reports"""
+    report = validation.RecordValidator(SCHEMAS[schema], **options).validate(records)
+    assert report['errors'] == len(report['details'])
+    return sorted((error['row'], error['field'], error['rule']) for error in report['details'])
+
+@pytest.mark.parametrize('schema, base, changes', VALID_CASES)
+def test_valid_records(schema, base, changes):
+    assert report_errors(schema, [dict(base, **changes)]) == []
+
+@pytest.mark.parametrize('schema, base, changes, field, rule', INVALID_CASES)
+def test_invalid_records(schema, base, changes, field, rule):
+    # Surrounded by valid records, so the whole-batch test fails and the values are walked
+    records = [dict(base, rowNumber=row) for row in (1, 3)]
+    records.insert(1, dict(base, **changes, **({} if 'rowNumber' in changes else {'rowNumber': 2})))
+    expected_row = changes.get('rowNumber', 2)
+    assert report_errors(schema, records) == [(expected_row, field, rule)]
+
+@pytest.mark.parametrize('batch_size', [1, 3, validation.DEFAULT_BATCH_SIZE])
+def test_errors_keep_their_row_across_batches(batch_size):
+    records = []
+    expected = []
+    for row, (schema, base, changes, field, rule) in enumerate(INVALID_CASES, start=1):
+        if schema == 'set':
+            records.append(dict(base, **changes, rowNumber=row))
+            expected.append((row, field, rule))
+    assert report_errors('set', records, batch_size=batch_size) == sorted(expected)
+
+def test_error_details_are_capped_but_counted():
+    records = [dict(VALID_SET, name='', rowNumber=row) for row in range(1, 11)]
+    report = validation.RecordValidator(SCHEMAS['set'], max_errors=3).validate(records)
+    assert (report['errors'], report['invalidRecords'], len(report['details'])) == (10, 10, 3)
+    assert report['byRule'] == {'name: required': 10}
+
+@needs_jsonschema
+@pytest.mark.parametrize('schema, base, changes', VALID_CASES)
+def test_jsonschema_accepts_valid_records(schema, base, changes):
+    assert validation.jsonschema_errors([dict(base, **changes)], SCHEMAS[schema]) == []
+
+@needs_jsonschema
+@pytest.mark.parametrize('schema, base, changes, field, rule', INVALID_CASES)
+def test_jsonschema_rejects_the_same_field(schema, base, changes, field, rule):
+    errors = validation.jsonschema_errors([dict(base, **changes)], SCHEMAS[schema])
+    assert {error_field for _, _, error_field, _ in errors} == {field}
+
+@needs_jsonschema
+def test_repository_rows_and_sets_match_jsonschema():
+    rows = list(iter_all_csv_files(CSV_DIRECTORY, {}, {}))
+    sets_overview = build_catalogue(CSV_DIRECTORY)['setsOverview']
+    for schema, records in ((SCHEMAS['row'], rows), (SCHEMAS['set'], sets_overview)):
+        report = validation.RecordValidator(schema, max_errors=len(records) * len(schema['properties'])) \
+            .validate(records)
+        found = {(error['file'], error['row'], error['field']) for error in report['details']}
+        expected = {(source_file, row, field)
+                    for source_file, row, field, _ in validation.jsonschema_errors(records, schema)}
+        assert found == expected
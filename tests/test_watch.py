@@ -0,0 +1,88 @@
+"""Watch mode: patching the in-memory catalogue gives the same result as a full build"""
+
+import os
+import shutil
+import threading
+
+import pytest
+
+from instrument_catalogue.catalogue import build_catalogue, iter_all_csv_files
+from instrument_catalogue.watch import IncrementalCatalogue, scan_directory, watch_directory
+
+from conftest import CSV_DIRECTORY, catalogue_data
+
+EDITED = 'Instrument Description - Thyroid Retractor Set.csv'
+
+def seeded(csv_dir):
+    """Return an IncrementalCatalogue filled from a full build, as --watch does"""
+    incremental = IncrementalCatalogue(csv_dir)
+    catalogue = build_catalogue(csv_dir, recorder=incremental)
+    incremental.seed(catalogue['structureInfo'])
+    return incremental
+
+@pytest.fixture(params=['seed', 'load'])
+def incremental(request, csv_dir):
+    if request.param == 'seed':
+        return seeded(csv_dir)
+    incremental = IncrementalCatalogue(csv_dir)
+    incremental.load()
+    return incremental
+
+def test_initial_catalogue_matches_full_build(incremental, build, csv_dir):
+    assert catalogue_data(incremental.catalogue()) == build(csv_dir)
+
+def test_records_follow_build_order(incremental, csv_dir):
+    streamed = [(record.sourceFile, record.rowNumber)
+                for record in iter_all_csv_files(csv_dir, {}, {})]
+    assert [(record.sourceFile, record.rowNumber) for record in incremental.records()] == streamed
+
+def test_edited_file(incremental, build, csv_dir, edit_csv):
+    edit_csv(EDITED, 'Jolls Thyroid Retractor', 'Joll Thyroid Retractor')
+    affected = incremental.update([EDITED])
+    # The old and new names are both re-merged
+    assert {'Jolls Thyroid Retractor', 'Joll Thyroid Retractor'} <= affected
+    assert catalogue_data(incremental.catalogue()) == build(csv_dir)
+
+def test_added_and_removed_files(incremental, build, csv_dir):
+    added = 'Instrument Description - Thyroid Retractor Set (copy).csv'
+    removed = 'Instrument Description - Hand Surgery.csv'
+    shutil.copy(os.path.join(csv_dir, EDITED), os.path.join(csv_dir, added))
+    os.remove(os.path.join(csv_dir, removed))
+    incremental.update([added, removed])
+    assert catalogue_data(incremental.catalogue()) == build(csv_dir)
+
+def test_successive_patches(incremental, build, csv_dir, edit_csv):
+    edit_csv(EDITED, 'Jolls Thyroid Retractor', 'Joll Thyroid Retractor')
+    incremental.update([EDITED])
+    incremental.catalogue()
+    edit_csv(EDITED, 'Joll Thyroid Retractor', 'Jolls Thyroid Retractor')
+    incremental.update([EDITED])
+    assert catalogue_data(incremental.catalogue()) == build(CSV_DIRECTORY)
+
+def test_unchanged_instruments_keep_their_objects(csv_dir, edit_csv):
+    incremental = seeded(csv_dir)
+    before = {instrument.name: instrument for instrument in incremental.catalogue()['uniqueInstruments']}
+    edit_csv(EDITED, 'Jolls Thyroid Retractor', 'Joll Thyroid Retractor')
+    affected = incremental.update([EDITED])
+    after = incremental.catalogue()['uniqueInstruments']
+    untouched = [instrument for instrument in after if instrument.name not in affected]
+    assert untouched and all(before[instrument.name] is instrument for instrument in untouched)
+
+def test_watch_directory_reports_one_settled_burst(csv_dir):
+    changes = watch_directory(csv_dir, poll_interval=0.01, debounce=0.1)
+    first = os.path.join(csv_dir, EDITED)
+    second = os.path.join(csv_dir, 'Instrument Description - New Set.csv')
+    
+    def save_twice():
+        with open(first, 'a', encoding='utf-8') as f:
+            f.write('\n')
+        shutil.copy(first, second)
+    
+    # The generator takes its first scan as soon as next() runs, well before the timer fires
+    timer = threading.Timer(0.05, save_twice)
+    timer.start()
+    try:
+        assert next(changes) == sorted([EDITED, os.path.basename(second)])
+    finally:
+        timer.join()
+    assert scan_directory(csv_dir)[EDITED][1] == os.path.getsize(first)